@@ -1,6 +1,85 @@
+from typing import List
+
+import numpy as np
 import openpyxl as xl
+import pandas as pd
 from openpyxl.worksheet.worksheet import Worksheet
 
+from Style_Formatters import center
+
+
+def _saved_float(value: float):
+    """:return: a float as it reads back from the saved workbook"""
+    text = '%.16g' % value
+
+    return float(text) if any(char in text for char in '.en') else int(text)  # 'n' for nan/inf
+
+
+def _saved_lengths(column: pd.Series) -> pd.Series:
+    """:return: len(str()) of every value of a dF column, as it reads back from the saved workbook. missing values (and
+    '') are written as empty cells, which read back as None; 4 characters, same as align_and_center measures them"""
+    if pd.api.types.is_float_dtype(column):
+        values = column.to_numpy(dtype='float64', na_value=np.nan)
+        lengths = pd.Series(values, index=column.index).astype(str).str.len()
+
+        # whole floats read back as ints, so without the '.0'; the sign of -0.0 is lost too
+        whole = np.isfinite(values) & (values == np.floor(values)) & (np.abs(values) < 1e16)
+        lengths[whole] -= 2
+        lengths[values == 0] = 1
+
+        # openpyxl writes 16 significant digits, only a repr of 18+ characters can have 17
+        long = lengths.to_numpy() >= 18
+        lengths[long] = np.array([len(str(_saved_float(value))) for value in values[long]], dtype='int64')
+
+        return lengths.mask(column.isna(), len(str(None)))
+
+    elif pd.api.types.is_datetime64_any_dtype(column):
+        saved = column.dt.strftime('%Y-%m-%d %H:%M:%S')  # dates read back as datetimes
+        missing = column.isna()
+
+    else:
+        saved = column.astype('string')
+        missing = saved.isna() | (saved == '')
+
+    return saved.str.len().mask(missing, len(str(None)))
+
+
+def column_widths(df: pd.DataFrame) -> List[int]:
+    """Works out the column widths `align_and_center` gives a sheet written with df.to_excel(index=False), once saved
+    and reloaded, straight from the dF; one vectorized string-length max per column.
+
+    :param df: (dF) the frame written to the sheet
+    :return: (list) one width per column; the longest header/value + 5
+    """
+    widths = []
+
+    for name, column in df.items():
+        lengths = _saved_lengths(column)
+        longest = max(len(str(name)), int(lengths.max()) if len(lengths) else 0)
+
+        widths.append(longest + 5)  # add a little extra padding
+
+    return widths
+
+
+def fit_and_center(worksheet: Worksheet, df: pd.DataFrame) -> None:
+    """ adjust column width based on text, then center said text, of a sheet written from a dF. same result as
+    align_and_center, without going through the sheet cell by cell
+
+    :param worksheet: (var) your openpyxl worksheet
+    :param df: (dF) the frame written to the sheet, with df.to_excel(index=False)
+
+    Example:
+        df.to_excel(writer, sheet_name='in stock', index=False)
+
+        fit_and_center(writer.sheets['in stock'], df)
+    """
+    for column_number, width in enumerate(column_widths(df), start=1):
+        worksheet.column_dimensions[xl.utils.get_column_letter(column_number)].width = width
+
+    # center every cell, while we're at it. one shared alignment for the whole sheet
+    center(worksheet, f'A1:{xl.utils.get_column_letter(worksheet.max_column)}{worksheet.max_row}')
+
 
 def align_and_center(worksheet: Worksheet) -> None:
     """ adjust column width based on text, then center said text, of your excel data array
@@ -0,0 +1,168 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from History_Store import load_from_store
+from Parallel_Loader import pool_context
+from Parse_Cache import ParseCache
+from Period_Comparison import Period
+from Report_Pipeline import load, render, wrangle
+from Report_Wrangler import Report, ReportError, report_masks
+from Report_Writer import ChartOptions
+from Stage_Profiler import PROFILER
+from Time_Series import DateWindow
+
+
+def _render(report: Report, output_dir: str, chart: ChartOptions) -> Union[str, ReportError]:
+    """render, returning the error instead of raising it, so one bad workbook doesn't sink the whole pool (or the other
+    brands' workbooks). whatever went wrong is handed back as a ReportError."""
+    try:
+        return render(report, output_dir, chart)
+
+    except Exception as e:
+        return ReportError(f'Could not write the workbook for {report.brand_filter!r}: {type(e).__name__}: {e}')
+
+
+def _render_in_worker(
+        report: Report
+        , output_dir: str
+        , chart: ChartOptions
+) -> Tuple[Union[str, ReportError], List[Dict]]:
+    """_render, in a pool worker. the stages it profiled are handed back, since the worker's profiler dies with it."""
+    PROFILER.records = []
+
+    return _render(report, output_dir, chart), PROFILER.records
+
+
+def run_batch(
+        directory: Optional[Union[str, Path]]
+        , brand_filters: Iterable[str]
+        , output_dir: Optional[Union[str, Path]] = None
+        , max_workers: Optional[int] = None
+        , cache: Optional[ParseCache] = None
+        , workbook_workers: int = 1
+        , stream_sales: bool = False
+        , engine: str = 'pandas'
+        , chunksize: int = 500_000
+        , state_dir: Optional[Union[str, Path]] = None
+        , granularity: str = 'D'
+        , periods: Optional[Sequence[Period]] = None
+        , chart: ChartOptions = ChartOptions()
+        , store_path: Optional[Union[str, Path]] = None
+        , start: Optional[pd.Timestamp] = None
+        , end: Optional[pd.Timestamp] = None
+        , verbose: bool = False
+) -> Dict[str, Union[str, ReportError]]:
+    """Writes a report for each of several brands/keywords, reading and cleaning the data folder only once.
+
+    The files are loaded and concatenated once, and the rows of every brand are then flagged in a single pass over each
+    report (see `report_masks`), looked up in a keyword index of the distinct product names (see Keyword_Index) that is
+    kept in `cache` until the files change.
+
+    :param directory: (str) the folder holding your downloaded FBA reports. None when reporting from a store
+    :param brand_filters: (list) the brands/keywords to report on. '' (or a single space) returns everything. repeats
+                          (ignoring case and surrounding spaces) are reported once, under their first spelling
+    :param output_dir: (str) the folder to write the workbooks to. defaults to `directory` (the current folder when
+                       reporting from a store)
+    :param max_workers: (int) the number of processes used to parse the files. None uses every core
+    :param cache: (ParseCache) optional cache of parsed files
+    :param workbook_workers: (int) the number of processes writing workbooks in parallel. 1 writes them one by one
+    :param stream_sales: (bool) read the sales files chunk by chunk, once per brand, instead of into memory
+    :param engine: (str) what reads and aggregates the sales files; 'pandas', or 'polars' (a multi-threaded scan per
+                   brand, see Polars_Backend). can't be combined with streaming
+    :param chunksize: (int) the number of sales rows read per chunk, when streaming
+    :param state_dir: (str) keep each brand's sales totals between runs in this folder. only used when streaming
+    :param granularity: (str) the buckets of the revenue charts; 'D' (daily), 'W' (weekly) or 'M' (monthly)
+    :param periods: (list) optional (first day, last day) date windows, oldest first, compared per sku on two extra
+                    sheets. needs the sales in memory (no streaming, pandas engine)
+    :param chart: (ChartOptions) how the cover page charts are rendered
+    :param store_path: (str) query each brand out of this history store (see History_Store) instead of reading
+                       `directory`
+    :param start: (Timestamp) optional first day of the reports; sales by purchase date, returns by return date
+    :param end: (Timestamp) optional last day of the reports, included
+    :param verbose: (bool) print how each file was classified, and how many new sales files were merged
+    :return: {brand/keyword: path of its workbook, or the ReportError explaining why it has none}
+    :raises ReportError: if a required file is missing, a file holds non-numeric data, periods are compared while
+                         streaming or with the polars engine, streaming is combined with the polars engine, either
+                         is combined with a store, or a start/end is combined with incremental mode
+
+    Example:
+        results = run_batch(my_folder, ['acme', 'globex', 'initech'], workbook_workers=4)
+    """
+    if periods and (stream_sales or engine != 'pandas'):
+        raise ReportError('Comparing periods needs every order line; please run it without streaming, with the pandas '
+                          'engine.')
+
+    if stream_sales and engine != 'pandas':
+        raise ReportError('Streaming reads the sales files with pandas; please run it with the pandas engine.')
+
+    if store_path is not None and (stream_sales or engine != 'pandas'):
+        raise ReportError('Reports from the history store are queried out of it; please run them without streaming, '
+                          'with the pandas engine.')
+
+    if stream_sales and state_dir is not None and (start is not None or end is not None):
+        raise ReportError('The incremental totals cover every sales file ever read; please run a --start/--end window '
+                          'without --incremental.')
+
+    output_dir = str(output_dir or directory or os.getcwd())
+
+    # brands are matched case-insensitively, and their workbooks are named after the title-cased brand, so 'acme' and
+    # 'ACME' are the same report, written to the same file; only the first spelling is kept
+    unique_brands = {}
+
+    for brand_filter in brand_filters:
+        unique_brands.setdefault(brand_filter.strip().title(), brand_filter.strip())
+
+    brand_filters = list(unique_brands.values())
+
+    # a data folder is read once for every brand; a store is queried once per brand instead
+    dataset = load(
+        directory
+        , max_workers=max_workers
+        , cache=cache
+        , stream_sales=stream_sales
+        , engine=engine
+        , window=DateWindow(start, end) if start is not None or end is not None else None
+        , verbose=verbose
+    ) if store_path is None else None
+
+    # {brand: {report: row mask}}, for every brand at once
+    masks = report_masks(dataset.data, brand_filters, dataset.index) if dataset is not None else {}
+
+    results = {}
+    reports = []
+
+    for brand_filter in brand_filters:
+        try:
+            reports.append(wrangle(
+                dataset if dataset is not None else load_from_store(brand_filter, store_path, start, end)
+                , brand_filter
+                , chunksize=chunksize
+                , state_dir=state_dir
+                , granularity=granularity
+                , periods=periods
+                , masks=masks.get(brand_filter)
+                , verbose=verbose
+            ))
+
+        except ReportError as e:
+            results[brand_filter] = e
+
+    context = pool_context()
+
+    if workbook_workers == 1 or len(reports) < 2 or context is None:
+        written = [_render(report, output_dir, chart) for report in reports]
+
+    else:
+        with ProcessPoolExecutor(max_workers=workbook_workers, mp_context=context) as pool:
+            rendered = list(pool.map(_render_in_worker, reports, [output_dir] * len(reports), [chart] * len(reports)))
+
+        written = [output_path for output_path, _ in rendered]
+        PROFILER.records.extend(record for _, records in rendered for record in records)
+
+    results.update({report.brand_filter: output_path for report, output_path in zip(reports, written)})
+
+    return {brand_filter: results[brand_filter] for brand_filter in brand_filters}
@@ -1,13 +1,48 @@
+import heapq
+from typing import Optional, Tuple
+
+import numpy as np
 import openpyxl as xl
 import openpyxl.worksheet.worksheet as Worksheet
+import pandas as pd
+
+
+def data_bar_bounds(values: pd.Series) -> Optional[Tuple[float, float]]:
+    """Finds the bounds `data_bars` uses - the second smallest and second largest value of a column, totals row
+    included - straight from the dF column written to the sheet, with an O(n) partial selection instead of two sorts.
+
+    :param values: (Series) the column, as written with to_excel(index=False). missing values are ignored
+    :return: (tuple) (second smallest, second largest), or None if the column has fewer than two numbers to go on
+
+    Example:
+        bounds = data_bar_bounds(instock['quantity'])
 
+        if bounds is not None:
+            data_bars(ws_instock, 4, '5e9bdd', bounds=bounds, last_row=len(instock) + 1)
+    """
+    numbers = pd.to_numeric(values, errors='coerce').dropna().to_numpy(dtype='float64')
+
+    if len(numbers) < 2:
+        return None
+
+    return float(np.partition(numbers, 1)[1]), float(np.partition(numbers, -2)[-2])
 
-def data_bars(worksheet: Worksheet, column_number: int, color_hex: str) -> None:
+
+def data_bars(
+        worksheet: Worksheet
+        , column_number: int
+        , color_hex: str
+        , bounds: Optional[Tuple[float, float]] = None
+        , last_row: Optional[int] = None
+) -> None:
     """Formats an excel column with data bars, based on relative min/max of said columns values.
 
     :param worksheet: (var: openpyxl.worksheet.worksheet ) The name of your openpyxl worksheet
     :param column_number: (int) the column number you wish to convert
     :param color_hex : (str) the hex code of the color you wish to assign to your bars (ex: '#FFFFFF')
+    :param bounds: (tuple) optional (smallest, largest) values of the bars, ex: from `data_bar_bounds`. if not given,
+                   they are read from the worksheet's cells
+    :param last_row: (int) optional last row of the data, to save counting the sheet's rows
 
     *IMPORTANT* Assumes that there is a 'totals' row, therefore starts at index 3. If your column doesn't have a subtotal
     or grand total, the data bars will not cover the full range. The report will still work, but the bars will be
@@ -16,17 +51,17 @@ def data_bars(worksheet: Worksheet, column_number: int, color_hex: str) -> None:
 
     column_letter = xl.utils.get_column_letter(column_number)
     col_for_databars = f"{column_letter}3:" \
-                       f"{column_letter}{worksheet.max_row}"
+                       f"{column_letter}{last_row or worksheet.max_row}"
+
+    if bounds is not None:
+        smallest_value, second_largest_value = bounds
 
-    second_largest_value = \
-        sorted(
-            [cell.value for cell in worksheet[column_letter] if cell.coordinate != f"{column_letter}1"], reverse=True
-        )[1]
+    else:
+        values = [cell.value for cell in worksheet[column_letter] if cell.coordinate != f"{column_letter}1"]
 
-    smallest_value = \
-        sorted(
-            [cell.value for cell in worksheet[column_letter] if cell.coordinate != f"{column_letter}1"]
-        )[1]
+        # the 2 largest/smallest are all that's needed; no need to sort the whole column
+        second_largest_value = heapq.nlargest(2, values)[1]
+        smallest_value = heapq.nsmallest(2, values)[1]
 
     rule_on_hand = xl.formatting.rule.DataBarRule(
         start_type='num'
@@ -0,0 +1,101 @@
+from typing import List, Tuple, Union
+
+import openpyxl as xl
+from openpyxl.chart import AreaChart, LineChart, Reference
+from openpyxl.worksheet.worksheet import Worksheet
+
+from Style_Formatters import bold
+
+
+def time_series_chart(
+        chart_sheet: Worksheet
+        , data_sheet: Worksheet
+        , title: str
+        , anchor: str = 'B3'
+        , width: float = 43.0
+        , height: float = 17.8
+        , y_title: str = 'Daily Revenue'
+        , tick_every: int = 7
+) -> None:
+    """ Adds a native excel time series chart - daily (or weekly/monthly) values as a filled area, with a red moving average line on top.
+
+    Unlike a matplotlib image, the chart is drawn by excel itself, so the client can hover over it, resize it, or
+    restyle it. Nothing has to be rendered on our side.
+
+    :param chart_sheet: (var: Worksheet) the sheet the chart goes on
+    :param data_sheet: (var: Worksheet) the sheet holding the data, with a header row; column A = date labels, column
+                       B = values, column C = moving average. usually hidden
+    :param title: (str) the chart title. a line break starts a second, smaller line
+    :param anchor: (str) the cell the chart's top left corner sits on
+    :param width: (float) width of the chart, in cm. the default matches the 17" wide matplotlib chart
+    :param height: (float) height of the chart, in cm
+    :param y_title: (str) the title of the value axis
+    :param tick_every: (int) label every n-th date on the date axis. 7 = one label a week, for daily values
+
+    Example:
+        df[['Date', 'item-price', 'MA7']].to_excel(writer, sheet_name='chart data', index=False)
+        writer.sheets['chart data'].sheet_state = 'hidden'
+
+        time_series_chart(ws_cover_page, writer.sheets['chart data'], 'Acme Sales')
+    """
+    last_row = data_sheet.max_row
+    dates = Reference(data_sheet, min_col=1, min_row=2, max_row=last_row)
+
+    daily = AreaChart()
+    daily.add_data(Reference(data_sheet, min_col=2, min_row=1, max_row=last_row), titles_from_data=True)
+    daily.set_categories(dates)
+
+    moving_average = LineChart()
+    moving_average.add_data(Reference(data_sheet, min_col=3, min_row=1, max_row=last_row), titles_from_data=True)
+    moving_average.set_categories(dates)
+    moving_average.series[0].graphicalProperties.line.solidFill = 'FF0000'
+    moving_average.series[0].smooth = False
+
+    daily += moving_average
+
+    daily.title = title
+    daily.width = width
+    daily.height = height
+    daily.legend.position = 'b'
+
+    daily.y_axis.title = y_title
+    daily.y_axis.number_format = '"$"#,##0'
+    daily.y_axis.delete = False  # recent openpyxl versions hide both axes unless told otherwise
+    daily.x_axis.delete = False
+    daily.x_axis.tickLblSkip = tick_every  # like the matplotlib chart
+    daily.x_axis.tickMarkSkip = tick_every
+
+    chart_sheet.add_chart(daily, anchor)
+
+
+def stats_cells(
+        worksheet: Worksheet
+        , stats: List[Tuple[str, Union[int, float, str], str]]
+        , top_left: str = 'B40'
+) -> None:
+    """ Writes a small label | value table of quick stats, with bold labels and formatted values.
+
+    :param worksheet: (var: Worksheet) your openpyxl worksheet
+    :param stats: (list) (label, value, excel number format) rows, ex: ('Net Revenue', 1234.5, '$#,##0.00'). use ''
+                  for values to be shown as is
+    :param top_left: (str) the cell the first label goes in. values go in the column to its right
+
+    Example:
+        stats_cells(ws, [('Net Revenue', 1234.5, '$#,##0.00'), ('Return Rate', 0.0412, '0.00%')])
+    """
+    first_column, first_row = xl.utils.cell.coordinate_from_string(top_left)
+    label_column = xl.utils.column_index_from_string(first_column)
+    value_letter = xl.utils.get_column_letter(label_column + 1)
+
+    for row, (label, value, number_format) in enumerate(stats, start=first_row):
+        worksheet.cell(row=row, column=label_column, value=label)
+        value_cell = worksheet.cell(row=row, column=label_column + 1, value=value)
+
+        if number_format:
+            value_cell.number_format = number_format
+
+    last_row = first_row + len(stats) - 1
+    bold(worksheet, f'{first_column}{first_row}:{first_column}{last_row}')
+
+    worksheet.column_dimensions[first_column].width = max(len(label) for label, _, _ in stats) + 5
+    worksheet.column_dimensions[value_letter].width = 20
@@ -0,0 +1,170 @@
+import csv
+import os
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import pandas as pd
+
+from File_Readers import csv_reader, txt_reader
+
+
+class ReportSpec(NamedTuple):
+    """Describes how to recognize one of the four FBA reports, which of its columns the report needs, and the schema
+    those columns are read with."""
+    extension: str
+    sep: str
+    marker: str
+    columns: List[str]
+    dtypes: Dict[str, str]
+    date_columns: List[str]
+    window_column: Optional[str] = None  # the date a --start/--end window limits the rows by
+    keep_time: bool = False  # read the date columns with their time of day, not just the day
+
+    @property
+    def schema(self) -> Dict[str, str]:
+        """:return: {column: dtype} of every column the report is typed with, dates included. the parse cache keys its
+        entries on it, so that a change in how a report is parsed is never served stale"""
+        date_type = 'datetime' if self.keep_time else 'date'
+
+        return {**self.dtypes, **{column: date_type for column in self.date_columns}}
+
+
+# order matters; a .csv is assigned to the first report type whose marker column appears in its header.
+# skus, product names and return reasons repeat across millions of rows, so they are read as categoricals. order ids
+# are close to unique, so they stay as plain strings. money stays float64 so that totals are exact to the cent
+REPORT_SPECS: Dict[str, ReportSpec] = {
+    'sales': ReportSpec(
+        '.txt'
+        , '\t'
+        , 'signature-confirmation-recommended '  # the trailing space is in the raw amazon header
+        , ['amazon-order-id', 'merchant-order-id', 'purchase-date', 'sku', 'quantity', 'product-name', 'item-price']
+        , {'sku': 'category', 'product-name': 'category', 'quantity': 'Int32', 'item-price': 'float64'}
+        , ['purchase-date']
+        , 'purchase-date'
+    )
+    , 'returns': ReportSpec(
+        '.csv'
+        , ','
+        , 'return-date'
+        , ['return-date', 'sku', 'quantity', 'product-name', 'reason', 'order-id']
+        , {'sku': 'category', 'product-name': 'category', 'reason': 'category', 'quantity': 'Int32'}
+        , ['return-date']
+        , 'return-date'
+        , True  # the same return logged twice in a day is two returns; only the time of day tells them apart
+    )
+    , 'instock': ReportSpec(
+        '.csv'
+        , ','
+        , 'afn-fulfillable-quantity'
+        , ['sku', 'afn-fulfillable-quantity', 'product-name']
+        , {'sku': 'category', 'product-name': 'category', 'afn-fulfillable-quantity': 'Int32'}
+        , []
+    )
+    , 'cogs': ReportSpec(
+        '.csv'
+        , ','
+        , 'VENDOR COST'
+        , ['SKU', 'VENDOR COST']
+        , {'SKU': 'category', 'VENDOR COST': 'float64'}
+        , []
+    )
+}
+
+
+REPORT_EXTENSIONS = {spec.extension for spec in REPORT_SPECS.values()}
+
+
+class FileClassification(NamedTuple):
+    """The decision made for a single file in the data folder. `report_type` is None for skipped files."""
+    file_path: str
+    report_type: Optional[str]
+    reason: str
+
+
+def sniff_header(handle: BinaryIO, sep: str) -> List[str]:
+    """Parses the column names out of the first line of an open file, then rewinds the handle.
+
+    :param handle: (BinaryIO) a file opened in binary mode
+    :param sep: (str) the delimiter of the file, ex: ',' or '\t'
+    :return: the list of column names, exactly as pandas would read them (trailing spaces included)
+    """
+    first_line = handle.readline().decode('latin1').rstrip('\r\n')
+    handle.seek(0)
+
+    return next(csv.reader([first_line], delimiter=sep), [])
+
+
+def classify_header(file_name: str, handle: BinaryIO) -> FileClassification:
+    """Decides which of the four FBA reports a file is, based on its extension and raw header line.
+
+    :param file_name: (str) the path or name of the file. only the extension is used
+    :param handle: (BinaryIO) the file, opened in binary mode
+    :return: a FileClassification holding the report type (or None) and the reason for the decision
+    """
+    extension = os.path.splitext(file_name)[1]
+    candidates = [(name, spec) for name, spec in REPORT_SPECS.items() if spec.extension == extension]
+
+    if not candidates:
+        return FileClassification(file_name, None, f"skipped: '{extension}' is not a report extension")
+
+    header = sniff_header(handle, candidates[0][1].sep)
+
+    for report_type, spec in candidates:
+        if spec.marker in header:
+            return FileClassification(file_name, report_type, f"header contains '{spec.marker}'")
+
+    return FileClassification(file_name, None, 'skipped: header matches none of the report types')
+
+
+def classify_directory(
+        directory: Union[str, Path]
+) -> Iterator[Tuple[FileClassification, Optional[BinaryIO]]]:
+    """Walks a data folder, classifying each file off of its raw header line.
+
+    Each report file is opened exactly once. The open handle is yielded alongside its classification, rewound to the
+    start, so that it can be passed straight to `read_classified`. Handles are closed once the loop moves on.
+
+    :param directory: (str) the folder holding your downloaded FBA reports
+    :return: yields (classification, handle) pairs. handle is None for files that are not reports
+
+    Example:
+        for classification, handle in classify_directory(my_folder):
+            if classification.report_type:
+                df = read_classified(handle, classification)
+    """
+    for file in os.listdir(directory):
+        file_directory = os.path.join(directory, file)
+
+        if not os.path.isfile(file_directory) or os.path.splitext(file)[1] not in REPORT_EXTENSIONS:
+            yield FileClassification(file_directory, None, 'skipped: not a .csv/.txt file'), None
+            continue
+
+        with open(file_directory, 'rb') as handle:
+            classification = classify_header(file_directory, handle)
+            yield classification, (handle if classification.report_type else None)
+
+
+def read_classified(handle: Union[str, Path, BinaryIO], classification: FileClassification) -> pd.DataFrame:
+    """Reads a classified report with the matching reader, keeping only the columns the report needs, typed per the
+    report's schema.
+
+    :param handle: (BinaryIO) the open handle yielded by `classify_directory`, or the file path
+    :param classification: (FileClassification) the decision made for that file
+    :return: a dF of the report's required columns. raises ValueError if any of them are missing, or if a numeric
+             column holds non-numeric data
+    """
+    spec = REPORT_SPECS[classification.report_type]
+    reader = txt_reader if spec.sep == '\t' else csv_reader
+
+    return reader(handle, spec.columns, spec.dtypes, spec.date_columns, spec.keep_time)
+
+
+def classification_log(classifications: List[FileClassification]) -> str:
+    """Formats the classification decisions into a readable log, so that you can audit what was (and wasn't) read.
+
+    :param classifications: (list) the FileClassification's from `classify_directory`
+    :return: (str) one line per file
+    """
+    return '\n'.join(
+        f"{(c.report_type or '-'):<8} {os.path.basename(c.file_path)}  ({c.reason})" for c in classifications
+    )
@@ -1,13 +1,52 @@
 import pandas as pd
-from typing import Union, List
+from pandas.api.types import union_categoricals
+from typing import BinaryIO, Dict, Iterator, Optional, Union, List
 from pathlib import Path
 
+# the cells every reader treats as missing; the report then drops the rows holding one. spelled out (they're pandas'
+# defaults) so that the polars engine reads the very same ones, see Polars_Backend
+NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA',
+    'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
 
-def csv_reader(file_path: Union[str, Path], columns: List[str]) -> pd.DataFrame:
+
+def parse_iso_dates(df: pd.DataFrame, date_columns: Optional[List[str]], keep_time: bool = False) -> pd.DataFrame:
+    """Converts ISO-8601 timestamp columns (ex: '2024-02-22T14:03:11+00:00') into native datetime64 dates.
+
+    Only the date portion is kept unless `keep_time`, as written in the file either way; no timezone conversion is
+    applied. Unparseable values become NaT.
+
+    :param df: (var) the dF holding the raw timestamp strings
+    :param date_columns: (list) the columns to convert
+    :param keep_time: (bool) keep the time of day, ex: so that two identical lines a few hours apart stay two lines
+    :return: the same dF, with the columns converted in place
+    """
+    for column in date_columns or []:
+        if keep_time:
+            df[column] = pd.to_datetime(df[column].str.slice(0, 19), format='ISO8601', errors='coerce')
+
+        else:
+            df[column] = pd.to_datetime(df[column].str.slice(0, 10), format='%Y-%m-%d', errors='coerce')
+
+    return df
+
+
+def csv_reader(
+        file_path: Union[str, Path, BinaryIO]
+        , columns: List[str]
+        , dtypes: Optional[Dict[str, str]] = None
+        , date_columns: Optional[List[str]] = None
+        , keep_time: bool = False
+) -> pd.DataFrame:
     """Imports a .csv file into a pandas dF. Enter the list of columns you wish to import.
 
     :param file_path: (var) the path of the file you wish to read in. variable or a raw string. note; no backslashes.
+                      an already-open binary file handle is also accepted
     :param columns: (str) the columns you wish to use, separated by commas
+    :param dtypes: (dict) optional {column: dtype} mapping, ex: {'sku': 'category', 'quantity': 'Int32'}
+    :param date_columns: (list) optional timestamp columns to convert into native dates
+    :param keep_time: (bool) keep the time of day of the date columns, see parse_iso_dates
     :return: a df with the columns you specified in the input
 
     Note:
@@ -18,14 +57,30 @@ def csv_reader(file_path: Union[str, Path], columns: List[str]) -> pd.DataFrame:
 
         df = csv_reader(my_path, ['col1','col2']
     """
-    return pd.read_csv(file_path, encoding='latin1', usecols=columns)
-
-
-def txt_reader(file_path: Union[str, Path], columns: List[str]) -> pd.DataFrame:
+    return parse_iso_dates(
+        pd.read_csv(
+            file_path, encoding='latin1', usecols=columns, dtype=dtypes, na_values=NA_VALUES, keep_default_na=False
+        )
+        , date_columns
+        , keep_time
+    )
+
+
+def txt_reader(
+        file_path: Union[str, Path, BinaryIO]
+        , columns: List[str]
+        , dtypes: Optional[Dict[str, str]] = None
+        , date_columns: Optional[List[str]] = None
+        , keep_time: bool = False
+) -> pd.DataFrame:
     """Imports a .txt file into a pandas dF. Enter the list of columns you wish to import.
 
     :param file_path: (var) the path of the file. can be a variable or a raw string. no backslashes. only fwd slashes
+                      an already-open binary file handle is also accepted
     :param columns: (str) the columns you wish to use, separated by commas, do not enclose in a list
+    :param dtypes: (dict) optional {column: dtype} mapping, ex: {'sku': 'category', 'quantity': 'Int32'}
+    :param date_columns: (list) optional timestamp columns to convert into native dates
+    :param keep_time: (bool) keep the time of day of the date columns, see parse_iso_dates
     :return: a df with the columns you specified in the input
 
     Note:
@@ -36,12 +91,52 @@ def txt_reader(file_path: Union[str, Path], columns: List[str]) -> pd.DataFrame:
 
         df = txt_reader(my_path, ['col1','col2']
     """
-    return pd.read_csv(file_path, sep='\t', encoding='latin1', usecols=columns)
+    return parse_iso_dates(
+        pd.read_csv(
+            file_path, sep='\t', encoding='latin1', usecols=columns, dtype=dtypes, na_values=NA_VALUES
+            , keep_default_na=False
+        )
+        , date_columns
+        , keep_time
+    )
+
+
+def txt_chunk_reader(
+        file_path: Union[str, Path, BinaryIO]
+        , columns: List[str]
+        , chunksize: int
+        , dtypes: Optional[Dict[str, str]] = None
+        , date_columns: Optional[List[str]] = None
+        , keep_time: bool = False
+) -> Iterator[pd.DataFrame]:
+    """Reads a .txt file in pieces of `chunksize` rows, so that the whole file never has to sit in memory at once.
+
+    :param file_path: (var) the path of the file, or an already-open binary file handle
+    :param columns: (list) the columns you wish to use
+    :param chunksize: (int) the number of rows per chunk
+    :param dtypes: (dict) optional {column: dtype} mapping. categoricals are coded per chunk
+    :param date_columns: (list) optional timestamp columns to convert into native dates
+    :param keep_time: (bool) keep the time of day of the date columns, see parse_iso_dates
+    :return: yields one dF per chunk
+
+    Example:
+        for chunk in txt_chunk_reader(my_path, ['col1', 'col2'], 100_000):
+            totals.append(chunk['col2'].sum())
+    """
+    with pd.read_csv(
+            file_path, sep='\t', encoding='latin1', usecols=columns, dtype=dtypes, na_values=NA_VALUES
+            , keep_default_na=False, chunksize=chunksize
+    ) as chunks:
+        for chunk in chunks:
+            yield parse_iso_dates(chunk, date_columns, keep_time)
 
 
 def concat_df(x: List[pd.DataFrame]) -> pd.DataFrame:
     """Converts a list of dF's - that you imported and appended to a var - into one dF.
 
+    Categorical columns are re-coded onto the union of every dF's categories first; pandas would otherwise fall back
+    to plain object columns whenever two files hold different SKUs/product names.
+
     :param x: The list of dataframes you wish to concat into one.
     :return: the concat'd dataframe, with refreshed index
 
@@ -49,5 +144,13 @@ def concat_df(x: List[pd.DataFrame]) -> pd.DataFrame:
         df = df1.append(df2)  # creates a list of two dF's
         df = concat_df(df) # merges the two dF's into one dF
     """
+    categorical_columns = [
+        column for column, dtype in x[0].dtypes.items() if isinstance(dtype, pd.CategoricalDtype)
+    ] if len(x) > 1 else []
+
+    for column in categorical_columns:
+        categories = union_categoricals([df[column] for df in x], sort_categories=True).categories
+        x = [df.assign(**{column: df[column].cat.set_categories(categories)}) for df in x]
+
     return pd.concat(x, ignore_index=True)
 
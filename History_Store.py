@@ -0,0 +1,478 @@
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from File_Classifier import REPORT_EXTENSIONS, REPORT_SPECS, ReportSpec, classify_header, read_classified
+from Incremental_State import file_digest
+from Keyword_Index import KeywordIndex
+from Report_Pipeline import Dataset
+from Report_Wrangler import ReportError, brand_masks, prepare_data
+from Return_Pricing import OrderLinePrices
+from Stage_Profiler import profile_stage
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'fba_sales_history.sqlite')
+STORE_VERSION = 3  # bump whenever the schema changes; older stores then have to be re-ingested
+
+# sales and returns accumulate over time; order lines and returns re-exported by overlapping downloads are only stored
+# once (see _ingest_file). in stock and COGS are snapshots; a report uses the ones brought by the latest ingest that had
+# any
+HISTORY_TYPES = ['sales', 'returns']
+SNAPSHOT_TYPES = ['instock', 'cogs']
+
+# what the brand/date window queries are answered from. the product name indexes lead with the name, so that a brand's
+# rows of a date window are a range scan per product name, however much history surrounds them
+INDEXES = {
+    'sales': [['purchase-date'], ['sku'], ['amazon-order-id'], ['product-name', 'purchase-date'], ['row_hash']]
+    , 'returns': [['return-date'], ['sku'], ['order-id'], ['product-name', 'return-date'], ['row_hash']]
+    , 'instock': [['file_id']]
+    , 'cogs': [['file_id']]
+}
+
+
+class IngestedFile(NamedTuple):
+    """What `ingest_directory` did with one file of the folder.
+
+    file_path:   the file
+    report_type: the report it was classified as. None for files that are not reports
+    rows:        the rows it added to the store; rows already stored by an overlapping file are not counted
+    status:      'ingested', 'already ingested', or why it was skipped
+    already_stored: the rows of the file that were already in the store (ex: the days two exports overlap on), and
+                    were not added again
+    """
+    file_path: str
+    report_type: Optional[str]
+    rows: int
+    status: str
+    already_stored: int = 0
+
+
+def _quoted(column: str) -> str:
+    """:return: the column name, quoted for sql (the report's column names hold dashes and spaces)"""
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _date_format(spec: ReportSpec) -> str:
+    """:return: the format a report's dates are stored in; with the time of day for the reports read with it"""
+    return '%Y-%m-%d %H:%M:%S' if spec.keep_time else '%Y-%m-%d'
+
+
+def _sql_type(spec: ReportSpec, column: str) -> str:
+    """:return: the sqlite type a report column is stored as. dates are kept as 'YYYY-MM-DD' (or 'YYYY-MM-DD
+    HH:MM:SS') text, which sorts (and compares) in date order"""
+    if column in spec.date_columns:
+        return 'TEXT'
+
+    return {'Int32': 'INTEGER', 'float64': 'REAL'}.get(spec.dtypes.get(column), 'TEXT')
+
+
+def _create_schema(connection: sqlite3.Connection) -> None:
+    """Creates the tables and indexes of an empty store."""
+    connection.executescript('''
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE ingests (ingest_id INTEGER PRIMARY KEY, ingested_at TEXT, directory TEXT);
+        CREATE TABLE files (
+            file_id INTEGER PRIMARY KEY
+            , digest TEXT UNIQUE
+            , report_type TEXT
+            , file_name TEXT
+            , rows INTEGER
+            , ingest_id INTEGER REFERENCES ingests
+        );
+        CREATE TABLE product_names (name TEXT PRIMARY KEY);
+    ''')
+
+    for report_type, spec in REPORT_SPECS.items():
+        columns = ', '.join(f'{_quoted(column)} {_sql_type(spec, column)}' for column in spec.columns)
+
+        # an order line/return is keyed by its whole content, and by which copy of it within its file it is (the
+        # `occurrence`); see _ingest_file. the 64-bit hash of the content is only what it's looked up by
+        row_key = ', row_hash INTEGER, occurrence INTEGER' if report_type in HISTORY_TYPES else ''
+
+        connection.execute(f'CREATE TABLE {report_type} (file_id INTEGER REFERENCES files{row_key}, {columns})')
+
+        for index_columns in INDEXES[report_type]:
+            name = f"{report_type}_by_{'_'.join(column.replace('-', '_') for column in index_columns)}"
+            connection.execute(
+                f"CREATE INDEX {name} ON {report_type} ({', '.join(_quoted(column) for column in index_columns)})"
+            )
+
+    connection.execute('INSERT INTO meta VALUES (?, ?)', ('version', str(STORE_VERSION)))
+
+
+def open_store(store_path: Union[str, Path] = DEFAULT_STORE_PATH, create: bool = False) -> sqlite3.Connection:
+    """Opens the history store, creating it first if asked to.
+
+    :param store_path: (str) the sqlite file
+    :param create: (bool) create the store (and its folder) if it does not exist yet
+    :return: an open sqlite3 connection
+    :raises ReportError: if there is no store there, or it was written by an incompatible version
+    """
+    if not os.path.exists(store_path):
+        if not create:
+            raise ReportError(f'There is no history store at {store_path}; ingest your files into it first.')
+
+        os.makedirs(os.path.dirname(os.path.abspath(store_path)), exist_ok=True)
+
+    connection = sqlite3.connect(store_path)
+
+    try:
+        version = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+
+    except sqlite3.OperationalError:  # a brand new (empty) database
+        with connection:
+            _create_schema(connection)
+
+        version = (str(STORE_VERSION),)
+
+    if version is None or version[0] != str(STORE_VERSION):
+        connection.close()
+        raise ReportError(f'The history store at {store_path} was written by another version of the report; please '
+                          f'delete it and ingest your files again.')
+
+    return connection
+
+
+def _stored_rows(df: pd.DataFrame, spec: ReportSpec) -> List[tuple]:
+    """:return: the rows of a report dF, as plain python values sqlite can store. missing values become NULL"""
+    df = df[spec.columns].copy()
+
+    for column in spec.date_columns:
+        df[column] = df[column].dt.strftime(_date_format(spec))
+
+    df = df.astype(object)
+
+    return list(df.where(df.notna(), None).itertuples(index=False, name=None))
+
+
+def _ingest_file(
+        connection: sqlite3.Connection
+        , file_path: str
+        , report_type: str
+        , digest: str
+        , df: pd.DataFrame
+        , ingest_id: int
+        , directory: str
+) -> Tuple[int, int]:
+    """Stores one report file, in a single transaction; either all of it is ingested, or none of it.
+
+    Sales and returns are de-duplicated against the store on their natural key; the whole line, plus which copy of it
+    within the file it is (1 for the first copy, 2 for a second identical line, ...). an overlapping export then adds
+    none of the lines already stored, identical lines within a file are all kept, and two different lines are never
+    taken for one another; the content is compared column by column, the hash only narrows the lookup down.
+
+    :return: (int) the number of rows added, and (int) the number of rows already in the store, not added again
+    """
+    spec = REPORT_SPECS[report_type]
+
+    if report_type == 'sales':
+        df = df.dropna()  # the report drops these anyway
+
+    columns = ['file_id', *spec.columns]
+    values = _stored_rows(df, spec)
+    insert = f"INSERT INTO {report_type} ({', '.join(_quoted(column) for column in columns)}) " \
+             f"VALUES ({', '.join('?' * len(columns))})"
+
+    if report_type in HISTORY_TYPES:
+        columns[1:1] = ['row_hash', 'occurrence']
+
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy().view(np.int64).tolist()
+        copies = {}
+        occurrences = []
+
+        for row in values:
+            copies[row] = copies.get(row, 0) + 1
+            occurrences.append(copies[row])
+
+        # (row_hash, occurrence, *line) twice; once to insert, once to look the line up by
+        values = [
+            (row_hash, occurrence, *row, row_hash, occurrence, *row)
+            for row_hash, occurrence, row in zip(row_hashes, occurrences, values)
+        ]
+
+        same_line = ' AND '.join(f'{_quoted(column)} IS ?' for column in ['row_hash', 'occurrence', *spec.columns])
+        insert = f"INSERT INTO {report_type} ({', '.join(_quoted(column) for column in columns)}) " \
+                 f"SELECT {', '.join('?' * len(columns))} " \
+                 f"WHERE NOT EXISTS (SELECT 1 FROM {report_type} WHERE {same_line})"
+
+    with connection:
+        connection.execute(
+            'INSERT OR IGNORE INTO ingests VALUES (?, ?, ?)'
+            , (ingest_id, datetime.now().isoformat(timespec='seconds'), directory)
+        )
+
+        file_id = connection.execute(
+            'INSERT INTO files (digest, report_type, file_name, ingest_id) VALUES (?, ?, ?, ?)'
+            , (digest, report_type, os.path.basename(file_path), ingest_id)
+        ).lastrowid
+
+        changes = connection.total_changes
+
+        connection.executemany(insert, ((file_id, *row) for row in values))
+
+        rows = connection.total_changes - changes
+
+        connection.execute('UPDATE files SET rows = ? WHERE file_id = ?', (rows, file_id))
+
+        if 'product-name' in spec.columns:
+            connection.executemany(
+                'INSERT OR IGNORE INTO product_names VALUES (?)'
+                , ((name,) for name in df['product-name'].dropna().unique())
+            )
+
+    return rows, len(values) - rows
+
+
+def ingest_directory(
+        directory: Union[str, Path]
+        , store_path: Union[str, Path] = DEFAULT_STORE_PATH
+) -> List[IngestedFile]:
+    """Loads the report files of a data folder into the history store.
+
+    Ingestion is idempotent per file: files are recognized by content (see Incremental_State.file_digest), so files
+    already ingested - under any name, from any folder - are skipped without being parsed, and each new file is stored
+    in a single transaction. Order lines and returns that overlapping exports share are only stored once. Each file is
+    opened once; classified, digested and parsed off of the same handle.
+
+    :param directory: (str) the folder holding your downloaded FBA reports
+    :param store_path: (str) the sqlite file of the store. created if it does not exist
+    :return: (list) an IngestedFile per file of the folder, in `os.listdir` order (the order they were ingested in)
+    :raises ReportError: if a report file is missing a column or holds non-numeric data. the files before it stay
+                         ingested
+
+    Example:
+        for ingested in ingest_directory(my_folder):
+            print(ingested.file_path, ingested.status)
+    """
+    connection = open_store(store_path, create=True)
+
+    try:
+        ingest_id = connection.execute('SELECT COALESCE(MAX(ingest_id), 0) + 1 FROM ingests').fetchone()[0]
+        results = []
+
+        for file in os.listdir(directory):
+            file_path = os.path.join(directory, file)
+
+            if not os.path.isfile(file_path) or os.path.splitext(file)[1] not in REPORT_EXTENSIONS:
+                results.append(IngestedFile(file_path, None, 0, 'skipped: not a .csv/.txt file'))
+                continue
+
+            with open(file_path, 'rb') as handle:
+                classification = classify_header(file_path, handle)
+
+                if classification.report_type is None:
+                    results.append(IngestedFile(file_path, None, 0, classification.reason))
+                    continue
+
+                digest = file_digest(handle)
+
+                if connection.execute('SELECT 1 FROM files WHERE digest = ?', (digest,)).fetchone():
+                    results.append(IngestedFile(file_path, classification.report_type, 0, 'already ingested'))
+                    continue
+
+                try:
+                    df = read_classified(handle, classification)
+
+                except ValueError as e:
+                    raise ReportError(f'Please review your files, one or more columns is missing or has non-numeric '
+                                      f'data in it. ({file_path}: {e})')
+
+            rows, already_stored = _ingest_file(
+                connection
+                , file_path
+                , classification.report_type
+                , digest
+                , df
+                , ingest_id
+                , os.path.abspath(directory)
+            )
+
+            results.append(IngestedFile(file_path, classification.report_type, rows, 'ingested', already_stored))
+
+    finally:
+        connection.close()
+
+    return results
+
+
+def _typed(df: pd.DataFrame, spec: ReportSpec) -> pd.DataFrame:
+    """:return: rows read back out of the store, with the dtypes the report readers give the same columns"""
+    for column in spec.date_columns:
+        df[column] = pd.to_datetime(df[column], format=_date_format(spec))
+
+    return df.astype(spec.dtypes)
+
+
+def _query(
+        connection: sqlite3.Connection
+        , report_type: str
+        , where: str = '1'
+        , params: Union[Sequence, Dict] = ()
+) -> pd.DataFrame:
+    """:return: the matching rows of a report table, in the order they were ingested, typed like the readers'"""
+    spec = REPORT_SPECS[report_type]
+
+    df = pd.read_sql_query(
+        f"SELECT {', '.join(_quoted(column) for column in spec.columns)} FROM {report_type} WHERE {where} "
+        f"ORDER BY rowid"
+        , connection
+        , params=params
+    )
+
+    return _typed(df, spec)
+
+
+def _snapshot(connection: sqlite3.Connection, report_type: str) -> List[pd.DataFrame]:
+    """:return: one dF per file of the latest ingest that brought any file of `report_type` (ex: the latest in stock
+    report), in the order they were ingested"""
+    file_ids = [file_id for file_id, in connection.execute(
+        'SELECT file_id FROM files WHERE report_type = ? AND ingest_id = '
+        '(SELECT MAX(ingest_id) FROM files WHERE report_type = ?) ORDER BY file_id'
+        , (report_type, report_type)
+    )]
+
+    return [_query(connection, report_type, 'file_id = ?', [file_id]) for file_id in file_ids]
+
+
+def _brand_window(
+        date_column: str
+        , brand_filter: str
+        , start: Optional[pd.Timestamp]
+        , end: Optional[pd.Timestamp]
+) -> str:
+    """:return: the sql condition selecting the rows of a brand (its names in the brand_names table) and date window.
+    rows without a product name never match, like in the folder reports. only the first copy of identical lines is
+    selected; the report drops the others, like it does when reading a folder"""
+    conditions = [
+        'occurrence = 1'
+        , f'{_quoted("product-name")} IN (SELECT name FROM brand_names)' if brand_filter else
+        f'{_quoted("product-name")} IS NOT NULL'
+    ]
+
+    if start is not None:
+        conditions.append(f'{_quoted(date_column)} >= :start')
+
+    if end is not None:
+        # before the day after, so that the rows logged during the last day (with a time of day) are in
+        conditions.append(f'{_quoted(date_column)} < :day_after_end')
+
+    return ' AND '.join(conditions)
+
+
+def load_from_store(
+        brand_filter: str
+        , store_path: Union[str, Path] = DEFAULT_STORE_PATH
+        , start: Optional[pd.Timestamp] = None
+        , end: Optional[pd.Timestamp] = None
+) -> Dataset:
+    """Queries one brand/keyword's sales and returns, within a date window, out of the history store.
+
+    The brand/keyword is matched against the distinct product names (the same `str.contains(brand, case=False)` as
+    the folder reports), and the matching names and the date window are looked up through the store's indexes, so the
+    time this takes depends on the size of the brand's window, not on how much history is stored. The returned order
+    lines are looked up by order id, every brand's, to price the returns off of like the folder reports do.
+
+    Reported from a store built out of a single folder, with no window, a brand's workbook is identical to the one
+    written straight from that folder.
+
+    :param brand_filter: (str) the brand/keyword. '' returns everything
+    :param store_path: (str) the sqlite file of the store
+    :param start: (Timestamp) optional first day of the window; sales by purchase-date, returns by return-date
+    :param end: (Timestamp) optional last day of the window, included
+    :return: a Dataset holding the brand's rows only, ready for `wrangle`
+    :raises ReportError: if there is no store, or it's missing one of the four reports
+
+    Example:
+        dataset = load_from_store('acme', start=pd.Timestamp('2024-01-01'))
+        report = wrangle(dataset, 'acme')
+    """
+    connection = open_store(store_path)
+
+    try:
+        with profile_stage('query', brand_filter) as stage:
+            stored_types = {
+                report_type for report_type, in connection.execute('SELECT DISTINCT report_type FROM files')
+            }
+
+            if stored_types != set(REPORT_SPECS):
+                raise ReportError('ERROR: One or more of the required files necessary to run this report is missing '
+                                  'from the history store. Please ingest them and try again.')
+
+            # the brand's product names go into a temporary table, that the queries join against
+            names = pd.read_sql_query('SELECT name FROM product_names', connection)['name']
+            connection.execute('CREATE TEMP TABLE brand_names (name TEXT PRIMARY KEY)')
+
+            if brand_filter:
+                connection.executemany(
+                    'INSERT INTO brand_names VALUES (?)'
+                    , ((name,) for name in names[brand_masks(names, [brand_filter])[brand_filter]])
+                )
+
+            params = {
+                'start': None if start is None else start.strftime('%Y-%m-%d')
+                , 'day_after_end': None if end is None else (end + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+            }
+
+            sales = _query(connection, 'sales', _brand_window('purchase-date', brand_filter, start, end), params)
+            returns = _query(connection, 'returns', _brand_window('return-date', brand_filter, start, end), params)
+
+            returned_orders = f'SELECT {_quoted("order-id")} FROM returns ' \
+                              f'WHERE {_brand_window("return-date", brand_filter, start, end)}'
+
+            order_lines = pd.read_sql_query(
+                f'SELECT {_quoted("amazon-order-id")}, sku, {_quoted("item-price")} FROM sales '
+                f'WHERE occurrence = 1 AND {_quoted("amazon-order-id")} IN ({returned_orders}) ORDER BY rowid'
+                , connection
+                , params=params
+            )
+
+            instock = _snapshot(connection, 'instock')
+            cogs = _snapshot(connection, 'cogs')
+
+            stage['rows'] = len(sales) + len(returns) + len(order_lines)
+
+    finally:
+        connection.close()
+
+    data = prepare_data([sales], [returns], instock, cogs)
+
+    index = KeywordIndex(
+        name for df in [data.sales, data.instock, data.returns] for name in df['product-name'].cat.categories
+    )
+
+    return Dataset(data, index, [], [], OrderLinePrices(order_lines, data.returns['order-id']))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Ingests a data folder into the history store, as described by the command line."""
+    parser = argparse.ArgumentParser(description='Loads the FBA sales, returns, in-stock and cogs reports of a folder '
+                                                 'into the history store; files already ingested are skipped.')
+    parser.add_argument('directory', help='the folder holding your downloaded FBA reports')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help='the sqlite file of the history store')
+    args = parser.parse_args(argv)
+
+    try:
+        results = ingest_directory(args.directory, args.store)
+
+    except ReportError as e:
+        print(e)
+        return 1
+
+    for ingested in results:
+        rows = f', {ingested.rows:,} new rows, {ingested.already_stored:,} already stored' \
+            if ingested.status == 'ingested' else ''
+        print(f"{(ingested.report_type or '-'):<8} {os.path.basename(ingested.file_path)}  ({ingested.status}{rows})")
+
+    print(f'History store: {args.store}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
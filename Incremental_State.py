@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from Streaming_Aggregator import SalesAggregates, SalesAggregator
+
+DEFAULT_STATE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'fba_sales_report_state')
+STATE_VERSION = 1  # bump whenever the aggregation or the report schema changes; older states are then rebuilt
+CURRENT_FILE = 'current'  # names the sub-folder holding a brand's current state, see save_state
+
+
+def file_digest(file_path: Union[str, Path, BinaryIO]) -> str:
+    """Fingerprints a file by its contents, so that a renamed or moved export is still recognized as already ingested.
+
+    :param file_path: (str) the path of the file, or an already-open binary file handle; it's digested from the start,
+                      and rewound afterwards, ready to be read
+    :return: (str) the sha1 hex digest of the file
+    """
+    if isinstance(file_path, (str, Path)):
+        with open(file_path, 'rb') as handle:
+            return file_digest(handle)
+
+    digest = hashlib.sha1()
+    file_path.seek(0)
+
+    for block in iter(lambda: file_path.read(1024 * 1024), b''):
+        digest.update(block)
+
+    file_path.seek(0)
+
+    return digest.hexdigest()
+
+
+def brand_state_path(state_dir: Union[str, Path], brand_filter: str) -> str:
+    """:return: the folder holding the stored aggregates of one brand/keyword. matching is case-insensitive, so is
+    the folder name"""
+    keyword = brand_filter.lower()
+    slug = re.sub(r'[^a-z0-9]+', '_', keyword).strip('_') or 'all'
+
+    return os.path.join(state_dir, f"{slug}_{hashlib.sha1(keyword.encode('utf-8')).hexdigest()[:8]}")
+
+
+def current_state_path(path: str) -> str:
+    """:return: the sub-folder of a brand's state folder (see `brand_state_path`) its current state was written to
+    :raises OSError: if there is no current state"""
+    with open(os.path.join(path, CURRENT_FILE), encoding='utf-8') as handle:
+        return os.path.join(path, os.path.basename(handle.read().strip()))
+
+
+def load_state(
+        state_dir: Union[str, Path]
+        , brand_filter: str
+        , chunksize: int = 500_000
+) -> Tuple[SalesAggregator, Set[str]]:
+    """Restores the aggregates stored by previous runs for a brand/keyword.
+
+    :param state_dir: (str) the folder the states are kept in
+    :param brand_filter: (str) the brand/keyword
+    :param chunksize: (int) the number of rows per chunk, for the files still to be ingested
+    :return: a SalesAggregator picking up where the last run left off (empty if there is no usable state), and the
+             digests of the files it has already ingested
+    """
+    aggregator = SalesAggregator(brand_filter, chunksize, keep_all_order_lines=True)
+    try:
+        path = current_state_path(brand_state_path(state_dir, brand_filter))
+
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as handle:
+            meta = json.load(handle)
+
+    except (OSError, ValueError):
+        return aggregator, set()
+
+    if meta.get('version') != STATE_VERSION:
+        return aggregator, set()
+
+    aggregator.by_day = pd.read_pickle(os.path.join(path, 'by_day.pkl'))
+    aggregator.by_sku = pd.read_pickle(os.path.join(path, 'by_sku.pkl'))
+    aggregator.order_lines = [pd.read_pickle(os.path.join(path, 'order_lines.pkl'))]
+    aggregator.deduplicator.seen = np.load(os.path.join(path, 'row_hashes.npy'))
+    aggregator.total_revenue = meta['total_revenue']
+    aggregator.total_quantity = meta['total_quantity']
+    aggregator.rows = meta['rows']
+
+    return aggregator, set(meta['files'])
+
+
+def save_state(
+        state_dir: Union[str, Path]
+        , brand_filter: str
+        , aggregator: SalesAggregator
+        , digests: Set[str]
+) -> None:
+    """Stores the aggregates of a brand/keyword, replacing the previous state only once the new one is fully written.
+
+    Every state is written to a sub-folder of its own, and the `current` file naming it is then swapped in with a
+    single rename; a run that crashes at any point leaves either the previous state or the new one, never a mix (or
+    none). the sub-folders of older states are removed afterwards.
+
+    :param state_dir: (str) the folder the states are kept in
+    :param brand_filter: (str) the brand/keyword
+    :param aggregator: (SalesAggregator) the running totals, after the new files were added
+    :param digests: (set) the digests of every file ingested so far
+    """
+    aggregates = aggregator.result()
+
+    path = brand_state_path(state_dir, brand_filter)
+    state_name = f'state_{time.time_ns()}_{os.getpid()}'
+    temp_path = os.path.join(path, state_name)
+
+    os.makedirs(temp_path)
+
+    aggregator.by_day.to_pickle(os.path.join(temp_path, 'by_day.pkl'))
+    aggregates.by_sku.to_pickle(os.path.join(temp_path, 'by_sku.pkl'))
+    aggregates.order_lines.to_pickle(os.path.join(temp_path, 'order_lines.pkl'))
+    np.save(os.path.join(temp_path, 'row_hashes.npy'), aggregator.deduplicator.seen)
+
+    with open(os.path.join(temp_path, 'meta.json'), 'w', encoding='utf-8') as handle:
+        json.dump(
+            {
+                'version': STATE_VERSION
+                , 'brand_filter': brand_filter
+                , 'total_revenue': float(aggregates.total_revenue)
+                , 'total_quantity': int(aggregates.total_quantity)
+                , 'rows': int(aggregates.rows)
+                , 'files': sorted(digests)
+            }
+            , handle
+        )
+
+    current_temp = os.path.join(path, f'{CURRENT_FILE}.{os.getpid()}.tmp')
+
+    with open(current_temp, 'w', encoding='utf-8') as handle:
+        handle.write(state_name)
+
+    os.replace(current_temp, os.path.join(path, CURRENT_FILE))
+
+    # older states are of no use anymore
+    for entry in os.listdir(path):
+        if entry.startswith('state_') and entry != state_name:
+            shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+
+
+def update_incremental_state(
+        state_dir: Union[str, Path]
+        , file_paths: Iterable[Union[str, Path]]
+        , brand_filter: str
+        , chunksize: int = 500_000
+) -> Tuple[SalesAggregates, List[str]]:
+    """Merges the sales files not seen by previous runs into the stored aggregates of a brand/keyword.
+
+    Files are recognized by content, so re-downloads under a new name are skipped. New files that overlap old ones
+    (ex: a fresh 30-day export) are still de-duplicated order line by order line against everything already stored.
+    Removing a file from the folder does not remove its sales from the state; delete the brand's state folder to
+    rebuild from scratch.
+
+    The state keeps the order-id/sku/price of every order line, since a return arriving in a later run may need to be
+    priced against a sale ingested in an earlier one.
+
+    :param state_dir: (str) the folder the states are kept in. created if it does not exist
+    :param file_paths: (list) the sales .txt files currently in the data folder
+    :param brand_filter: (str) the brand/keyword
+    :param chunksize: (int) the number of rows read per chunk
+    :return: the merged SalesAggregates, and the files that were ingested in this run
+
+    Example:
+        aggregates, new_files = update_incremental_state(DEFAULT_STATE_DIR, sales_files, 'acme')
+    """
+    aggregator, digests = load_state(state_dir, brand_filter, chunksize)
+    new_files = []
+
+    for file_path in file_paths:
+        digest = file_digest(file_path)
+
+        if digest in digests:
+            continue
+
+        aggregator.add_file(file_path)
+        digests.add(digest)
+        new_files.append(str(file_path))
+
+    if new_files:
+        os.makedirs(state_dir, exist_ok=True)
+        save_state(state_dir, brand_filter, aggregator, digests)
+
+    return aggregator.result(), new_files
@@ -0,0 +1,142 @@
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable, Optional, Set, Union
+
+import numpy as np
+import pandas as pd
+
+from Parse_Cache import ParseCache
+
+INDEX_VERSION = 1  # bump whenever the index layout changes; older cached indexes are then rebuilt
+GRAM = 3  # keywords shorter than this can't be looked up and fall back to a scan of the distinct names
+REGEX_CHARS = set('.^$*+?{}[]\\|()')
+
+
+class KeywordIndex:
+    """A trigram index over the distinct product names of a dataset.
+
+    Every lowercased 3-character substring of every distinct product name maps to the ids of the names containing it.
+    A plain keyword is looked up by intersecting the id lists of its own trigrams, and only the few names left are
+    checked against the exact `str.contains(keyword, case=False)` match - so the index never changes which rows a
+    brand/keyword selects, it just avoids matching it against every name.
+
+    Keywords that use regex characters, that are shorter than 3 characters, or that are not plain ascii are matched
+    against every distinct name instead (still a few thousand names, not millions of rows).
+
+    Example:
+        index = KeywordIndex(sales['product-name'].cat.categories)
+
+        acme_names = index.lookup('acme')
+        acme_sales = sales.loc[index.mask(sales['product-name'], 'acme')]
+    """
+
+    def __init__(self, product_names: Iterable[str]):
+        """
+        :param product_names: (list) product names; duplicates and missing values are dropped
+        """
+        self.names = np.array(sorted({name for name in product_names if isinstance(name, str)}), dtype=object)
+
+        postings = defaultdict(list)
+
+        for name_id, name in enumerate(self.names):
+            lowered = name.lower()
+
+            for gram in {lowered[i:i + GRAM] for i in range(len(lowered) - GRAM + 1)}:
+                postings[gram].append(name_id)
+
+        self.postings = {gram: np.array(name_ids, dtype=np.int32) for gram, name_ids in postings.items()}
+
+        # case-insensitive regex matching folds a few non-ascii characters onto ascii ones (ex: 'ſ' matches 's') that
+        # lower() leaves alone, so names with any non-ascii character are always checked
+        self.non_ascii = np.array([i for i, name in enumerate(self.names) if not name.isascii()], dtype=np.int32)
+        self.version = INDEX_VERSION
+
+    def _candidates(self, brand_filter: str) -> np.ndarray:
+        """:return: the ids of the names that could contain `brand_filter`"""
+        plain = not (set(brand_filter) & REGEX_CHARS) and brand_filter.isascii() and len(brand_filter) >= GRAM
+
+        if not plain:
+            return np.arange(len(self.names))
+
+        lowered = brand_filter.lower()
+        grams = {lowered[i:i + GRAM] for i in range(len(lowered) - GRAM + 1)}
+
+        if any(gram not in self.postings for gram in grams):
+            return self.non_ascii
+
+        # intersecting the shortest lists first keeps every step small
+        posting_lists = sorted((self.postings[gram] for gram in grams), key=len)
+        candidates = posting_lists[0]
+
+        for name_ids in posting_lists[1:]:
+            candidates = np.intersect1d(candidates, name_ids, assume_unique=True)
+
+        return np.union1d(candidates, self.non_ascii)
+
+    def lookup(self, brand_filter: str) -> Set[str]:
+        """:return: the distinct product names matched by `str.contains(brand_filter, case=False)`"""
+        pattern = re.compile(brand_filter, flags=re.IGNORECASE)
+
+        return {name for name in self.names[self._candidates(brand_filter)] if pattern.search(name)}
+
+    def mask(self, product_names: pd.Series, brand_filter: str) -> np.ndarray:
+        """Flags the rows whose product name contains `brand_filter`, through the categorical codes.
+
+        :param product_names: (Series) a product-name column
+        :param brand_filter: (str) the brand/keyword
+        :return: a boolean row mask. rows without a product name never match
+        """
+        names = product_names if isinstance(product_names.dtype, pd.CategoricalDtype) else \
+            product_names.astype('category')
+
+        categories = names.cat.categories
+        matches = categories.isin(self.lookup(brand_filter))
+
+        # names the index was not built from (shouldn't happen, but a stale index must not drop rows)
+        unknown = ~categories.isin(self.names)
+
+        if unknown.any():
+            matches[unknown] = pd.Series(categories[unknown]).str.contains(f"{brand_filter}", case=False).to_numpy()
+
+        return np.append(matches, False)[names.cat.codes.to_numpy()]  # code -1 (no product name) lands on the False
+
+
+def load_keyword_index(
+        product_names: Iterable[pd.Series]
+        , file_paths: Iterable[Union[str, Path]]
+        , cache: Optional[ParseCache] = None
+) -> KeywordIndex:
+    """Returns the keyword index of a dataset, from the cache when none of its files changed since it was built.
+
+    :param product_names: (list) the product-name columns to index, ex: [sales['product-name'], ...]
+    :param file_paths: (list) the files the product names were read from; the cached index is keyed on them
+    :param cache: (ParseCache) optional cache the index is kept in, next to the parsed files
+    :return: a KeywordIndex
+
+    Example:
+        index = load_keyword_index(
+            [data.sales['product-name'], data.instock['product-name'], data.returns['product-name']]
+            , [c.file_path for c in loaded.classifications]
+            , cache
+        )
+    """
+    key = f'keyword_index_{cache.files_key(file_paths)}' if cache is not None and cache.enabled else None
+
+    if key is not None:
+        index = cache.get_object(key)
+
+        if isinstance(index, KeywordIndex) and getattr(index, 'version', None) == INDEX_VERSION:
+            return index
+
+    names = set()
+
+    for column in product_names:
+        names.update(column.cat.categories if isinstance(column.dtype, pd.CategoricalDtype) else column.dropna())
+
+    index = KeywordIndex(names)
+
+    if key is not None:
+        cache.put_object(key, index)
+
+    return index
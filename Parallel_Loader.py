@@ -0,0 +1,166 @@
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Collection, List, NamedTuple, Optional, Tuple, Union
+
+import pandas as pd
+
+from File_Classifier import REPORT_EXTENSIONS, REPORT_SPECS, FileClassification, ReportSpec, classify_header, \
+    read_classified
+from Parse_Cache import ParseCache
+from Time_Series import DateWindow
+
+
+class LoadedReports(NamedTuple):
+    """The raw frames read out of a data folder, grouped by report type, ready to be passed to `concat_df`."""
+    sales: List[pd.DataFrame]
+    returns: List[pd.DataFrame]
+    instock: List[pd.DataFrame]
+    cogs: List[pd.DataFrame]
+    classifications: List[FileClassification]
+
+
+def in_window(
+        df: pd.DataFrame
+        , spec: ReportSpec
+        , window: Optional[DateWindow]
+        , keep_order_ids: Collection[str] = frozenset()
+) -> pd.DataFrame:
+    """Drops the rows of a report outside of a date window; sales by purchase date, returns by return date.
+
+    :param df: (dF) the report, as read
+    :param spec: (ReportSpec) the report's spec; reports without a window_column (in stock, COGS) are left alone
+    :param window: (DateWindow) the days to keep. None keeps everything
+    :param keep_order_ids: (set) sales order lines of these orders are kept whatever their date, ex: the returned
+                           orders, so that the returns can be priced
+    :return: (dF) the rows inside the window
+    """
+    if window is None or spec.window_column is None:
+        return df
+
+    keep = window.mask(df[spec.window_column])
+
+    if keep_order_ids and 'amazon-order-id' in df:
+        keep |= df['amazon-order-id'].isin(keep_order_ids).to_numpy()
+
+    return df.loc[keep].reset_index(drop=True)
+
+
+def read_report_file(
+        file_path: str
+        , cache: Optional[ParseCache] = None
+        , classify_only: Collection[str] = ()
+        , window: Optional[DateWindow] = None
+) -> Tuple[FileClassification, Optional[pd.DataFrame]]:
+    """Classifies a single file and, if it is one of the four reports, reads it. Opens the file exactly once.
+
+    :param file_path: (str) the path of the file
+    :param cache: (ParseCache) if given, the parsed columns are served from/stored in this cache. the whole file is
+                  cached, whatever the window
+    :param classify_only: (list) report types that are classified but not read, ex: ['sales'] when streaming
+    :param window: (DateWindow) optional days to keep; the rows outside of it are dropped right after parsing, before
+                   they're handed back (see `in_window`)
+    :return: the classification, and the dF of the report's columns (None if the file is not a report, or not read)
+    """
+    with open(file_path, 'rb') as handle:
+        classification = classify_header(file_path, handle)
+
+        if classification.report_type is None or classification.report_type in classify_only:
+            return classification, None
+
+        spec = REPORT_SPECS[classification.report_type]
+        df = cache.get(file_path, spec.columns, spec.schema) if cache else None
+
+        if df is not None:
+            return classification._replace(reason=f'{classification.reason}, served from cache'), \
+                in_window(df, spec, window)
+
+        try:
+            df = read_classified(handle, classification)
+
+        except ValueError as e:
+            raise ValueError(f'{file_path}: {e}') from e
+
+    if cache:
+        cache.put(file_path, spec.columns, df, spec.schema)
+
+    return classification, in_window(df, spec, window)
+
+
+def pool_context() -> Optional[mp.context.BaseContext]:
+    """Returns a 'fork' multiprocessing context, or None where the platform cannot fork (Windows).
+
+    Forked workers do not re-import the calling script, which matters because SALES_REPORT_GENERATOR runs at module
+    level; a 'spawn' worker would re-run the whole report, input() prompt included.
+    """
+    return mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else None
+
+
+def load_report_files(
+        directory: Union[str, Path]
+        , max_workers: Optional[int] = None
+        , cache: Optional[ParseCache] = None
+        , classify_only: Collection[str] = ()
+        , window: Optional[DateWindow] = None
+) -> LoadedReports:
+    """Reads every FBA report in a folder, fanning the parsing out over a pool of processes.
+
+    The results come back in `os.listdir` order regardless of which worker finishes first, so the output is identical
+    to reading the files one at a time; rows, row order and dtypes included.
+
+    :param directory: (str) the folder holding your downloaded FBA reports
+    :param max_workers: (int) the number of processes to parse with. None uses every core, 1 reads in this process
+    :param cache: (ParseCache) if given, files that have not changed since the last run are not re-parsed
+    :param classify_only: (list) report types that are classified but not read. their frame list is left empty; the
+                          files can be found through `classifications`, ex: for streaming the sales files
+    :param window: (DateWindow) optional days to keep. the sales/returns rows outside of it are dropped by the workers,
+                   as each file is parsed, and never make it back
+    :return: a LoadedReports with the sales/returns/instock/cogs frame lists, plus the classification of every file
+    :raises ValueError: if one of the report files is missing a required column, or has non-numeric data in a numeric
+                        column
+
+    Example:
+        loaded = load_report_files(my_folder, max_workers=4)
+
+        sales = concat_df(loaded.sales)
+    """
+    file_paths = [
+        os.path.join(directory, file) for file in os.listdir(directory)
+        if os.path.splitext(file)[1] in REPORT_EXTENSIONS and os.path.isfile(os.path.join(directory, file))
+    ]
+
+    context = pool_context()
+
+    if max_workers == 1 or len(file_paths) < 2 or context is None:
+        results = [
+            read_report_file(file_path, cache, classify_only, window) for file_path in file_paths
+        ]
+
+    else:
+        read = partial(
+            read_report_file
+            , cache=cache
+            , classify_only=classify_only
+            , window=window
+        )
+
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            results = list(pool.map(read, file_paths))
+
+    if cache:
+        cache.evict()
+
+    frames = {'sales': [], 'returns': [], 'instock': [], 'cogs': []}
+
+    for classification, df in results:
+        if df is not None:
+            frames[classification.report_type].append(df)
+
+    return LoadedReports(**frames, classifications=[classification for classification, _ in results])
+
+
+def files_of_type(loaded: LoadedReports, report_type: str) -> List[str]:
+    """:return: the paths of every file classified as `report_type`, in the order they were read"""
+    return [c.file_path for c in loaded.classifications if c.report_type == report_type]
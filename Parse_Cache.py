@@ -0,0 +1,172 @@
+import hashlib
+import importlib.util
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'fba_sales_report')
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+
+
+class ParseCache:
+    """A folder of Feather files holding the already-parsed columns of each report file.
+
+    Entries are keyed by the file's absolute path, size, modification time and the list of columns (and dtypes) read,
+    so an edited or re-downloaded export, or a change to the report schema, is never served stale. Once the folder
+    grows past `max_bytes`, the least recently used entries are deleted.
+
+    Feather requires pyarrow. If pyarrow is not installed, the cache quietly disables itself and every file is parsed
+    as usual.
+
+    Example:
+        cache = ParseCache()
+
+        df = cache.get(file_path, columns)
+        if df is None:
+            df = csv_reader(file_path, columns)
+            cache.put(file_path, columns, df)
+    """
+
+    def __init__(
+            self
+            , cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR
+            , max_bytes: int = DEFAULT_MAX_BYTES
+            , enabled: bool = True
+    ):
+        """
+        :param cache_dir: (str) the folder the cached files are kept in. created if it does not exist
+        :param max_bytes: (int) the size the cache folder is trimmed down to by `evict`
+        :param enabled: (bool) set to False to bypass the cache entirely; every file will be parsed from text
+        """
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled and importlib.util.find_spec('pyarrow') is not None
+
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, file_path: Union[str, Path], columns: List[str], dtypes: Optional[Dict[str, str]] = None) -> str:
+        """Fingerprints a report file by path, size, mtime and the columns (and dtypes) read from it."""
+        stat = os.stat(file_path)
+        fingerprint = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|{'|'.join(columns)}" \
+                      f"|{sorted((dtypes or {}).items())}"
+
+        return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+
+    def files_key(self, file_paths: Iterable[Union[str, Path]]) -> str:
+        """Fingerprints a whole set of files by path, size and mtime. Changes as soon as any file is added, removed or
+        modified."""
+        fingerprint = '|'.join(sorted(self.key(file_path, []) for file_path in file_paths))
+
+        return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str, extension: str = 'feather') -> str:
+        return os.path.join(self.cache_dir, f'{key}.{extension}')
+
+    def get(
+            self
+            , file_path: Union[str, Path]
+            , columns: List[str]
+            , dtypes: Optional[Dict[str, str]] = None
+    ) -> Optional[pd.DataFrame]:
+        """Returns the cached dF for this file and column list, or None if there is no (fresh) entry."""
+        if not self.enabled:
+            return None
+
+        entry = self._entry_path(self.key(file_path, columns, dtypes))
+
+        try:
+            df = pd.read_feather(entry)
+
+        except (OSError, ValueError):  # missing, or a partially written/corrupt entry
+            return None
+
+        os.utime(entry)  # marks the entry as recently used, for eviction
+
+        return df
+
+    def put(
+            self
+            , file_path: Union[str, Path]
+            , columns: List[str]
+            , df: pd.DataFrame
+            , dtypes: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Stores a parsed dF. The file is written under a temporary name first, so readers never see half an entry.
+
+        A dF Feather can't hold (ex: an object column mixing numbers and text), or a cache folder that can't be written
+        to, just leaves the file uncached; the cache is optional, and never fails the report.
+        """
+        if not self.enabled:
+            return
+
+        from pyarrow import ArrowException  # present, or the cache would have disabled itself
+
+        entry = self._entry_path(self.key(file_path, columns, dtypes))
+        temp_entry = f'{entry}.{os.getpid()}.tmp'
+
+        try:
+            df.reset_index(drop=True).to_feather(temp_entry)
+            os.replace(temp_entry, entry)
+
+        except (ArrowException, OSError):
+            if os.path.exists(temp_entry):
+                os.remove(temp_entry)
+
+    def get_object(self, key: str) -> Optional[Any]:
+        """Returns a cached python object (ex: a KeywordIndex) stored under `key`, or None if there is none."""
+        if not self.enabled:
+            return None
+
+        entry = self._entry_path(key, 'pkl')
+
+        try:
+            with open(entry, 'rb') as handle:
+                obj = pickle.load(handle)
+
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+        os.utime(entry)
+
+        return obj
+
+    def put_object(self, key: str, obj: Any) -> None:
+        """Stores a python object under `key`, alongside the parsed files."""
+        if not self.enabled:
+            return
+
+        entry = self._entry_path(key, 'pkl')
+        temp_entry = f'{entry}.{os.getpid()}.tmp'
+
+        with open(temp_entry, 'wb') as handle:
+            pickle.dump(obj, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(temp_entry, entry)
+
+    def evict(self) -> int:
+        """Deletes the least recently used entries until the cache folder fits within `max_bytes`.
+
+        :return: (int) the number of entries deleted
+        """
+        if not self.enabled:
+            return 0
+
+        entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(('.feather', '.pkl'))]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+
+        total_bytes = sum(entry.stat().st_size for entry in entries)
+        evicted = 0
+
+        for entry in entries:
+            if total_bytes <= self.max_bytes:
+                break
+
+            total_bytes -= entry.stat().st_size
+            os.remove(entry.path)
+            evicted += 1
+
+        return evicted
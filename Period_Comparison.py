@@ -0,0 +1,184 @@
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from Return_Pricing import OrderLinePrices, price_returns
+
+Period = Tuple[pd.Timestamp, pd.Timestamp]  # first and last day, both included
+
+METRICS = ['revenue', 'units', 'returns', 'returned revenue']
+
+
+class PeriodComparison(NamedTuple):
+    """Per-sku sales and returns of several date windows, side by side.
+
+    totals:  (dF) period | sku | product-name | revenue | units | returns | returned revenue | return rate. one block of
+             rows per period, led by its Grand Totals row
+    changes: (dF) periods | sku | product-name | revenue change | revenue % change | units change | returns change |
+             return rate change. each period against the one before it
+    """
+    totals: pd.DataFrame
+    changes: pd.DataFrame
+
+
+def parse_period(text: str) -> Period:
+    """Parses a 'start:end' date window, ex: '2024-01-01:2024-01-31'. a single date is a one day window.
+
+    :param text: (str) the window, as given on the command line
+    :return: (tuple) the first and last day
+    :raises ValueError: if the dates can't be parsed, or the window ends before it starts
+    """
+    start, _, end = text.partition(':')
+    start_date = pd.Timestamp(start).normalize()
+    end_date = pd.Timestamp(end or start).normalize()
+
+    if end_date < start_date:
+        raise ValueError(f'the period {text!r} ends before it starts')
+
+    return start_date, end_date
+
+
+def period_label(period: Period) -> str:
+    """:return: (str) ex: '01/01/2024 - 01/31/2024'"""
+    return f'{period[0].strftime("%m/%d/%Y")} - {period[1].strftime("%m/%d/%Y")}'
+
+
+def _period_bins(periods: Sequence[Period]) -> pd.IntervalIndex:
+    """:return: one [first day, day after the last day) interval per period"""
+    return pd.IntervalIndex.from_tuples(
+        [(start.normalize(), end.normalize() + pd.Timedelta(days=1)) for start, end in periods]
+        , closed='left'
+    )
+
+
+def check_periods(periods: Sequence[Period]) -> None:
+    """:raises ValueError: unless there are at least two periods, and none of them overlap"""
+    if len(periods) < 2:
+        raise ValueError('at least two periods are needed for a comparison')
+
+    if _period_bins(periods).is_overlapping:
+        raise ValueError('the periods being compared overlap')
+
+
+def _period_ids(dates: pd.Series, periods: Sequence[Period]) -> np.ndarray:
+    """:return: (array) the position of the period each date falls in; -1 if it falls in none"""
+    return _period_bins(periods).get_indexer(dates)
+
+
+def _return_rate(returns: pd.Series, units: pd.Series) -> pd.Series:
+    """:return: returns / net units sold, the same as the cover page's Overall Return Rate. NaN if nothing was kept"""
+    net_units = units - returns
+
+    return (returns / net_units).where(net_units > 0)
+
+
+def _with_grand_totals(period: pd.DataFrame) -> pd.DataFrame:
+    """:return: one period's per-sku metrics, with sku/product-name as columns, led by a Grand Totals row"""
+    grand_totals = period.sum().to_frame().T.assign(sku='Grand Totals', **{'product-name': ''})
+
+    return pd.concat([grand_totals, period.reset_index()], ignore_index=True)
+
+
+def compare_periods(
+        sales: pd.DataFrame
+        , returns: pd.DataFrame
+        , periods: Sequence[Period]
+        , order_prices: Optional[OrderLinePrices] = None
+) -> PeriodComparison:
+    """Totals one brand's sales and returns per sku, for each of several date windows, and the change between them.
+
+    Every row is tagged with the window it falls in (sales by purchase date, returns by return date) and all windows are
+    grouped in a single pass, straight off of the already loaded frames - nothing is re-read per window.
+
+    :param sales: (dF) the brand's order lines, ex: ReportData.sales filtered to a brand
+    :param returns: (dF) the brand's returns
+    :param periods: (list) two or more (first day, last day) windows, oldest first. they may not overlap
+    :param order_prices: (OrderLinePrices) optional index of the order lines, to price the returns off of. built out of
+                         `sales` if not given
+    :return: a PeriodComparison
+    :raises ValueError: if there are fewer than two periods, or they overlap
+
+    Example:
+        periods = [parse_period('2024-01-01:2024-01-31'), parse_period('2024-02-01:2024-02-29')]
+
+        comparison = compare_periods(acme_sales, acme_returns, periods)
+    """
+    check_periods(periods)
+
+    if order_prices is None:
+        order_prices = OrderLinePrices(sales, returns['order-id'])
+
+    sales_period = _period_ids(sales['purchase_date'], periods)
+    returns_period = _period_ids(returns['return-date'], periods)
+
+    sales_totals = sales \
+        .loc[sales_period >= 0, ['sku', 'product-name', 'item-price', 'quantity']] \
+        .assign(period=sales_period[sales_period >= 0]) \
+        .groupby(['period', 'sku', 'product-name'], observed=True) \
+        .agg(revenue=('item-price', 'sum'), units=('quantity', 'sum'))
+
+    priced_returns = price_returns(returns.loc[returns_period >= 0], order_prices).returns
+
+    return_totals = priced_returns \
+        .assign(
+            period=returns_period[returns_period >= 0]
+            , value=lambda x: x['item-price'] * x['quantity']
+        ) \
+        .groupby(['period', 'sku', 'product-name'], observed=True) \
+        .agg(**{'returns': ('quantity', 'sum'), 'returned revenue': ('value', 'sum')})
+
+    # one row per sku/product name, one column per metric/period; a sku that didn't sell in a period counts as 0 there
+    grid = sales_totals \
+        .join(return_totals, how='outer') \
+        .unstack('period') \
+        .reindex(columns=pd.MultiIndex.from_product([METRICS, range(len(periods))]), fill_value=0) \
+        .astype('float64') \
+        .fillna(0)
+
+    labels = [period_label(period) for period in periods]
+    totals = []
+    changes = []
+
+    for i, label in enumerate(labels):
+        period = grid.xs(i, axis=1, level=1)
+        period = period.loc[(period['units'] != 0) | (period['returns'] != 0)].sort_values('revenue', ascending=False)
+
+        totals.append(_with_grand_totals(period).assign(period=label))
+
+    for i in range(1, len(labels)):
+        # both frames hold every sku of the grid, in the same order, so they line up row by row
+        before = _with_grand_totals(grid.xs(i - 1, axis=1, level=1))
+        after = _with_grand_totals(grid.xs(i, axis=1, level=1))
+
+        change = pd.DataFrame({
+            'periods': f'{labels[i]} vs {labels[i - 1]}'
+            , 'sku': after['sku']
+            , 'product-name': after['product-name']
+            , 'revenue change': after['revenue'] - before['revenue']
+            , 'revenue % change': ((after['revenue'] - before['revenue']) / before['revenue'])
+            .where(before['revenue'] != 0)
+            , 'units change': after['units'] - before['units']
+            , 'returns change': after['returns'] - before['returns']
+            , 'return rate change': _return_rate(after['returns'], after['units'])
+            - _return_rate(before['returns'], before['units'])
+        })
+
+        # skus that didn't move are left out. the grand totals are always shown, first
+        moved = (change[['revenue change', 'units change', 'returns change']] != 0).any(axis=1)
+
+        changes.append(pd.concat([
+            change.iloc[:1]
+            , change.iloc[1:].loc[moved.iloc[1:]].sort_values('revenue change', ascending=False)
+        ]))
+
+    totals = pd.concat(totals, ignore_index=True) \
+        .assign(**{'return rate': lambda x: _return_rate(x['returns'], x['units'])})
+
+    return PeriodComparison(
+        totals=totals[['period', 'sku', 'product-name', *METRICS, 'return rate']]
+        .astype({'units': 'int64', 'returns': 'int64'})
+        , changes=pd.concat(changes, ignore_index=True)
+        .astype({'units change': 'int64', 'returns change': 'int64'})
+    )
+
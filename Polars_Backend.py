@@ -0,0 +1,229 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Union
+
+import pandas as pd
+
+from File_Classifier import REPORT_SPECS
+from File_Readers import NA_VALUES
+from Keyword_Index import KeywordIndex
+from Report_Wrangler import ReportError, aggregate_sales, brand_masks
+from Streaming_Aggregator import SalesAggregates
+from Time_Series import DateWindow
+
+ENGINES = ['pandas', 'polars']
+
+
+def _import_polars():
+    """:return: the polars module. imported on first use, so the pandas engine never pays for it"""
+    try:
+        import polars
+
+    except ImportError:
+        raise ReportError('The polars engine needs the polars package (pip install polars); please install it, or run '
+                          'the report with the pandas engine.')
+
+    return polars
+
+
+BLOCK_SIZE = 1 << 24  # bytes read at a time when checking/transcoding a sales file
+
+
+def _is_ascii(file_path: str) -> bool:
+    """:return: (bool) True if every byte of the file is ascii; such a file reads the same as latin1 or utf-8"""
+    with open(file_path, 'rb') as f:
+        return all(block.isascii() for block in iter(lambda: f.read(BLOCK_SIZE), b''))
+
+
+@contextmanager
+def _utf8_files(file_paths: Iterable[Union[str, Path]]) -> Iterator[List[str]]:
+    """Hands the sales files to polars decoded as latin1, like the pandas readers decode them; polars only reads
+    utf-8. ascii files (most exports) are scanned as they are, the others are transcoded into a temporary folder,
+    block by block, which is removed on exit.
+
+    :param file_paths: (list) the sales .txt files
+    :return: yields the paths to scan, in the same order
+    """
+    file_paths = [str(file_path) for file_path in file_paths]
+    non_ascii = [file_path for file_path in file_paths if not _is_ascii(file_path)]
+
+    if not non_ascii:
+        yield file_paths
+        return
+
+    temp_dir = tempfile.mkdtemp(prefix='fba_polars_')
+
+    try:
+        transcoded = {}
+
+        for i, file_path in enumerate(non_ascii):
+            transcoded[file_path] = os.path.join(temp_dir, f'{i}.txt')
+
+            with open(file_path, encoding='latin1', newline='') as source, \
+                    open(transcoded[file_path], 'w', encoding='utf-8', newline='') as target:
+                shutil.copyfileobj(source, target, BLOCK_SIZE)
+
+        yield [transcoded.get(file_path, file_path) for file_path in file_paths]
+
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _sales_scan(pl, file_paths: List[str]):
+    """:return: a LazyFrame of the sales order lines - the columns of the report, parsed and dropna'd like
+    ReportData.sales (the callers de-duplicate what they keep). nothing is read until it's collected"""
+    spec = REPORT_SPECS['sales']
+
+    scans = [
+        pl.scan_csv(
+            file_path
+            , separator=spec.sep
+            , encoding='utf8'  # see _utf8_files
+            , infer_schema=False  # every column is read as text, then cast exactly like the pandas readers
+            , null_values=NA_VALUES  # the same missing values as the pandas readers
+        ) \
+            .select(spec.columns)
+        for file_path in file_paths
+    ]
+
+    return pl.concat(scans) \
+        .with_columns(
+        # only the date portion is kept, like File_Readers.parse_iso_dates; unparseable dates become null
+        pl.col('purchase-date').str.slice(0, 10).str.to_date('%Y-%m-%d', strict=False).alias('purchase_date')
+        , pl.col('quantity').cast(pl.Int32)
+        , pl.col('item-price').cast(pl.Float64)
+    ) \
+        .select(['amazon-order-id', 'merchant-order-id', 'purchase_date', 'sku', 'quantity', 'product-name',
+                 'item-price']) \
+        .drop_nulls()
+
+
+def _collect(pl, query):
+    """:return: the collected query (a polars DataFrame)
+    :raises ValueError: if a quantity/price can't be cast to a number, like the pandas readers"""
+    try:
+        return query.collect()
+
+    except pl.exceptions.InvalidOperationError as e:
+        raise ValueError(str(e).splitlines()[0])
+
+
+def _to_pandas(df) -> pd.DataFrame:
+    """:return: a collected polars DataFrame, as a pandas dF. categoricals come back with sorted categories, like the
+    categories of the pandas readers"""
+    df = df.to_pandas()
+
+    for column, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            df[column] = df[column].cat.reorder_categories(sorted(df[column].cat.categories))
+
+    return df
+
+
+class SalesFileSummary(NamedTuple):
+    """What the polars engine reads out of the sales files once, when the data folder is loaded, for every brand.
+
+    order_lines:   (dF) amazon-order-id | sku | item-price of the returned orders (every brand's), de-duplicated and in
+                   file order like the pandas engine's, to price the returns off of (see Return_Pricing)
+    product_names: (Series) the distinct product names, as pandas reads them, for the keyword index
+    """
+    order_lines: pd.DataFrame
+    product_names: pd.Series
+
+
+def polars_sales_summary(file_paths: Iterable[Union[str, Path]], returned_order_ids: pd.Series) -> SalesFileSummary:
+    """Reads the returned order lines and the distinct product names out of the sales .txt files, in a single polars
+    scan. only those ever make it to pandas.
+
+    :param file_paths: (list) the sales .txt files
+    :param returned_order_ids: (Series) the order ids of the returns
+    :return: a SalesFileSummary
+    :raises ReportError: if polars is not installed
+    :raises ValueError: if a file holds non-numeric quantities/prices
+    """
+    pl = _import_polars()
+
+    with _utf8_files(file_paths) as scanned_paths:
+        sales = _sales_scan(pl, scanned_paths)
+
+        order_lines = sales \
+            .filter(pl.col('amazon-order-id').is_in(list(returned_order_ids.dropna().unique()))) \
+            .unique(keep='first', maintain_order=True) \
+            .select(['amazon-order-id', 'sku', 'item-price'])
+
+        names = sales.select(pl.col('product-name').unique())
+
+        # both queries share the one scan (polars' common subplan elimination)
+        try:
+            order_lines, names = pl.collect_all([order_lines, names])
+
+        except pl.exceptions.InvalidOperationError as e:
+            raise ValueError(str(e).splitlines()[0])
+
+    return SalesFileSummary(_to_pandas(order_lines), _to_pandas(names)['product-name'])
+
+
+def polars_sales_aggregates(
+        file_paths: Iterable[Union[str, Path]]
+        , brand_filter: str
+        , index: Optional[KeywordIndex] = None
+        , window: Optional[DateWindow] = None
+) -> SalesAggregates:
+    """Reads one brand/keyword's order lines out of the sales .txt files with a lazy, multi-threaded polars query,
+    instead of reading every order line into a pandas dF first, and folds them into per-day and per-sku totals.
+
+    The brand/keyword is matched, with pandas' own `str.contains(brand, case=False)`, against the distinct product
+    names only - looked up in the keyword index, or read in one cheap pass over the product-name column without one.
+    The names it selects are then pushed down into the scan as a filter, so the rows of other brands are dropped while
+    parsing, and are never de-duplicated or handed to pandas. The per-day/per-sku sums are left to pandas
+    (`aggregate_sales`), over the very same rows in the very same order as the pandas engine; its compensated sums
+    are then identical down to the last bit, which the column widths of the workbook depend on.
+
+    :param file_paths: (list) the sales .txt files
+    :param brand_filter: (str) the brand/keyword to keep, matched against product-name like the in-memory report
+    :param index: (KeywordIndex) optional index of the product names, including the sales files' (see
+                  `polars_sales_summary`)
+    :param window: (DateWindow) optional purchase dates to keep; pushed down into the scan like the brand filter. the
+                   returned order lines, whatever their date, come from `polars_sales_summary`
+    :return: a SalesAggregates, the same shape `stream_sales_aggregates` produces
+    :raises ReportError: if polars is not installed
+    :raises ValueError: if a file holds non-numeric quantities/prices
+
+    Example:
+        aggregates = polars_sales_aggregates(sales_files, 'acme', dataset.index)
+
+        daily_revenue = aggregates.by_day
+    """
+    pl = _import_polars()
+
+    with _utf8_files(file_paths) as scanned_paths:
+        sales = _sales_scan(pl, scanned_paths)
+
+        if brand_filter and index is not None:
+            sales = sales.filter(pl.col('product-name').is_in(list(index.lookup(brand_filter))))
+
+        elif brand_filter:
+            names = _collect(pl, sales.select(pl.col('product-name').unique()))
+            matches = brand_masks(names['product-name'].to_pandas(), [brand_filter])[brand_filter]
+
+            sales = sales.filter(pl.col('product-name').is_in(names['product-name'].filter(matches)))
+
+        if window is not None and window.start is not None:
+            sales = sales.filter(pl.col('purchase_date') >= window.start.date())
+
+        if window is not None and window.end is not None:
+            sales = sales.filter(pl.col('purchase_date') <= window.end.date())
+
+        # first occurrences, in file order; the exact rows (and row order) drop_duplicates leaves the pandas engine
+        # with. skus and product names are handed over as categoricals, like the pandas readers'
+        lines = sales \
+            .unique(keep='first', maintain_order=True) \
+            .select(['purchase_date', 'sku', 'product-name', 'item-price', 'quantity']) \
+            .with_columns(pl.col('sku').cast(pl.Categorical), pl.col('product-name').cast(pl.Categorical))
+
+        lines = _collect(pl, lines)
+
+    return aggregate_sales(_to_pandas(lines).astype({'purchase_date': 'datetime64[ns]'}))
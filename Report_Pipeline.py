@@ -0,0 +1,269 @@
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from File_Classifier import REPORT_SPECS, FileClassification, classification_log
+from Incremental_State import update_incremental_state
+from Keyword_Index import KeywordIndex, load_keyword_index
+from Parallel_Loader import files_of_type, in_window, load_report_files
+from Parse_Cache import ParseCache
+from Period_Comparison import Period
+from Polars_Backend import ENGINES, polars_sales_aggregates, polars_sales_summary
+from Report_Wrangler import Report, ReportData, ReportError, build_report, prepare_data
+from Report_Writer import ChartOptions, write_report
+from Return_Pricing import OrderLinePrices
+from Stage_Profiler import profile_stage
+from Streaming_Aggregator import return_keys, stream_sales_aggregates
+from Time_Series import DateWindow
+
+
+class Dataset(NamedTuple):
+    """A data folder, loaded and cleaned once, ready to be reported on for any number of brands/keywords.
+
+    data:            (ReportData) the cleaned frames. data.sales is None if the sales are streamed, or read by polars
+    index:           (KeywordIndex) the index of the product names, for the brand/keyword lookups
+    sales_files:     (list) the sales .txt files, read chunk by chunk when the sales are streamed, or scanned by polars
+    classifications: (list) how every file of the folder was classified
+    order_prices:    (OrderLinePrices) the returned order lines, indexed for pricing the returns of every brand. None if
+                     the sales are streamed; each brand's are then indexed as they're streamed
+    engine:          (str) what reads the sales files; 'pandas' or 'polars'. see Polars_Backend
+    window:          (DateWindow) the days the report is limited to, if any; sales by purchase date, returns by return
+                     date. data.returns (and data.sales) already hold only those
+    """
+    data: ReportData
+    index: KeywordIndex
+    sales_files: List[str]
+    classifications: List[FileClassification]
+    order_prices: Optional[OrderLinePrices] = None
+    engine: str = 'pandas'
+    window: Optional[DateWindow] = None
+
+
+def load(
+        directory: Union[str, Path]
+        , max_workers: Optional[int] = None
+        , cache: Optional[ParseCache] = None
+        , stream_sales: bool = False
+        , engine: str = 'pandas'
+        , window: Optional[DateWindow] = None
+        , verbose: bool = False
+) -> Dataset:
+    """Reads, classifies and cleans every report file of a data folder.
+
+    :param directory: (str) the folder holding your downloaded FBA reports
+    :param max_workers: (int) the number of processes used to parse the files. None uses every core
+    :param cache: (ParseCache) optional cache of parsed files and of the keyword index
+    :param stream_sales: (bool) leave the sales files on disk, to be read chunk by chunk by `wrangle` (streaming and
+                         incremental modes)
+    :param engine: (str) 'pandas' reads the sales files into memory, 'polars' leaves them on disk, to be scanned per
+                   brand/keyword by `wrangle` (see Polars_Backend). the other reports are always read by pandas
+    :param window: (DateWindow) optional days to limit the report to; sales by purchase date, returns by return date.
+                   the rows outside of it are dropped once the files are read (or, for sales left on disk, as each
+                   chunk or scan is read), except for the order lines of the window's returns, kept to price them
+    :param verbose: (bool) print how each file was classified
+    :return: a Dataset
+    :raises ReportError: if a required file is missing, or a file holds non-numeric data
+    :raises ValueError: if the engine is not one of ENGINES
+
+    Example:
+        dataset = load(my_folder, cache=ParseCache())
+    """
+    if engine not in ENGINES:
+        raise ValueError(f'engine must be one of {ENGINES}, not {engine!r}')
+
+    # both leave the sales files on disk; streaming reads them chunk by chunk, polars scans them
+    sales_on_disk = stream_sales or engine == 'polars'
+
+    # each file is opened once; its raw header line decides which report it is, and the same handle is then read
+    with profile_stage('ingest') as stage:
+        try:
+            loaded = load_report_files(
+                directory
+                , max_workers=max_workers
+                , cache=cache
+                , classify_only=['sales'] if sales_on_disk else []
+                , window=window if sales_on_disk else None
+            )
+
+            # sales read into memory hold on to the lines of the window's returned orders, whatever their purchase
+            # date, so that the returns can be priced like they are without a window. which orders those are is only
+            # known once the returns are read, so the window is applied here, after the single pass over the files
+            if window is not None and not sales_on_disk:
+                returns = [in_window(df, REPORT_SPECS['returns'], window) for df in loaded.returns]
+                returned_order_ids = frozenset(order_id for df in returns for order_id in df['order-id'].dropna())
+
+                loaded = loaded._replace(
+                    sales=[in_window(df, REPORT_SPECS['sales'], window, returned_order_ids) for df in loaded.sales]
+                    , returns=returns
+                )
+
+        except ValueError as e:
+            raise ReportError(f'Please review your files, one or more columns is missing or has non-numeric data in '
+                              f'it. ({e})')
+
+        stage['rows'] = sum(len(df) for df in [*loaded.sales, *loaded.returns, *loaded.instock, *loaded.cogs])
+
+    if verbose:
+        print(classification_log(loaded.classifications))
+
+    sales_files = files_of_type(loaded, 'sales')
+
+    if any(not df for df in [sales_files if sales_on_disk else loaded.sales, loaded.returns, loaded.instock,
+                             loaded.cogs]):
+        raise ReportError('ERROR: One or more of the required files necessary to run this report is missing. '
+                          'Please familiarize yourself with the documentation in the README and try again.')
+
+    data = prepare_data(None if sales_on_disk else loaded.sales, loaded.returns, loaded.instock, loaded.cogs)
+    product_names = [df['product-name'] for df in [data.sales, data.instock, data.returns] if df is not None]
+
+    # polars reads the returned order lines and the product names of the sales files in one scan, for every brand
+    summary = None
+
+    if engine == 'polars':
+        with profile_stage('scan') as stage:
+            try:
+                summary = polars_sales_summary(sales_files, data.returns['order-id'])
+
+            except ValueError as e:
+                raise ReportError(f'Please review your files, one or more columns is missing or has non-numeric data '
+                                  f'in it. ({e})')
+
+            product_names.append(summary.product_names)
+            stage['rows'] = len(summary.order_lines)
+
+    # the distinct product names are indexed once per set of files, and the index is cached with the parsed files
+    indexed_types = ['instock', 'returns'] if stream_sales else ['sales', 'instock', 'returns']
+
+    # a window's index only holds the window's names, so it's not cached as the index of the files
+    index = load_keyword_index(
+        product_names
+        , [file_path for report_type in indexed_types for file_path in files_of_type(loaded, report_type)]
+        , cache if window is None else None
+    )
+
+    # every brand's returns are priced off of the same order lines, so they're deduplicated and indexed just once
+    order_prices = None
+
+    if data.sales is not None:
+        order_prices = OrderLinePrices(data.sales, data.returns['order-id'])
+
+        # the returned order lines kept from outside of the window have served their purpose
+        if window is not None:
+            data = data._replace(sales=data.sales.loc[window.mask(data.sales['purchase_date'])].reset_index(drop=True))
+
+    elif summary is not None:
+        order_prices = OrderLinePrices(summary.order_lines, data.returns['order-id'])
+
+    return Dataset(data, index, sales_files, loaded.classifications, order_prices, engine, window)
+
+
+def wrangle(
+        dataset: Dataset
+        , brand_filter: str
+        , chunksize: int = 500_000
+        , state_dir: Optional[Union[str, Path]] = None
+        , granularity: str = 'D'
+        , periods: Optional[Sequence[Period]] = None
+        , masks: Optional[Dict[str, np.ndarray]] = None
+        , verbose: bool = False
+) -> Report:
+    """Builds the tables of one brand/keyword.
+
+    If the dataset was loaded with `stream_sales`, the sales files are folded chunk by chunk into per-day and per-sku
+    totals; with a `state_dir`, only the files not seen by previous runs are read (see Incremental_State). If it was
+    loaded with the polars engine, they're scanned with this brand/keyword pushed down into the scan instead.
+
+    :param dataset: (Dataset) the loaded data folder, from `load`
+    :param brand_filter: (str) the brand/keyword. '' returns everything
+    :param chunksize: (int) the number of sales rows read per chunk, when streaming
+    :param state_dir: (str) the folder the per-brand totals are kept in between runs. only used when streaming (and
+                      not with the polars engine)
+    :param granularity: (str) the buckets of the revenue chart; 'D' (daily), 'W' (weekly) or 'M' (monthly)
+    :param periods: (list) optional date windows to compare per sku, oldest first. not available when streaming
+    :param masks: (dict) optional {'sales'/'instock'/'returns': row mask} of this brand, ex: from `report_masks`, when
+                  several brands are flagged at once. computed for this brand alone if not given
+    :param verbose: (bool) print how many new sales files were merged, in incremental mode, and how many returns had
+                    to be priced at the average
+    :return: a Report, ready to be rendered
+    :raises ReportError: if there are no sales for the brand/keyword, or if a file holds non-numeric data
+
+    Example:
+        report = wrangle(dataset, 'acme')
+    """
+    sales_aggregates = None
+
+    if dataset.engine == 'polars':
+        with profile_stage('scan', brand_filter) as stage:
+            try:
+                sales_aggregates = polars_sales_aggregates(
+                    dataset.sales_files
+                    , brand_filter
+                    , dataset.index
+                    , window=dataset.window
+                )
+
+            except ValueError as e:
+                raise ReportError(f'Please review your `sales` files. It appears you have some non-numeric data in '
+                                  f'them. ({e})')
+
+            stage['rows'] = sales_aggregates.rows
+
+    elif dataset.data.sales is None and state_dir is not None:
+        with profile_stage('stream', brand_filter) as stage:
+            sales_aggregates, new_files = update_incremental_state(
+                state_dir
+                , dataset.sales_files
+                , brand_filter
+                , chunksize=chunksize
+            )
+
+            stage['rows'] = sales_aggregates.rows
+
+        if verbose:
+            print(f'{len(new_files)} new sales file(s) merged into the stored totals for {brand_filter!r}.')
+
+    elif dataset.data.sales is None:
+        # the order-id/sku keys of the returns tell the streaming pass which order lines to hold on to, so that the
+        # returns can still be priced
+        with profile_stage('stream', brand_filter) as stage:
+            sales_aggregates = stream_sales_aggregates(
+                dataset.sales_files
+                , brand_filter
+                , chunksize=chunksize
+                , keep_return_keys=return_keys(dataset.data.returns['order-id'], dataset.data.returns['sku'])
+                , window=dataset.window
+            )
+
+            stage['rows'] = sales_aggregates.rows
+
+    report = build_report(
+        dataset.data
+        , brand_filter
+        , masks=masks
+        , sales_aggregates=sales_aggregates
+        , index=dataset.index
+        , granularity=granularity
+        , order_prices=dataset.order_prices
+        , periods=periods
+    )
+
+    if verbose and report.returns_priced_at_average:
+        print(f'{report.returns_priced_at_average} return(s) for {brand_filter!r} had no matching order line, and were '
+              f'priced at the average returned price.')
+
+    return report
+
+
+def render(report: Report, output_dir: Union[str, Path], chart: ChartOptions = ChartOptions()) -> str:
+    """Writes a Report to a formatted excel workbook, with a time-series chart on the cover page.
+
+    :param report: (Report) the brand's tables, from `wrangle`
+    :param output_dir: (str) the folder to write the workbook to. created if it does not exist
+    :param chart: (ChartOptions) how the cover page chart is rendered
+    :return: (str) the path of the workbook
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    return write_report(report, str(output_dir).replace("\\", "/"), chart)
@@ -0,0 +1,500 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from File_Readers import concat_df
+from Keyword_Index import KeywordIndex
+from Period_Comparison import Period, PeriodComparison, compare_periods
+from Return_Pricing import OrderLinePrices, price_returns
+from Stage_Profiler import profile_stage
+from Streaming_Aggregator import SalesAggregates
+from Time_Series import GRANULARITIES, revenue_time_series, sales_period
+
+
+class ReportError(Exception):
+    """Raised when a report cannot be built from the data given. The message is meant to be shown to the user."""
+
+
+class ReportData(NamedTuple):
+    """The four reports, concatenated and cleaned once, before any brand/keyword is applied.
+
+    `sales` is None when the sales were aggregated by streaming instead of being read into memory.
+    """
+    sales: Optional[pd.DataFrame]
+    returns: pd.DataFrame
+    instock: pd.DataFrame
+    cogs: pd.DataFrame
+
+
+class Report(NamedTuple):
+    """Everything needed to write one brand/keyword's workbook."""
+    brand_filter: str
+    instock: pd.DataFrame
+    sales_piv_no_dates: pd.DataFrame
+    returns: pd.DataFrame
+    returns_by_reason: pd.DataFrame
+    sales_piv_w_dates: pd.DataFrame
+    start_date: pd.Timestamp
+    end_date: pd.Timestamp
+    date_range: pd.DatetimeIndex
+    total_sales_rev: float
+    total_sales_qty: int
+    total_return_value: float
+    total_returns_qty: int
+    remaining_in_stock_qty: int
+    remaining_in_stock_value: float
+    granularity: str = 'D'
+    returns_priced_at_average: int = 0
+    comparison: Optional[PeriodComparison] = None
+
+
+def prepare_data(
+        sales: Optional[List[pd.DataFrame]]
+        , returns: List[pd.DataFrame]
+        , instock: List[pd.DataFrame]
+        , cogs: List[pd.DataFrame]
+) -> ReportData:
+    """Concatenates and cleans the raw frames of each report. None of these steps depend on the brand/keyword, so
+    when running several brands they only need to be done once.
+
+    Row filters and de-duplication commute, so applying a brand mask to these frames afterwards gives exactly the rows
+    the brand-first report used to produce.
+
+    :param sales: (list) the raw sales frames, or None if the sales are streamed instead
+    :param returns: (list) the raw returns frames
+    :param instock: (list) the raw in-stock frames
+    :param cogs: (list) the raw COGS frames
+    :return: a ReportData
+    :raises ReportError: if the COGS file(s) are empty or hold non-numeric costs
+    """
+    # _____
+    # COGS;
+    # _____
+
+    with profile_stage('COGS') as stage:
+        try:
+            cogs = concat_df(cogs)
+            stage['rows'] = len(cogs)
+            numeric_test_cogs = cogs['VENDOR COST'].mean()  # making sure the required values are numeric.
+            # error will otherwise appear down in the in-stock block, since that's where you will be joining cogs to
+            # in-stock
+
+        except (pd.errors.DataError, ValueError, TypeError):
+            raise ReportError('Please review your `COGS` file(s). It appears you have some non-numeric data in them.')
+
+        if cogs.shape[0] == 0:
+            raise ReportError(
+                'It appears your COGS file is empty. Please ensure you are feeding a file with a SKU and UNIT COST '
+                'column.'
+            )
+
+    if sales is not None:
+        sales = concat_df(sales) \
+            .dropna() \
+            .rename({'purchase-date': 'purchase_date'}, axis=1) \
+            .drop_duplicates()
+
+    instock = concat_df(instock) \
+        .sort_values('afn-fulfillable-quantity', ascending=False, na_position='first') \
+        .dropna() \
+        .drop_duplicates()
+
+    returns = concat_df(returns) \
+        .drop_duplicates()
+
+    return ReportData(sales, returns, instock, cogs)
+
+
+def brand_masks(
+        product_names: pd.Series
+        , brand_filters: Iterable[str]
+        , index: Optional[KeywordIndex] = None
+) -> Dict[str, np.ndarray]:
+    """Flags, for every brand/keyword at once, which rows' product name contains it.
+
+    The case-insensitive regex match is only run against the distinct product names (a few thousand), then spread back
+    out to the rows through the categorical codes. Rows without a product name never match. With a KeywordIndex, most
+    keywords are narrowed down to a handful of candidate names before any matching is done.
+
+    :param product_names: (Series) a product-name column
+    :param brand_filters: (list) the brands/keywords, matched the same way as `str.contains(brand, case=False)`
+    :param index: (KeywordIndex) optional index of the dataset's product names, from `load_keyword_index`
+    :return: {brand/keyword: boolean row mask}
+
+    Example:
+        masks = brand_masks(sales['product-name'], ['acme', 'globex'])
+
+        acme_sales = sales.loc[masks['acme']]
+    """
+    if index is not None:
+        return {brand_filter: index.mask(product_names, brand_filter) for brand_filter in brand_filters}
+
+    names = product_names if isinstance(product_names.dtype, pd.CategoricalDtype) else \
+        product_names.astype('category')
+
+    categories = pd.Series(names.cat.categories)
+    codes = names.cat.codes.to_numpy()
+
+    masks = {}
+
+    for brand_filter in brand_filters:
+        matches = categories.str.contains(f"{brand_filter}", case=False).to_numpy(dtype=bool)
+        masks[brand_filter] = np.append(matches, False)[codes]  # code -1 (no product name) lands on the False
+
+    return masks
+
+
+def report_masks(
+        data: ReportData
+        , brand_filters: Iterable[str]
+        , index: Optional[KeywordIndex] = None
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """Flags the sales, in-stock and returns rows of every brand/keyword, one `brand_masks` pass per report.
+
+    :param data: (ReportData) the cleaned frames, from `prepare_data`. streamed sales (None) get no mask
+    :param brand_filters: (list) the brands/keywords
+    :param index: (KeywordIndex) optional index of the dataset's product names
+    :return: {brand/keyword: {'sales'/'instock'/'returns': row mask}}, the `masks` build_report takes
+
+    Example:
+        masks = report_masks(data, ['acme', 'globex'], index)
+
+        acme = build_report(data, 'acme', masks['acme'])
+    """
+    brand_filters = list(brand_filters)
+
+    by_report = {
+        name: brand_masks(frame['product-name'], brand_filters, index)
+        for name, frame in [('sales', data.sales), ('instock', data.instock), ('returns', data.returns)]
+        if frame is not None
+    }
+
+    return {brand_filter: {name: masks[brand_filter] for name, masks in by_report.items()}
+            for brand_filter in brand_filters}
+
+
+def aggregate_sales(sales: pd.DataFrame) -> SalesAggregates:
+    """Folds one brand's (already filtered) sales order lines into per-day and per-sku totals.
+
+    :param sales: (dF) the brand's rows of ReportData.sales
+    :return: a SalesAggregates, the same shape `stream_sales_aggregates` produces
+    """
+    # creating a table that will contain date and revenue values that we will use in our table later
+    sales_piv_w_dates = pd.pivot_table(
+        sales
+        , index='purchase_date'
+        , values='item-price'
+        , aggfunc='sum'
+    ) \
+        .reset_index()
+
+    sales_piv_no_dates = pd.pivot_table(
+        sales
+        , index=['sku', 'product-name']
+        , values=['item-price', 'quantity']
+        , aggfunc='sum'
+        , observed=True  # sku/product-name are categoricals; only keep the combinations that actually sold
+    ) \
+        .reset_index()
+
+    return SalesAggregates(
+        by_day=sales_piv_w_dates
+        , by_sku=sales_piv_no_dates
+        , order_lines=sales
+        , total_revenue=sales['item-price'].sum().round(2)
+        , total_quantity=sales['quantity'].sum()
+        , rows=len(sales)
+    )
+
+
+def build_report(
+        data: ReportData
+        , brand_filter: str
+        , masks: Optional[Dict[str, np.ndarray]] = None
+        , sales_aggregates: Optional[SalesAggregates] = None
+        , index: Optional[KeywordIndex] = None
+        , granularity: str = 'D'
+        , order_prices: Optional[OrderLinePrices] = None
+        , periods: Optional[Sequence[Period]] = None
+) -> Report:
+    """Builds the sales, in-stock and returns tables of one brand/keyword.
+
+    :param data: (ReportData) the cleaned frames, from `prepare_data`
+    :param brand_filter: (str) the brand/keyword. a single space returns everything
+    :param masks: (dict) optional precomputed {'sales'/'instock'/'returns': row mask} for this brand, from
+                  `report_masks`. computed here if not given
+    :param sales_aggregates: (SalesAggregates) the brand's streamed sales. required when data.sales is None
+    :param index: (KeywordIndex) optional index of the product names, used when the masks are computed here
+    :param granularity: (str) the buckets of the revenue time series; 'D' (daily), 'W' (weekly) or 'M' (monthly)
+    :param order_prices: (OrderLinePrices) optional index of the dataset's order lines, shared by every brand, to price
+                         the returns off of. built out of the brand's own order lines if not given
+    :param periods: (list) optional (first day, last day) date windows to compare, oldest first. see Period_Comparison.
+                    needs every order line in memory (no streaming, pandas engine)
+    :return: a Report, ready to be written
+    :raises ReportError: if there are no sales for the brand/keyword, or if a file holds non-numeric data
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'granularity must be one of {list(GRANULARITIES)}, not {granularity!r}')
+
+    if periods and data.sales is None:
+        raise ReportError('Comparing periods needs every order line; please run it without streaming, with the pandas '
+                          'engine.')
+
+    if masks is None:
+        masks = report_masks(data, [brand_filter], index)[brand_filter]
+
+    # _____
+    # SALES;
+    # _____
+
+    with profile_stage('sales', brand_filter) as stage:
+        try:
+            if sales_aggregates is None:
+                sales_aggregates = aggregate_sales(data.sales.loc[masks['sales']].reset_index(drop=True))
+
+            if sales_aggregates.rows == 0:  # if the brand/keyword does not exist
+                raise KeyError(brand_filter)
+
+            stage['rows'] = sales_aggregates.rows
+
+            sales = sales_aggregates.order_lines  # the returns are priced off of these
+            sales_piv_w_dates = sales_aggregates.by_day
+            sales_piv_no_dates = sales_aggregates.by_sku
+
+            total_sales_rev = round(sales_aggregates.total_revenue, 2)
+            total_sales_qty = sales_aggregates.total_quantity
+
+            start_date, end_date = sales_period(sales_piv_w_dates['purchase_date'])
+
+            # every day of the period, days without sales included (as 0), bucketed by `granularity`, with the moving
+            # average taken over the filled series
+            date_range = pd.date_range(
+                start=start_date
+                , end=end_date
+                , freq='D'
+            )
+
+            sales_piv_w_dates = revenue_time_series(sales_piv_w_dates, date_range, granularity)
+
+            sales_grandtotals = pd.DataFrame({
+                'sku': ['Grand Totals']
+                , 'quantity': [total_sales_qty]
+                , 'item-price': [total_sales_rev]
+            })
+
+            sales_piv_no_dates = pd.concat(
+                [sales_piv_no_dates, sales_grandtotals]
+            ) \
+                .sort_values(['item-price', 'quantity', 'product-name'], ascending=[0, 0, 1], na_position='first') \
+                .reset_index(drop=True)
+
+            # cleaning the column names and reordering for aesthetic appearance
+            sales_piv_no_dates = sales_piv_no_dates[
+                ['sku', 'product-name', 'item-price', 'quantity']
+            ] \
+                .rename({'item-price': 'gross revenue'}, axis=1)
+
+        except (KeyError, AttributeError):  # if the brand/keyword does not exist
+            raise ReportError('There are no sales for this keyword/brand name in your .txt sales file(s)')
+
+        except (pd.errors.DataError, ValueError, TypeError):
+            raise ReportError('Please review your `sales` files. It appears you have some non-numeric data in them.')
+
+    # _____
+    # IN STOCK;
+    # _____
+
+    with profile_stage('in stock', brand_filter) as stage:
+        try:
+            instock = data.instock \
+                .loc[lambda x: (x['afn-fulfillable-quantity'] > 0) & masks['instock']] \
+                .reset_index(drop=True)
+
+            # now get the COGS into the in-stock table
+            instock = pd.merge(
+                instock,
+                data.cogs,
+                left_on='sku'
+                , right_on='SKU'
+                , how='left'
+            ) \
+                .reset_index()
+
+            # if the cost ends up absent, the average of the costs will be taken, so as to not exclude anything.
+            avg_vendor_cost = instock['VENDOR COST'].mean(skipna=True)
+
+            instock['VENDOR COST'] = instock['VENDOR COST'].fillna(avg_vendor_cost)
+
+            instock['total cost'] = instock['VENDOR COST'] * instock['afn-fulfillable-quantity']
+
+            instock = instock[['sku', 'product-name', 'total cost', 'afn-fulfillable-quantity']]
+
+            # ----- now in stock totals
+
+            remaining_in_stock_qty = instock['afn-fulfillable-quantity'].sum()
+            remaining_in_stock_value = instock['total cost'].sum()
+
+            instock_grandtotals = pd.DataFrame({
+                'sku': ['Grand Totals']
+                , 'total cost': [remaining_in_stock_value]
+                , 'afn-fulfillable-quantity': [remaining_in_stock_qty]
+            })
+
+            instock = pd.concat(
+                [instock, instock_grandtotals]
+                , ignore_index=True
+            ) \
+                .sort_values(
+                ['total cost', 'afn-fulfillable-quantity', 'product-name'], ascending=[0, 0, 1], na_position='first'
+            ) \
+                .reset_index(drop=True)
+
+            instock = instock.rename({'afn-fulfillable-quantity': 'quantity'}, axis=1)
+            stage['rows'] = len(instock) - 1  # not counting the grand totals
+
+        except (pd.errors.DataError, ValueError, TypeError):
+            raise ReportError('Please review your `in stock` file. It appears you have some non-numeric data in them.')
+
+    # _____
+    # RETURNS;
+    # _____
+
+    with profile_stage('returns', brand_filter) as stage:
+        try:
+            returns = data.returns \
+                .loc[masks['returns']] \
+                .reset_index(drop=True)
+
+            stage['rows'] = len(returns)
+
+            # the returns of a --start/--end window are limited to it by return date as they're read (see
+            # Time_Series.DateWindow), not by the first/last day with sales; a window with a single day of sales
+            # still keeps all of its returns
+
+            # obtaining $ value of returns by order-id/sku from sales. the ones that can't be found are priced at the
+            # average of whatever was found
+            if order_prices is None:
+                order_prices = OrderLinePrices(sales, returns['order-id'])
+
+            returns, returns_priced_at_average = price_returns(returns, order_prices)
+
+            total_return_value = (returns['item-price'] * returns['quantity']).sum()
+            total_returns_qty = returns['quantity'].sum()
+
+            returns_by_reason = pd.pivot_table(
+                returns
+                , index='reason'
+                , values='quantity'
+                , aggfunc='sum'
+                , observed=True
+            ) \
+                .reset_index() \
+                .assign(
+                pct_of_all_returns=lambda x: x['quantity'] / x['quantity'].sum()
+            ) \
+                .sort_values('pct_of_all_returns', ascending=False, na_position='first')
+
+            returns_by_reason_totals = pd.DataFrame(
+                {
+                    'quantity': [returns_by_reason['quantity'].sum()]
+                    , 'pct_of_all_returns': [returns_by_reason['pct_of_all_returns'].sum()]
+                }
+            )
+
+            returns_by_reason = pd.concat([returns_by_reason, returns_by_reason_totals], ignore_index=True) \
+                .sort_values(['reason', 'pct_of_all_returns'], ascending=[1, 0], na_position='first') \
+                .rename({'reason': 'reason for return', 'pct_of_all_returns': 'percent of all returns'}, axis=1) \
+                .reset_index(drop=True)
+
+            # ---- now just regular returns
+
+            returns = pd.pivot_table(
+                returns
+                , index=['sku', 'product-name']
+                , values=['quantity', 'item-price']
+                , aggfunc='sum'
+                , observed=True
+            ) \
+                .reset_index()
+
+            returns_grandtotals = pd.DataFrame({
+                'sku': ['Grand Totals']
+                , 'quantity': [total_returns_qty]
+                , 'item-price': [total_return_value]
+            })
+
+            returns = pd.concat(
+                [returns, returns_grandtotals]
+                , ignore_index=True
+            ) \
+                .sort_values(['quantity', 'product-name'], ascending=[0, 1], na_position='first') \
+                .reset_index(drop=True) \
+                .rename({'item-price': 'returned revenue'}, axis=1)
+            # if you don't drop=true then the extra index col will appear
+
+            returns = returns[['sku', 'product-name', 'returned revenue', 'quantity']]
+
+        except KeyError:  # if there are no returns for this keyword
+            total_returns_qty = 0
+            total_return_value = 0
+            returns_priced_at_average = 0
+
+            returns = pd.DataFrame({
+                'sku': ['Grand Totals']
+                , 'product-name': ['']
+                , 'returned revenue': [total_return_value]
+                , 'quantity': [total_returns_qty]
+            })
+
+            returns_by_reason = pd.DataFrame({
+                'reason for return': ['No returns for this brand/timeframe.']
+                , 'quantity': [0]
+                , 'percent of all returns': [0]
+
+            })
+
+        except (pd.errors.DataError, ValueError, TypeError):  # non numeric values in the numeric columns
+            raise ReportError('Please review your `returns` file(s). It appears you have some non-numeric data in '
+                              'them.')
+
+    # _____
+    # PERIOD COMPARISON;
+    # _____
+
+    comparison = None
+
+    if periods:
+        with profile_stage('comparison', brand_filter):
+            try:
+                comparison = compare_periods(
+                    data.sales.loc[masks['sales']]
+                    , data.returns.loc[masks['returns']]
+                    , periods
+                    , order_prices
+                )
+
+            except (pd.errors.DataError, TypeError):
+                raise ReportError('Please review your `sales` and `returns` files. It appears you have some '
+                                  'non-numeric data in them.')
+
+    return Report(
+        brand_filter=brand_filter
+        , instock=instock
+        , sales_piv_no_dates=sales_piv_no_dates
+        , returns=returns
+        , returns_by_reason=returns_by_reason
+        , sales_piv_w_dates=sales_piv_w_dates
+        , start_date=start_date
+        , end_date=end_date
+        , date_range=date_range
+        , total_sales_rev=total_sales_rev
+        , total_sales_qty=total_sales_qty
+        , total_return_value=total_return_value
+        , total_returns_qty=total_returns_qty
+        , remaining_in_stock_qty=remaining_in_stock_qty
+        , remaining_in_stock_value=remaining_in_stock_value
+        , granularity=granularity
+        , returns_priced_at_average=returns_priced_at_average
+        , comparison=comparison
+    )
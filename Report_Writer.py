@@ -0,0 +1,383 @@
+import math
+import os
+from io import BytesIO
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+import pandas as pd
+
+from Report_Wrangler import Report
+from Stage_Profiler import profile_stage
+from Time_Series import GRANULARITIES
+
+CHART_IMAGE_FORMATS = ('png', 'jpeg')  # the formats both matplotlib and excel can handle
+
+
+class ChartOptions(NamedTuple):
+    """How the cover page chart is rendered.
+
+    native:       (bool) build a native excel chart, backed by a hidden 'chart data' sheet, with the quick stats in
+                  cells, instead of a matplotlib image. much faster to write, and the client can inspect it
+    image_format: (str) 'png' or 'jpeg'. matplotlib image only
+    dpi:          (int) resolution of the image. None keeps matplotlib's default (100). matplotlib image only
+    """
+    native: bool = False
+    image_format: str = 'png'
+    dpi: Optional[int] = None
+
+
+def _quick_stats(report: Report) -> List[Tuple[str, Union[int, float, str, None], str]]:
+    """:return: the quick stats shown next to the cover page chart, as (label, value, excel number format) rows"""
+    net_revenue = report.total_sales_rev - report.total_return_value
+    net_units = report.total_sales_qty - report.total_returns_qty
+    days = len(report.date_range)
+
+    return [
+        ('Net Revenue', net_revenue, '$#,##0.00')
+        , ('Net Units Sold', net_units, '#,##0')
+        , ('Avg Daily Revenue', round(net_revenue / days, 2), '$#,##0.00')
+        , ('Avg Daily Units Sold', f'{math.floor(net_units / days)}-{math.ceil(net_units / days)}', '')
+        , ('Overall Return Rate', report.total_returns_qty / net_units if net_units else None, '0.00%')
+    ]
+
+
+def write_report(report: Report, output_dir: str, chart: ChartOptions = ChartOptions()) -> str:
+    """Writes a brand/keyword's report to an excel workbook, with a time-series chart on the cover page.
+
+    The chart is rendered in memory and embedded straight into the workbook; nothing but the workbook is written to
+    `output_dir`, so several reports can be written at once, to the same folder.
+
+    :param report: (Report) the wrangled tables, from `build_report`
+    :param output_dir: (str) the folder to save the workbook in. note; no backslashes.
+    :param chart: (ChartOptions) the format and resolution of the chart image
+    :return: (str) the path of the saved workbook
+
+    Example:
+        report = build_report(data, 'acme')
+
+        write_report(report, my_folder)
+        write_report(report, my_folder, ChartOptions(image_format='jpeg', dpi=72))
+    """
+    if chart.image_format not in CHART_IMAGE_FORMATS:
+        raise ValueError(f'chart image_format must be one of {CHART_IMAGE_FORMATS}, not {chart.image_format!r}')
+
+    brand_filter = report.brand_filter
+    spec = GRANULARITIES[report.granularity]  # the buckets of the time series; daily, weekly or monthly
+    instock = report.instock
+    sales_piv_no_dates = report.sales_piv_no_dates
+    returns = report.returns
+    returns_by_reason = report.returns_by_reason
+    sales_piv_w_dates = report.sales_piv_w_dates
+    start_date = report.start_date
+    end_date = report.end_date
+    date_range = report.date_range
+    total_sales_rev = report.total_sales_rev
+    total_sales_qty = report.total_sales_qty
+    total_return_value = report.total_return_value
+    total_returns_qty = report.total_returns_qty
+
+    # TODO
+    # add date logic here. if sales period only ~1 day then the title should just be for today
+    report_name = [f"{brand_filter.title()} Sales {start_date.strftime('%m-%d-%Y')} through {end_date.strftime('%m-%d-%Y')}"
+                   if len(brand_filter.title()) > 1 else
+                   f"Sales {start_date.strftime('%m-%d-%Y')} through {end_date.strftime('%m-%d-%Y')}"][0]
+
+    output_path = f"{output_dir}/{report_name}.xlsx"
+
+    # the excel formatting and chart libraries are slow to import, so they're only loaded once a workbook is actually
+    # being written (not for --help, missing files, or a brand with no sales). see benchmarks/startup_importtime.py
+    from openpyxl.drawing.image import Image
+
+    from AutoFit_ColumnWidth import fit_and_center
+    from DataBars_Creator import data_bar_bounds, data_bars
+    from Excel_Chart_Creator import stats_cells, time_series_chart
+    from Excel_Table_Creator import excel_table_creator
+    from Style_Formatters import (
+        bold
+        , currency_formatter
+        , freeze_first_row
+        , highlighter
+        , percent_formatter
+        , remove_gridlines
+        , thousands_sep_formatter
+    )
+
+    # the frames are written, styled and charted in memory, and the workbook is only serialized once, when the writer
+    # closes. (no write -> reload -> save round trip). it's serialized into a buffer, and only lands in the output
+    # folder once it's complete; see below
+    workbook_bytes = BytesIO()
+    writer = pd.ExcelWriter(workbook_bytes, engine='openpyxl')
+
+    try:
+        with profile_stage('write', brand_filter) as stage:
+            # blank sheet that will house our time series chart
+            pd.DataFrame().to_excel(writer, sheet_name="cover page", index=False)
+            instock.to_excel(writer, sheet_name="in stock", index=False)
+            sales_piv_no_dates.to_excel(writer, sheet_name="gross sales", index=False)
+            returns.to_excel(writer, sheet_name="returns", index=False)
+            returns_by_reason.to_excel(writer, sheet_name="returns by reason", index=False)
+            # for testing purposes only
+            # sales_piv_w_dates.to_excel(writer, sheet_name="pivot table by day", index=False)
+
+            if report.comparison is not None:
+                report.comparison.totals.to_excel(writer, sheet_name="period totals", index=False)
+                report.comparison.changes.to_excel(writer, sheet_name="period changes", index=False)
+
+            stage['rows'] = sum(len(df) for df in [instock, sales_piv_no_dates, returns, returns_by_reason])
+
+        # ______________________________________________________________________________________________________________
+        # grab the openpyxl sheets to format
+        # ______________________________________________________________________________________________________________
+
+        wb = writer.book
+        ws_returns = wb['returns']
+        ws_instock = wb['in stock']
+        ws_sales = wb['gross sales']
+        ws_cover_page = wb['cover page']
+        ws_returns_by_reason = wb['returns by reason']
+
+        # ______________________________________________________________________________________________________________
+        # Create a time-series chart for the cover page, with some quick stats
+        # ______________________________________________________________________________________________________________
+
+        with profile_stage('chart', brand_filter):
+            if chart.native:
+                # a native excel chart, fed from a hidden sheet, with the quick stats in cells underneath. no matplotlib
+                sales_piv_w_dates[['Date', 'item-price', spec.moving_average]] \
+                    .to_excel(writer, sheet_name="chart data", index=False)
+                ws_chart_data = wb['chart data']
+                ws_chart_data.sheet_state = 'hidden'
+
+                time_series_chart(
+                    ws_cover_page
+                    , ws_chart_data
+                    , f'{brand_filter.title()} Sales\n'
+                      f'{start_date.strftime("%B %d, %Y")} - {end_date.strftime("%B %d, %Y")}'
+                    , y_title=f'{spec.label} Revenue'
+                    , tick_every=spec.tick_every
+                )
+
+                stats_cells(ws_cover_page, _quick_stats(report), 'B40')
+
+            else:
+                import matplotlib.pyplot as plt
+                import seaborn as sns
+
+                fig, ax = plt.subplots(figsize=(17, 7))
+
+                # the moving average is missing its first `window` - 1 buckets, so for a report shorter than that (a
+                # one day window, say) only the daily revenue is drawn
+                # and if every unit sold came back, there are no net units to take a return rate of
+                net_units = total_sales_qty - total_returns_qty
+                return_rate = f'{round(total_returns_qty / net_units * 100, 2)}%' if net_units else 'n/a'
+
+                sns.lineplot(
+                    data=sales_piv_w_dates
+                    , x='Date'
+                    , y=spec.moving_average
+                    , color='red'
+                    , linestyle='solid'
+                )
+
+                plt.stackplot(
+                    sales_piv_w_dates['Date']
+                    , sales_piv_w_dates['item-price']
+                )
+
+                plt.grid(
+                    True
+                    , color="grey"
+                    , linewidth=".1"
+                    , linestyle="-."
+                )
+
+                sns.despine()
+
+                ax.set_xticks(sales_piv_w_dates['Date'][::spec.tick_every])
+
+                plt.xticks(rotation=20, fontsize=12)
+
+                plt.yticks(fontsize=13)
+
+                plt.suptitle(
+                    f'{brand_filter.title()} Sales'
+                    , fontsize=23
+                )
+
+                plt.title(
+                    f'{start_date.strftime("%B %d, %Y")} - {end_date.strftime("%B %d, %Y")}'
+                    , fontsize=18
+                )
+
+                plt.text(
+                    .95
+                    , .5
+                    , f'____\n\n'
+                      f'Net Revenue: ${"{:,.2f}".format(total_sales_rev-total_return_value)}\n\n'
+                      f'Net Units Sold: {"{:,}".format(total_sales_qty-total_returns_qty)}\n'
+                      f'____\n\n'
+                      f'Avg Daily Revenue: ${"{:,.2f}".format(round((total_sales_rev-total_return_value)/len(date_range),2))} \n\n'
+                      f'Avg Daily Units Sold: {math.floor((total_sales_qty-total_returns_qty)/len(date_range))}-{math.ceil((total_sales_qty-total_returns_qty)/len(date_range))}\n'
+                      f'____\n\n'
+                      f'Overall Return Rate: {return_rate}\n'
+                      f'____\n'
+                    , transform=plt.gca().transAxes
+                    , verticalalignment='bottom'
+                    , horizontalalignment='center'
+                    , bbox=dict(
+                        boxstyle='square'
+                        , facecolor='white'
+                        , alpha=0.5
+                    ), fontsize=12,
+                )
+
+                ax.set_ylabel(f'{spec.label} Revenue', fontsize=13)
+
+                ax.set_xlabel('')
+
+                ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, pos: f"${x:,.0f}"))
+
+                # plt.show()  # for testing purposes
+
+                # rendered straight into memory (no png in the data folder, no file name clashes between brands), and
+                # the figure is closed right away, so that reports written in the same process don't pile figures up
+                chart_image = BytesIO()
+
+                try:
+                    fig.savefig(chart_image, format=chart.image_format, dpi=chart.dpi or 'figure')
+
+                finally:
+                    plt.close(fig)
+
+        # ____________________________________________________________________________________________________________
+        # Visually format the workbook using openpyxl library functions
+        # ____________________________________________________________________________________________________________
+
+        with profile_stage('format', brand_filter):
+            # todo
+            # should probably add this into the wrangling bricks, and the ws/wb import to the top of the sheet, so it
+            # can be more streamlined.
+
+            # if there are no returns, then we don't need to break down the customers reason for each return
+            if total_returns_qty == 0:
+                ws_returns_by_reason.sheet_state = 'hidden'
+
+            to_make_bold = [
+                (ws_instock, *['A2', 'C2', 'D2'])
+                , (ws_sales, *['A2', 'C2', 'D2'])
+                , (ws_returns, *['A2', 'C2','D2'])
+                , (ws_returns_by_reason, *['A2', 'B2'])
+            ]
+
+            to_highlight = [
+                (ws_instock, 'FFFF00', *['C2', 'D2'])
+                , (ws_sales, 'FFFF00', *['C2', 'D2'])
+                , (ws_returns, 'FFFF00', *['C2', 'D2'])
+                , (ws_returns_by_reason, 'FFFF00', 'B2')
+            ]
+
+            inputs_for_databars = [
+                (ws_returns, returns, 3, '5e9bdd')
+                , (ws_returns_by_reason, returns_by_reason, 2, '5e9bdd')
+                , (ws_returns, returns, 4, '5e9bdd')
+                , (ws_instock, instock, 3, '5e9bdd')
+                , (ws_instock, instock, 4, '5e9bdd')
+                , (ws_sales, sales_piv_no_dates, 3, '5e9bdd')
+                , (ws_sales, sales_piv_no_dates, 4, '5e9bdd')
+            ]
+
+            # widths come straight from the frames, rather than from reading every cell back
+            [fit_and_center(ws, df) for ws, df in
+             zip([ws_returns, ws_instock, ws_sales, ws_returns_by_reason],
+                 [returns, instock, sales_piv_no_dates, returns_by_reason])]
+
+            [excel_table_creator(ws, table_name) for ws, table_name in
+             zip([ws_returns, ws_instock, ws_sales, ws_returns_by_reason],
+                 ['Returns', 'InStock', 'Sales', 'SalesByReason'])]
+
+            # each column is judged on its own; one with fewer than two numbers (ex: nothing left in stock, no returns)
+            # just gets no bars, instead of disabling the bars of every sheet. bounds come from the frames, not the
+            # cells
+            for worksheet, df, column_number, color_hex in inputs_for_databars:
+                bounds = data_bar_bounds(df.iloc[:, column_number - 1])
+
+                if bounds is not None:
+                    data_bars(worksheet, column_number, color_hex, bounds=bounds, last_row=len(df) + 1)
+
+            [bold(worksheet, *cells) for worksheet, *cells in to_make_bold]
+
+            [highlighter(worksheet, color_hex, *cells) for worksheet, color_hex, *cells in to_highlight]
+
+            [thousands_sep_formatter(ws, cell) for ws, cell in
+             zip([ws_instock, ws_returns, ws_sales], ['D2', 'D2', 'D2'])]
+
+            # whole columns are formatted in one call each, rather than cell by cell
+            for ws in [ws_instock, ws_sales, ws_returns, ws_returns_by_reason]:
+                col = 'B' if ws == ws_returns_by_reason else 'D'
+                thousands_sep_formatter(ws, f'{col}1:{col}{ws.max_row}')
+
+            [currency_formatter(ws, cell) for ws, cell in zip([ws_instock, ws_returns, ws_sales], ['C2', 'C2', 'C2'])]
+
+            for ws in [ws_instock, ws_sales, ws_returns]:
+                currency_formatter(ws, f'C1:C{ws.max_row}')
+
+            percent_formatter(ws_returns_by_reason, f'C1:C{ws_returns_by_reason.max_row}')
+
+            [freeze_first_row(worksheet, 3) for worksheet in [ws_instock, ws_sales, ws_returns, ws_returns_by_reason]]
+
+            remove_gridlines(ws_cover_page)
+
+            # period over period comparison, if asked for. every period's block of rows is led by its grand totals
+            if report.comparison is not None:
+                ws_period_totals = wb['period totals']
+                ws_period_changes = wb['period changes']
+
+                for ws, df, table_name in [(ws_period_totals, report.comparison.totals, 'PeriodTotals')
+                                           , (ws_period_changes, report.comparison.changes, 'PeriodChanges')]:
+                    fit_and_center(ws, df)
+                    excel_table_creator(ws, table_name)
+                    bold(ws, *[f'B{row}' for row in (df.index[df['sku'] == 'Grand Totals'] + 2)])
+                    freeze_first_row(ws, 2)
+
+                last_row = ws_period_totals.max_row
+                currency_formatter(ws_period_totals, f'D1:D{last_row}', f'G1:G{last_row}')
+                thousands_sep_formatter(ws_period_totals, f'E1:E{last_row}', f'F1:F{last_row}')
+                percent_formatter(ws_period_totals, f'H1:H{last_row}')
+
+                last_row = ws_period_changes.max_row
+                currency_formatter(ws_period_changes, f'D1:D{last_row}')
+                thousands_sep_formatter(ws_period_changes, f'F1:F{last_row}', f'G1:G{last_row}')
+                percent_formatter(ws_period_changes, f'E1:E{last_row}', f'H1:H{last_row}')
+
+        # ____________________________________________________________________________________________________________
+        # Add mpl chart to the cover page
+        # ____________________________________________________________________________________________________________
+
+        if not chart.native:
+            img = Image(chart_image)
+
+            ws_cover_page.add_image(img, 'B3')
+
+    except BaseException:
+        # a workbook that failed halfway is dropped, never saved; a later run would take it for a finished report
+        workbook_bytes.close()
+        raise
+
+    with profile_stage('save', brand_filter):
+        writer.close()
+
+        # written next to the report, then renamed over it in one step, so a crash mid-write leaves no partial .xlsx
+        partial_path = f'{output_path}.partial'
+
+        try:
+            with open(partial_path, 'wb') as f:
+                f.write(workbook_bytes.getbuffer())
+
+            os.replace(partial_path, output_path)
+
+        except OSError:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+            raise
+
+    return output_path
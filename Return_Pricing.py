@@ -0,0 +1,82 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class PricedReturns(NamedTuple):
+    """The returns, with the $ value of each return line.
+
+    returns:          (dF) the returns, with an item-price column. one row per return line; never fanned out
+    priced_at_average: the number of return lines without a matching order line, priced at the average instead
+    """
+    returns: pd.DataFrame
+    priced_at_average: int
+
+
+class OrderLinePrices:
+    """A hashed index of the sales order lines, keyed on (order-id, sku), that the returns are priced off of.
+
+    An order can hold several lines of the same sku (ex: the same item bought twice, or a line re-exported in two
+    overlapping files with a different price). Joining the returns straight onto the order lines then repeats the
+    return once per line, and inflates its quantity and $ value. Here every (order-id, sku) pair is kept once, at the
+    average price of its lines, so each return line picks up exactly one price.
+
+    The index is built once per dataset - only out of the orders that were returned - and looked up for every
+    brand/keyword.
+
+    Example:
+        prices = OrderLinePrices(sales, returns['order-id'])
+
+        priced = price_returns(acme_returns, prices)
+    """
+
+    def __init__(self, order_lines: pd.DataFrame, returned_order_ids: Optional[pd.Series] = None):
+        """
+        :param order_lines: (dF) amazon-order-id | sku | item-price, ex: ReportData.sales
+        :param returned_order_ids: (Series) optional order ids of the returns; the other orders are left out of the
+                                   index
+        """
+        if returned_order_ids is not None:
+            order_lines = order_lines.loc[order_lines['amazon-order-id'].isin(returned_order_ids.unique())]
+
+        prices = order_lines \
+            .groupby(['amazon-order-id', 'sku'], observed=True, sort=False)['item-price'] \
+            .mean()
+
+        self.keys = prices.index
+        self.prices = prices.to_numpy(dtype='float64')
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def lookup(self, order_ids: pd.Series, skus: pd.Series) -> np.ndarray:
+        """:return: (array) the price of every (order-id, sku) pair; NaN where there is no such order line"""
+        positions = self.keys.get_indexer(pd.MultiIndex.from_arrays([order_ids, skus]))
+
+        # -1 (not found) lands on the NaN appended to the end
+        return np.append(self.prices, np.nan)[positions]
+
+
+def price_returns(returns: pd.DataFrame, prices: OrderLinePrices) -> PricedReturns:
+    """Prices every return line off of the order line it was returned from.
+
+    Some order lines will inevitably be missing (ex: the sale happened before the first downloaded sales report);
+    those returns are priced at the average of whatever was found.
+
+    :param returns: (dF) the returns, with order-id and sku columns
+    :param prices: (OrderLinePrices) the indexed order lines
+    :return: a PricedReturns
+
+    Example:
+        priced = price_returns(returns, OrderLinePrices(sales))
+
+        total_return_value = (priced.returns['item-price'] * priced.returns['quantity']).sum()
+    """
+    item_prices = pd.Series(prices.lookup(returns['order-id'], returns['sku']), index=returns.index)
+    missing = item_prices.isna()
+
+    return PricedReturns(
+        returns=returns.assign(**{'item-price': item_prices.fillna(item_prices.mean())})
+        , priced_at_average=int(missing.sum())
+    )
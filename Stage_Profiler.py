@@ -0,0 +1,171 @@
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+try:
+    import resource  # unix only; peak RSS is left blank elsewhere
+
+except ImportError:
+    resource = None
+
+PROFILE_FIELDS = ['run', 'brand', 'stage', 'wall_s', 'cpu_s', 'peak_traced_mb', 'max_rss_mb', 'rows']
+
+
+def _max_rss_mb() -> Optional[float]:
+    """:return: the peak resident memory of this process so far, in MB. None where it can't be read"""
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # linux reports kilobytes, mac bytes
+    return round(max_rss / (1024 ** 2 if sys.platform == 'darwin' else 1024), 1)
+
+
+class StageProfiler:
+    """Records the wall time, cpu time, memory and row counts of the named stages of a report run.
+
+    Stages are recorded through `profile_stage`, which does nothing until the profiler is started - so the pipeline is
+    instrumented once, and only pays for it when a run asks to be profiled (ex: --profile on the command line).
+
+    wall_s / cpu_s:  seconds spent in the stage. cpu time is this process' only; files parsed by worker processes
+                     show up as wall time
+    peak_traced_mb:  the most memory python allocated at once during the stage (tracemalloc). only with trace_memory,
+                     which slows everything down noticeably, so compare timings of runs made the same way
+    max_rss_mb:      the peak resident memory of the process so far, at the end of the stage (a high-water mark)
+    rows:            the rows the stage produced, where it makes sense
+
+    Example:
+        PROFILER.start()
+        run_batch(my_folder, ['acme'])
+        PROFILER.write('run_log.csv')
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.run = ''
+        self.records: List[Dict[str, Union[str, float, int, None]]] = []
+        self._peaks: List[int] = []  # the traced peak of every open stage, for stages nested in one another
+
+    def start(self, trace_memory: bool = False) -> None:
+        """Starts recording stages.
+
+        :param trace_memory: (bool) also record each stage's peak traced allocations
+        """
+        self.enabled = True
+        self.trace_memory = trace_memory
+        self.run = datetime.now().isoformat(timespec='seconds')
+        self.records = []
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self) -> None:
+        """Stops recording stages. the records are kept, to be written"""
+        self.enabled = False
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str, brand: str = '', rows: Optional[int] = None) -> Iterator[Dict]:
+        """Records one stage. yields the stage's record, so that its row count can be filled in once it's known.
+
+        :param name: (str) the stage, ex: 'sales'
+        :param brand: (str) the brand/keyword the stage ran for. '' for stages shared by every brand
+        :param rows: (int) the row count, if already known
+        """
+        record = {'run': self.run, 'brand': brand, 'stage': name, 'rows': rows}
+
+        if not self.enabled:
+            yield record
+            return
+
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+
+        if tracing:
+            # the peak is reset for this stage; the enclosing stage's peak so far is kept aside, and restored after
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        try:
+            yield record
+
+        finally:
+            record['wall_s'] = round(time.perf_counter() - wall_start, 4)
+            record['cpu_s'] = round(time.process_time() - cpu_start, 4)
+            record['peak_traced_mb'] = None
+            record['max_rss_mb'] = _max_rss_mb()
+
+            if tracing:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                record['peak_traced_mb'] = round(peak / 1024 ** 2, 1)
+
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+
+            self.records.append(record)
+
+    def write(self, path: Union[str, Path]) -> None:
+        """Appends the records of this run to a run log; a .csv file, or json lines (one record per line) otherwise.
+
+        :param path: (str) the run log, ex: 'run_log.csv'. created if it doesn't exist yet
+        """
+        path = str(path)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            if path.lower().endswith('.csv'):
+                writer = csv.DictWriter(f, fieldnames=PROFILE_FIELDS)
+
+                if new_file:
+                    writer.writeheader()
+
+                writer.writerows({field: record.get(field) for field in PROFILE_FIELDS} for record in self.records)
+
+            else:
+                for record in self.records:
+                    f.write(json.dumps({field: record.get(field) for field in PROFILE_FIELDS}) + '\n')
+
+    def summary(self) -> str:
+        """:return: (str) the recorded stages, one per line"""
+        lines = [f'{"stage":<12} {"brand":<20} {"wall s":>9} {"cpu s":>9} {"peak MB":>9} {"rows":>10}']
+
+        for record in self.records:
+            peak = record.get('peak_traced_mb')
+            rows = record.get('rows')
+
+            lines.append(
+                f'{record["stage"]:<12} {record["brand"][:20]:<20} {record["wall_s"]:>9.3f} {record["cpu_s"]:>9.3f} '
+                f'{"" if peak is None else f"{peak:,.1f}":>9} {"" if rows is None else f"{rows:,}":>10}'
+            )
+
+        return '\n'.join(lines)
+
+
+PROFILER = StageProfiler()  # the one profiler of this process; see `profile_stage`
+
+
+def profile_stage(name: str, brand: str = '', rows: Optional[int] = None):
+    """Records a stage of the pipeline with the process' profiler. a no-op unless PROFILER was started.
+
+    Example:
+        with profile_stage('sales', brand_filter) as stage:
+            sales = ...
+            stage['rows'] = len(sales)
+    """
+    return PROFILER.stage(name, brand, rows)
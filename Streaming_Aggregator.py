@@ -0,0 +1,253 @@
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from File_Classifier import REPORT_SPECS
+from File_Readers import concat_df, txt_chunk_reader
+from Time_Series import DateWindow
+
+RETURN_KEY_SEP = '\x1f'  # joins order-id and sku into a single lookup key; never appears in either
+
+
+class SalesAggregates(NamedTuple):
+    """Everything the report needs out of the sales files, folded down to per-day and per-sku totals.
+
+    by_day:       (dF) purchase_date | item-price, one row per day with sales
+    by_sku:       (dF) sku | product-name | item-price | quantity, one row per sku/product name pair
+    order_lines:  (dF) amazon-order-id | sku | item-price, only for the orders that appear in the returns
+    total_revenue, total_quantity: grand totals of item-price and quantity
+    rows:         the number of de-duplicated order lines that matched the brand
+    """
+    by_day: pd.DataFrame
+    by_sku: pd.DataFrame
+    order_lines: pd.DataFrame
+    total_revenue: float
+    total_quantity: int
+    rows: int
+
+
+def return_keys(order_ids: pd.Series, skus: pd.Series) -> pd.Series:
+    """Builds the order-id/sku lookup keys used to keep the order lines that a return will need to be priced.
+
+    :param order_ids: (Series) the order ids, ex: returns['order-id']
+    :param skus: (Series) the matching skus
+    :return: (Series) one str key per row
+    """
+    return order_ids.astype(str) + RETURN_KEY_SEP + skus.astype(str)
+
+
+class _RowDeduplicator:
+    """Remembers a 64-bit hash of every order line already counted, so duplicate lines - within a chunk, across
+    chunks, or across overlapping exports - are only counted once.
+
+    The hashes are kept as a few sorted runs, largest first, of geometrically shrinking size (like a log-structured
+    merge tree); a chunk's new hashes become a run of their own, and a run is only merged into the one before it once
+    it's at least half its size. Every hash is then merged O(log n) times overall, instead of the whole array being
+    re-sorted for every chunk, and a chunk is looked up with a binary search per run (O(log n) runs).
+
+    Exact de-duplication across files has to remember every distinct order line, so memory does grow with the files;
+    by 8 bytes per distinct order line (~80MB for 10M lines), the only part of streaming that isn't bounded by a chunk.
+    """
+
+    def __init__(self):
+        self.runs = []  # sorted, disjoint arrays of hashes, largest first
+
+    @property
+    def seen(self) -> np.ndarray:
+        """(array) every hash seen so far, as one sorted array; ex: for Incremental_State to save"""
+        self._merge(everything=True)
+
+        return self.runs[0] if self.runs else np.empty(0, dtype=np.uint64)
+
+    @seen.setter
+    def seen(self, hashes: np.ndarray) -> None:
+        self.runs = [hashes] if len(hashes) else []
+
+    def _merge(self, everything: bool = False) -> None:
+        """Merges the last run into the one before it, for as long as it's at least half its size (or into one run)."""
+        while len(self.runs) > 1 and (everything or 2 * len(self.runs[-1]) >= len(self.runs[-2])):
+            last = self.runs.pop()
+            # the runs are disjoint, so this is a plain merge of two sorted runs (a radix/merge sort; linear)
+            self.runs[-1] = np.sort(np.concatenate([self.runs[-1], last]), kind='stable')
+
+    def new_rows(self, chunk: pd.DataFrame) -> np.ndarray:
+        """:return: a boolean mask of the rows in `chunk` that have not been seen before. marks them as seen."""
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+
+        # the chunk's hashes are sorted first; sorted needles make the binary searches walk each run in order
+        order = np.argsort(hashes, kind='stable')
+        hashes = hashes[order]
+
+        new = np.ones(len(hashes), dtype=bool)
+        new[1:] = hashes[1:] != hashes[:-1]  # first in chunk (the stable sort keeps the file order of equal hashes)
+
+        for run in self.runs:
+            position = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            new &= run[position] != hashes
+
+        if new.any():
+            self.runs.append(hashes[new])
+            self._merge()
+
+        mask = np.empty(len(hashes), dtype=bool)
+        mask[order] = new
+
+        return mask
+
+
+class SalesAggregator:
+    """Folds sales order lines, chunk by chunk, into running per-day and per-sku totals.
+
+    Applies the same cleaning as the in-memory report - dropna, brand/keyword filter, de-duplication of identical
+    order lines - but only ever holds one chunk of raw order lines at a time. Memory is bounded by the number of
+    distinct skus and days (plus 8 bytes per distinct order line for the de-duplication), not by the size of the files.
+
+    The running state is kept in plain attributes, so that it can be saved and picked back up later; see
+    Incremental_State.
+
+    Example:
+        aggregator = SalesAggregator('acme')
+
+        for file_path in sales_files:
+            aggregator.add_file(file_path)
+
+        aggregates = aggregator.result()
+    """
+
+    def __init__(
+            self
+            , brand_filter: str
+            , chunksize: int = 500_000
+            , keep_return_keys: Optional[pd.Series] = None
+            , keep_all_order_lines: bool = False
+            , window: Optional[DateWindow] = None
+    ):
+        """
+        :param brand_filter: (str) the brand/keyword to keep, matched against product-name like the in-memory report
+        :param chunksize: (int) the number of rows read per chunk
+        :param keep_return_keys: (Series) optional `return_keys` of the returns; matching order lines are kept so that
+                                 the returns can be priced
+        :param keep_all_order_lines: (bool) keep the order-id/sku/price of every order line instead, for returns that
+                                     have not arrived yet
+        :param window: (DateWindow) optional purchase dates to total. order lines outside of it are dropped as each
+                       chunk is read, except those of the returns (`keep_return_keys`), whatever their date
+        """
+        self.brand_filter = brand_filter
+        self.chunksize = chunksize
+        self.keep_keys = set(keep_return_keys) if keep_return_keys is not None else set()
+        self.keep_all_order_lines = keep_all_order_lines
+        self.window = window
+
+        self.deduplicator = _RowDeduplicator()
+        self.by_day = pd.Series(dtype='float64')
+        self.by_sku = pd.DataFrame({'sku': [], 'product-name': [], 'item-price': [], 'quantity': []})
+        self.order_lines = []
+        self.total_revenue = 0.0
+        self.total_quantity = 0
+        self.rows = 0
+
+    def add_file(self, file_path: Union[str, Path]) -> None:
+        """Reads a sales .txt file chunk by chunk, folding each chunk into the running totals."""
+        spec = REPORT_SPECS['sales']
+
+        for chunk in txt_chunk_reader(file_path, spec.columns, self.chunksize, spec.dtypes, spec.date_columns):
+            self.add_chunk(chunk)
+
+    def add_chunk(self, chunk: pd.DataFrame) -> None:
+        """Cleans one chunk of raw sales rows, as read by `txt_chunk_reader`, and folds it into the running totals."""
+        chunk = chunk \
+            .dropna() \
+            .rename({'purchase-date': 'purchase_date'}, axis=1) \
+            .loc[lambda x: (x['product-name'].str.contains(f"{self.brand_filter}", case=False))]
+
+        if self.window is not None:
+            # out-of-window lines are dropped before being de-duplicated; the returned ones are still needed for pricing
+            chunk = chunk.loc[self.window.mask(chunk['purchase_date']) | self._returned(chunk)]
+
+        chunk = chunk.loc[self.deduplicator.new_rows(chunk)]
+
+        if chunk.empty:
+            return
+
+        if self.keep_all_order_lines:
+            self.order_lines.append(chunk[['amazon-order-id', 'sku', 'item-price']])
+
+        elif self.keep_keys:
+            self.order_lines.append(chunk.loc[self._returned(chunk), ['amazon-order-id', 'sku', 'item-price']])
+
+        if self.window is not None:
+            chunk = chunk.loc[self.window.mask(chunk['purchase_date'])]
+
+            if chunk.empty:
+                return
+
+        self.rows += len(chunk)
+        self.total_revenue += chunk['item-price'].sum()
+        self.total_quantity += int(chunk['quantity'].sum())
+
+        self.by_day = self.by_day.add(chunk.groupby('purchase_date')['item-price'].sum(), fill_value=0)
+
+        chunk_by_sku = chunk \
+            .groupby(['sku', 'product-name'], observed=True)[['item-price', 'quantity']] \
+            .sum() \
+            .reset_index()
+
+        self.by_sku = chunk_by_sku if self.by_sku.empty else concat_df([self.by_sku, chunk_by_sku]) \
+            .groupby(['sku', 'product-name'], observed=True)[['item-price', 'quantity']] \
+            .sum() \
+            .reset_index()
+
+    def _returned(self, chunk: pd.DataFrame) -> np.ndarray:
+        """:return: (array) True for the order lines of `chunk` that match the returns' keys"""
+        if not self.keep_keys:
+            return np.zeros(len(chunk), dtype=bool)
+
+        return return_keys(chunk['amazon-order-id'], chunk['sku']).isin(self.keep_keys).to_numpy()
+
+    def result(self) -> SalesAggregates:
+        """:return: the running totals, as a SalesAggregates"""
+        self.order_lines = [concat_df(self.order_lines)] if self.order_lines else []
+
+        return SalesAggregates(
+            by_day=self.by_day.rename_axis('purchase_date').rename('item-price').reset_index()
+            , by_sku=self.by_sku
+            , order_lines=self.order_lines[0] if self.order_lines else
+            pd.DataFrame({'amazon-order-id': [], 'sku': [], 'item-price': []})
+            , total_revenue=self.total_revenue
+            , total_quantity=self.total_quantity
+            , rows=self.rows
+        )
+
+
+def stream_sales_aggregates(
+        file_paths: Iterable[Union[str, Path]]
+        , brand_filter: str
+        , chunksize: int = 500_000
+        , keep_return_keys: Optional[pd.Series] = None
+        , window: Optional[DateWindow] = None
+) -> SalesAggregates:
+    """Folds the sales .txt files, chunk by chunk, into running per-day and per-sku totals. See SalesAggregator.
+
+    Totals are summed chunk by chunk, so they can differ from the in-memory report in the last floating point digits.
+
+    :param file_paths: (list) the sales .txt files
+    :param brand_filter: (str) the brand/keyword to keep, matched against product-name like the in-memory report
+    :param chunksize: (int) the number of rows read per chunk
+    :param keep_return_keys: (Series) optional `return_keys` of the returns; matching order lines are kept so that the
+                             returns can be priced. if None, no order lines are kept
+    :param window: (DateWindow) optional purchase dates to total; the other order lines are dropped chunk by chunk
+    :return: a SalesAggregates
+
+    Example:
+        aggregates = stream_sales_aggregates(sales_files, 'acme', chunksize=250_000)
+
+        daily_revenue = aggregates.by_day
+    """
+    aggregator = SalesAggregator(brand_filter, chunksize, keep_return_keys, window=window)
+
+    for file_path in file_paths:
+        aggregator.add_file(file_path)
+
+    return aggregator.result()
@@ -1,13 +1,35 @@
 import openpyxl as xl
+from openpyxl.cell.cell import Cell
+from openpyxl.utils.cell import range_boundaries
 from openpyxl.worksheet.worksheet import Worksheet
-from typing import List, Union
+from typing import Iterator, List, Union
+
+
+def _cells(worksheet: Worksheet, *cells: Union[str, List[str]]) -> Iterator[Cell]:
+    """Yields every cell of each cell, range, column or row given; ex: 'A2', 'C1:C500', 'C', 'C:D', ['A2', 'B2']
+
+    Whole columns run from row 1 down to the last row of the sheet."""
+    for cell_range in cells:
+        if isinstance(cell_range, (list, tuple)):
+            yield from _cells(worksheet, *cell_range)
+            continue
+
+        min_col, min_row, max_col, max_row = range_boundaries(cell_range)
+
+        for row in worksheet.iter_rows(
+                min_row=min_row or 1
+                , max_row=max_row or worksheet.max_row
+                , min_col=min_col or 1
+                , max_col=max_col or worksheet.max_column
+        ):
+            yield from row
 
 
 def highlighter(worksheet: Worksheet, color_hex: str, *cells: Union[str, List[str]]) -> None:
     """ Highlights excel cell(s) using openpyxl
 
     :param worksheet: (var: openpyxl.worksheet.worksheet) Your worksheet, as designated by openpyxl library
-    :param cells: (str) The cell(s) you wish to highlight
+    :param cells: (str) The cell(s), range(s) or column(s) you wish to highlight, ex: 'A2', 'A2:D2', 'C'
     :param color_hex: (str) The 6 digit hex code of the color you wish to use to highlight
 
     Note:
@@ -18,82 +40,105 @@ def highlighter(worksheet: Worksheet, color_hex: str, *cells: Union[str, List[st
         worksheet = workbook['excel_file']
 
         highlighter(worksheet,'088F8F', *['A2', 'B2', 'C2'])
-        highlighter(worksheet,'088F8F', D2)
+        highlighter(worksheet,'088F8F', 'A2:D2')
 
     """
 
     marker = xl.styles.PatternFill(start_color=color_hex, end_color=color_hex, fill_type="solid")
 
-    for cell in cells:
-        worksheet[cell].fill = marker
+    for cell in _cells(worksheet, *cells):
+        cell.fill = marker
 
 
 def bold(worksheet: Worksheet, *cells: Union[str, List[str]]) -> None:
     """ Formats excel cell(s) with bold font.
 
     :param worksheet: (var: openpyxl.worksheet.worksheet) Your worksheet, as designated by openpyxl library
-    :param cells: (str) The cell(s) you wish to make bold
+    :param cells: (str) The cell(s), range(s) or column(s) you wish to make bold, ex: 'A2', 'A2:D2', 'C'
 
     Example;
         workbook = load_workbook(file_path)
         worksheet = workbook['excel_file']
 
-        bold(worksheet,['A2', 'B2', 'C2])
+        bold(worksheet,['A2', 'B2', 'C2'])
+        bold(worksheet, 'A1:D1')
     """
 
     bold_bigger_font = xl.styles.Font(bold=True)
 
-    for cell in cells:
-        worksheet[cell].font = bold_bigger_font
+    for cell in _cells(worksheet, *cells):
+        cell.font = bold_bigger_font
+
+
+def center(worksheet: Worksheet, *cells: Union[str, List[str]]) -> None:
+    """ Centers the text of excel cell(s), horizontally and vertically.
+
+    :param worksheet: (var: openpyxl.worksheet.worksheet) Your worksheet, as designated by openpyxl library
+    :param cells: (str) The cell(s), range(s) or column(s) you wish to center, ex: 'A2', 'A1:D40', 'C'
+
+    Example;
+        workbook = load_workbook(file_path)
+        worksheet = workbook['excel_file']
+
+        center(worksheet, f'A1:D{worksheet.max_row}')
+    """
+
+    centered = xl.styles.Alignment(horizontal='center', vertical='center')
+
+    for cell in _cells(worksheet, *cells):
+        cell.alignment = centered
 
 
 def currency_formatter(worksheet: Worksheet, *cells: Union[str, List[str]]) -> None:
     """ Formats numerical excel cell(s) as a currency.
 
     :param worksheet: (var: openpyxl.worksheet.worksheet) Your worksheet, as designated by openpyxl library
-    :param cells: The cell(s) to which you wish to add currency formatting
+    :param cells: The cell(s), range(s) or column(s) to which you wish to add currency formatting, ex: 'C2', 'C'
 
     Example:
         wb = xl.load_workbook(excel_file_path)
         ws = wb[sheet_name]
 
         currency_formatter(ws, ['C2','B2'])
+        currency_formatter(ws, f'C1:C{ws.max_row}')
     """
-    for cell in cells:
-        worksheet[cell].number_format = '$#,##0.00'
+    for cell in _cells(worksheet, *cells):
+        cell.number_format = '$#,##0.00'
 
 
 def thousands_sep_formatter(worksheet: Worksheet, *cells: Union[str, List[str]]) -> None:
     """ Formats numerical excel cell(s) with thousands separator.
 
     :param worksheet: (var: openpyxl.worksheet.worksheet) Your worksheet, as designated by openpyxl library
-    :param cells: The cell(s) to which you wish to add currency formatting
+    :param cells: The cell(s), range(s) or column(s) to which you wish to add the separator, ex: 'C2', 'C'
 
     Example:
         wb = xl.load_workbook(excel_file_path)
         ws = wb[sheet_name]
 
         thousands_sep_formatter(ws, 'C2')
+        thousands_sep_formatter(ws, 'D')
     """
 
-    for cell in cells:
-        worksheet[cell].number_format = '#,##0'
+    for cell in _cells(worksheet, *cells):
+        cell.number_format = '#,##0'
 
 def percent_formatter(worksheet: Worksheet, *cells: Union[str, List[str]]) -> None:
     """ Formats numerical excel cell(s) as a percentage, rounded to the nearest whole number.
 
     :param worksheet: (var: openpyxl.worksheet.worksheet) Your worksheet, as designated by openpyxl library
-    :param cells: The cell(s) to which you wish to apply formatting to
+    :param cells: The cell(s), range(s) or column(s) to which you wish to apply formatting to, ex: 'C2', 'C'
 
     Example:
         wb = xl.load_workbook(excel_file_path)
         ws = wb[sheet_name]
 
         percent_formatter(ws, 'C2')
+        percent_formatter(ws, 'C2:C40')
     """
 
-    for cell in cells:
-        worksheet[cell].number_format = '#%'
+    for cell in _cells(worksheet, *cells):
+        cell.number_format = '#%'
 
 
 def remove_gridlines(worksheet: Worksheet) -> None:
@@ -0,0 +1,338 @@
+# ____________________________________________________________________________________________________________________
+# synthetic FBA reports; a fake but realistic data folder (sales .txt, returns .csv, in-stock .csv, cogs .csv), to try
+# the report out on, or to benchmark it at any scale (see benchmarks/pipeline_benchmark.py)
+# ____________________________________________________________________________________________________________________
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# the columns of the raw amazon exports. the report only reads a few of them (see File_Classifier.REPORT_SPECS), the
+# others are there so that the files are as wide, and as slow to parse, as the real ones
+SALES_COLUMNS = [
+    'amazon-order-id', 'merchant-order-id', 'purchase-date', 'last-updated-date', 'order-status', 'fulfillment-channel'
+    , 'sales-channel', 'order-channel', 'ship-service-level', 'product-name', 'sku', 'asin', 'item-status', 'quantity'
+    , 'currency', 'item-price', 'item-tax', 'shipping-price', 'shipping-tax', 'gift-wrap-price', 'gift-wrap-tax'
+    , 'item-promotion-discount', 'ship-promotion-discount', 'ship-city', 'ship-state', 'ship-postal-code'
+    , 'ship-country', 'promotion-ids', 'is-business-order', 'purchase-order-number', 'price-designation'
+    , 'signature-confirmation-recommended '  # the trailing space is in the raw amazon header
+]
+
+RETURN_REASONS = [
+    'DEFECTIVE', 'NOT_AS_DESCRIBED', 'UNWANTED_ITEM', 'ORDERED_WRONG_ITEM', 'DAMAGED_BY_CARRIER', 'SWITCHEROO'
+    , 'QUALITY_UNACCEPTABLE', 'MISSING_PARTS', 'FOUND_BETTER_PRICE', 'NO_REASON_GIVEN'
+]
+
+PRODUCTS = ['Widget', 'Gadget', 'Gizmo', 'Sprocket', 'Doohickey', 'Bracket', 'Cable', 'Charger', 'Holder', 'Stand']
+STATES = [('Austin', 'TX'), ('Denver', 'CO'), ('Seattle', 'WA'), ('Miami', 'FL'), ('Boston', 'MA'), ('Chicago', 'IL')]
+
+
+class SyntheticSpec(NamedTuple):
+    """The shape of a synthetic data folder.
+
+    skus:            the number of distinct skus (and product names)
+    days:            the number of days of sales, from `start` on
+    orders_per_day:  the average number of order lines per day. days * orders_per_day is roughly the size of the sales
+    return_rate:     the share of order lines that get returned
+    brands:          (brand, share of the skus) pairs. the brand is the first word of each product name
+    start:           the first day of sales, 'YYYY-MM-DD'
+    sales_files:     the number of .txt files the sales are split into (ex: one per monthly download)
+    pending_rate:    the share of order lines still pending; amazon leaves their item-price blank
+    missing_cogs:    the share of skus left out of the cogs file, so that the average cost fill-in gets exercised
+    seed:            the random seed. the same spec and seed always give the same files
+    """
+    skus: int = 300
+    days: int = 90
+    orders_per_day: int = 500
+    return_rate: float = 0.05
+    brands: Tuple[Tuple[str, float], ...] = (('Acme', 0.5), ('Globex', 0.3), ('Initech', 0.2))
+    start: str = '2024-01-01'
+    sales_files: int = 1
+    pending_rate: float = 0.01
+    missing_cogs: float = 0.05
+    seed: int = 0
+
+    @property
+    def order_lines(self) -> int:
+        """:return: the number of order lines the sales files will hold"""
+        return self.days * self.orders_per_day
+
+
+def _catalog(spec: SyntheticSpec, rng: np.random.Generator) -> pd.DataFrame:
+    """:return: (dF) sku | asin | fnsku | product-name | brand | unit price | popularity, one row per sku"""
+    names, shares = zip(*spec.brands)
+    shares = np.array(shares, dtype='float64') / sum(shares)
+    brand_ids = rng.choice(len(names), size=spec.skus, p=shares)
+
+    sku_ids = np.arange(spec.skus)
+    prefixes = np.array([name[:3].upper() for name in names])[brand_ids]
+
+    # a few skus sell most of the units; the popularity falls off with the (shuffled) rank, like real catalogs
+    popularity = 1 / (rng.permutation(spec.skus) + 1) ** 0.8
+
+    variants = rng.choice(['Black', 'White', 'Blue', 'Pro', 'Mini'], size=spec.skus)
+
+    return pd.DataFrame({
+        'sku': [f'{prefix}-{i:05d}' for prefix, i in zip(prefixes, sku_ids)]
+        , 'asin': [f'B0{i:08d}' for i in sku_ids]
+        , 'fnsku': [f'X0{i:08d}' for i in sku_ids]
+        , 'product-name': [
+            f'{names[brand]} {PRODUCTS[i % len(PRODUCTS)]} {i:05d} - {variant}'
+            for brand, i, variant in zip(brand_ids, sku_ids, variants)
+        ]
+        , 'brand': np.array(names)[brand_ids]
+        , 'unit price': rng.uniform(5, 60, spec.skus).round(2)
+        , 'popularity': popularity / popularity.sum()
+    })
+
+
+def _timestamps(moments: np.ndarray) -> np.ndarray:
+    """:return: amazon's ISO timestamps, ex: '2024-02-22T14:03:11+00:00', out of datetime64[s] values"""
+    return np.char.add(np.datetime_as_string(moments, unit='s'), '+00:00')
+
+
+def _order_ids(order_numbers: np.ndarray) -> np.ndarray:
+    """:return: amazon style order ids, ex: '111-0001234-5554321'. unique per order number"""
+    numbers = pd.Series(order_numbers)
+
+    return (
+        (111 + numbers // 10 ** 7).astype(str)
+        + '-' + (numbers % 10 ** 7).astype(str).str.zfill(7)
+        + '-' + (numbers * 7_919 % 10 ** 7).astype(str).str.zfill(7)
+    ).to_numpy()
+
+
+def _sales_chunk(
+        spec: SyntheticSpec
+        , catalog: pd.DataFrame
+        , rng: np.random.Generator
+        , first_order: int
+        , days: np.ndarray
+) -> pd.DataFrame:
+    """:return: (dF) the raw sales export rows of `days` (one entry per order line, as day offsets from the start)"""
+    rows = len(days)
+
+    # about 1 line in 10 belongs to the same order as the line before it (a basket of several skus, or of the same
+    # sku twice)
+    new_order = rng.random(rows) >= 0.1
+    new_order[:1] = True
+    order_ids = _order_ids(first_order + np.cumsum(new_order) - 1)
+
+    skus = rng.choice(len(catalog), size=rows, p=catalog['popularity'].to_numpy())
+    quantities = rng.choice([1, 1, 1, 1, 2, 2, 3], size=rows)
+    purchased = np.datetime64(spec.start, 's') + days.astype('timedelta64[D]') + \
+        rng.integers(0, 86_400, rows).astype('timedelta64[s]')
+    updated = purchased + rng.integers(60, 172_800, rows).astype('timedelta64[s]')
+
+    item_prices = (quantities * catalog['unit price'].to_numpy()[skus]).round(2)
+    pending = rng.random(rows) < spec.pending_rate
+    cities = rng.integers(0, len(STATES), rows)
+
+    return pd.DataFrame({
+        'amazon-order-id': order_ids
+        , 'merchant-order-id': order_ids  # the report drops lines with any blank column
+        , 'purchase-date': _timestamps(purchased)
+        , 'last-updated-date': _timestamps(updated)
+        , 'order-status': np.where(pending, 'Pending', 'Shipped')
+        , 'fulfillment-channel': 'Amazon'
+        , 'sales-channel': 'Amazon.com'
+        , 'order-channel': ''
+        , 'ship-service-level': 'Expedited'
+        , 'product-name': catalog['product-name'].to_numpy()[skus]
+        , 'sku': catalog['sku'].to_numpy()[skus]
+        , 'asin': catalog['asin'].to_numpy()[skus]
+        , 'item-status': np.where(pending, 'Unshipped', 'Shipped')
+        , 'quantity': quantities
+        , 'currency': 'USD'
+        , 'item-price': np.where(pending, np.nan, item_prices)
+        , 'item-tax': np.where(pending, np.nan, (item_prices * 0.07).round(2))
+        , 'shipping-price': np.nan
+        , 'shipping-tax': np.nan
+        , 'gift-wrap-price': np.nan
+        , 'gift-wrap-tax': np.nan
+        , 'item-promotion-discount': np.nan
+        , 'ship-promotion-discount': np.nan
+        , 'ship-city': np.array([city for city, _ in STATES])[cities]
+        , 'ship-state': np.array([state for _, state in STATES])[cities]
+        , 'ship-postal-code': rng.integers(10_000, 99_999, rows)
+        , 'ship-country': 'US'
+        , 'promotion-ids': ''
+        , 'is-business-order': 'false'
+        , 'purchase-order-number': ''
+        , 'price-designation': ''
+        , 'signature-confirmation-recommended ': 'false'
+    })[SALES_COLUMNS]
+
+
+def _returns_of(sales: pd.DataFrame, spec: SyntheticSpec, rng: np.random.Generator) -> pd.DataFrame:
+    """:return: (dF) the raw returns export rows of a share (`return_rate`) of the shipped order lines in `sales`"""
+    returned = sales.loc[(sales['order-status'] == 'Shipped').to_numpy() & (rng.random(len(sales)) < spec.return_rate)]
+    rows = len(returned)
+
+    purchased = pd.to_datetime(returned['purchase-date'].str[:19]).to_numpy().astype('datetime64[s]')
+    return_dates = purchased + rng.integers(86_400, 30 * 86_400, rows).astype('timedelta64[s]')
+
+    return pd.DataFrame({
+        'return-date': _timestamps(return_dates)
+        , 'order-id': returned['amazon-order-id'].to_numpy()
+        , 'sku': returned['sku'].to_numpy()
+        , 'asin': returned['asin'].to_numpy()
+        , 'fnsku': 'X0' + returned['asin'].str[2:].to_numpy()
+        , 'product-name': returned['product-name'].to_numpy()
+        , 'quantity': 1
+        , 'fulfillment-center-id': rng.choice(['PHX7', 'ONT8', 'MDW2', 'BFI4'], rows)
+        , 'detailed-disposition': rng.choice(['SELLABLE', 'CUSTOMER_DAMAGED', 'DEFECTIVE'], rows)
+        , 'reason': rng.choice(RETURN_REASONS, rows)
+        , 'status': 'Unit returned to inventory'
+        , 'license-plate-number': ''
+        , 'customer-comments': ''
+    })
+
+
+def generate(
+        directory: Union[str, Path]
+        , spec: SyntheticSpec = SyntheticSpec()
+        , chunk_lines: int = 1_000_000
+) -> Dict[str, List[str]]:
+    """Writes a synthetic data folder; sales .txt file(s), a returns .csv, an in-stock .csv and a cogs .csv.
+
+    The sales are generated and written `chunk_lines` order lines at a time, so that even tens of millions of order
+    lines never have to be held in memory at once.
+
+    :param directory: (str) the folder to write the files to. created if it does not exist
+    :param spec: (SyntheticSpec) the size and make-up of the data
+    :param chunk_lines: (int) the number of order lines generated at a time
+    :return: {'sales'/'returns'/'instock'/'cogs': [paths of the files written]}
+
+    Example:
+        generate('data/acme_100k', SyntheticSpec(days=200, orders_per_day=500))
+
+        python SALES_REPORT_GENERATOR.py data/acme_100k --brand acme
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(spec.seed)
+    catalog = _catalog(spec, rng)
+
+    # every day gets a poisson number of order lines around the average, with a weekly rhythm on top
+    weekday_boost = np.array([1.0, 0.95, 0.95, 1.0, 1.1, 1.25, 1.2])
+    days = np.arange(spec.days)
+    per_day = rng.poisson(spec.orders_per_day * weekday_boost[(days + pd.Timestamp(spec.start).dayofweek) % 7])
+    per_day = np.maximum(np.round(per_day * spec.order_lines / max(per_day.sum(), 1)).astype('int64'), 0)
+
+    # the days are split evenly over the sales files, like consecutive downloads
+    file_days = np.array_split(days, max(spec.sales_files, 1))
+    written = {'sales': [], 'returns': [], 'instock': [], 'cogs': []}
+    returns = []
+    first_order = 0
+
+    for file_number, day_block in enumerate(file_days, start=1):
+        path = os.path.join(str(directory), f'orders_{file_number:02d}.txt')
+        line_days = np.repeat(day_block, per_day[day_block])
+
+        with open(path, 'w', encoding='latin1', newline='') as f:
+            for start in range(0, max(len(line_days), 1), chunk_lines):
+                chunk = _sales_chunk(spec, catalog, rng, first_order, line_days[start:start + chunk_lines])
+                chunk.to_csv(f, sep='\t', index=False, header=start == 0, lineterminator='\n')
+
+                returns.append(_returns_of(chunk, spec, rng))
+                first_order += len(chunk)  # order numbers are never reused across chunks; gaps are fine
+
+        written['sales'].append(path)
+
+    path = os.path.join(str(directory), 'returns.csv')
+    pd.concat(returns, ignore_index=True).to_csv(path, index=False, encoding='latin1')
+    written['returns'].append(path)
+
+    path = os.path.join(str(directory), 'inventory.csv')
+    pd.DataFrame({
+        'sku': catalog['sku']
+        , 'fnsku': catalog['fnsku']
+        , 'asin': catalog['asin']
+        , 'product-name': catalog['product-name']
+        , 'condition': 'New'
+        , 'your-price': catalog['unit price']
+        , 'mfn-listing-exists': 'No'
+        , 'mfn-fulfillable-quantity': ''
+        , 'afn-listing-exists': 'Yes'
+        , 'afn-warehouse-quantity': 0
+        , 'afn-fulfillable-quantity': np.where(rng.random(spec.skus) < 0.1, 0, rng.integers(1, 500, spec.skus))
+        , 'afn-unsellable-quantity': 0
+        , 'afn-reserved-quantity': rng.integers(0, 20, spec.skus)
+        , 'afn-total-quantity': 0
+    }).to_csv(path, index=False, encoding='latin1')
+    written['instock'].append(path)
+
+    path = os.path.join(str(directory), 'cogs.csv')
+    costed = rng.random(spec.skus) >= spec.missing_cogs
+    pd.DataFrame({
+        'SKU': catalog['sku'][costed]
+        , 'VENDOR COST': (catalog['unit price'][costed] * rng.uniform(0.2, 0.5, costed.sum())).round(2)
+    }).to_csv(path, index=False, encoding='latin1')
+    written['cogs'].append(path)
+
+    return written
+
+
+def parse_brands(text: str) -> Tuple[Tuple[str, float], ...]:
+    """Parses a brand mix, ex: 'Acme:0.5,Globex:0.3,Initech:0.2'. a brand without a share gets 1.
+
+    :param text: (str) comma separated brand[:share] pairs
+    :return: (tuple) (brand, share) pairs
+    """
+    brands = []
+
+    for item in text.split(','):
+        name, _, share = item.partition(':')
+        brands.append((name.strip(), float(share) if share else 1.0))
+
+    return tuple(brands)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Writes a synthetic data folder, as described by the command line."""
+    defaults = SyntheticSpec()
+    parser = argparse.ArgumentParser(description='Writes a folder of synthetic FBA sales, returns, in-stock and cogs '
+                                                 'reports, to run the sales report on.')
+    parser.add_argument('directory', help='the folder to write the files to')
+    parser.add_argument('--skus', type=int, default=defaults.skus, help='the number of distinct skus')
+    parser.add_argument('--days', type=int, default=defaults.days, help='the number of days of sales')
+    parser.add_argument('--orders-per-day', type=int, default=defaults.orders_per_day, help='order lines per day')
+    parser.add_argument('--return-rate', type=float, default=defaults.return_rate, help='share of lines returned')
+    parser.add_argument(
+        '--brands'
+        , type=parse_brands
+        , default=defaults.brands
+        , help='the brand mix, as brand:share of the skus, ex: Acme:0.5,Globex:0.3,Initech:0.2'
+    )
+    parser.add_argument('--start', default=defaults.start, help='the first day of sales, YYYY-MM-DD')
+    parser.add_argument('--sales-files', type=int, default=defaults.sales_files, help='.txt files to split sales into')
+    parser.add_argument('--seed', type=int, default=defaults.seed, help='the random seed')
+    args = parser.parse_args(argv)
+
+    spec = SyntheticSpec(
+        skus=args.skus
+        , days=args.days
+        , orders_per_day=args.orders_per_day
+        , return_rate=args.return_rate
+        , brands=args.brands
+        , start=args.start
+        , sales_files=args.sales_files
+        , seed=args.seed
+    )
+
+    written = generate(args.directory, spec)
+
+    for report_type, paths in written.items():
+        for path in paths:
+            print(f'{report_type:<8} {path}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+from datetime import date
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class Granularity(NamedTuple):
+    """How the revenue time series is bucketed.
+
+    rule:       the pandas resample rule of a bucket
+    window:     the number of buckets averaged by the moving average
+    label:      shown on the chart, ex: 'Daily' Revenue
+    tick_every: label every n-th bucket on the chart's x axis
+    """
+    rule: str
+    window: int
+    label: str
+    tick_every: int
+
+    @property
+    def moving_average(self) -> str:
+        """:return: the name of the moving average column, ex: 'MA7'"""
+        return f'MA{self.window}'
+
+
+GRANULARITIES = {
+    'D': Granularity(rule='D', window=7, label='Daily', tick_every=7)
+    , 'W': Granularity(rule='W-MON', window=4, label='Weekly', tick_every=1)  # weeks start on monday
+    , 'M': Granularity(rule='MS', window=3, label='Monthly', tick_every=1)
+}
+
+
+class DateWindow(NamedTuple):
+    """The days a report is limited to (--start/--end), both included. either end can be left open (None).
+
+    Sales are limited by purchase date and returns by return date, as they're read (see ReportSpec.window_column).
+    """
+    start: Optional[pd.Timestamp] = None
+    end: Optional[pd.Timestamp] = None
+
+    def mask(self, days: pd.Series) -> np.ndarray:
+        """:return: (array) True for the days inside the window, timestamps by their day. NaT is always outside"""
+        inside = days.notna().to_numpy()
+
+        if self.start is not None:
+            inside &= (days >= self.start).to_numpy()
+
+        if self.end is not None:
+            # before the day after, so that timestamps during the last day (ex: return dates) are inside
+            inside &= (days < self.end + pd.Timedelta(days=1)).to_numpy()
+
+        return inside
+
+
+def parse_day(text: str) -> pd.Timestamp:
+    """Parses a day given on the command line, ex: '2024-01-31'.
+
+    :param text: (str) the day, YYYY-MM-DD
+    :return: (Timestamp) the day, at midnight
+    :raises ValueError: if it can't be parsed
+    """
+    return pd.Timestamp(text).normalize()
+
+
+def sales_period(days: pd.Series, today: Optional[date] = None) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """The first and last day of the report; from the first to the last day with sales.
+
+    If the last day is today, it is left out, since it's not a complete sales day. otherwise, when charting, it will
+    deceptively appear as though there was a sharp drop in sales on the last day. unless it's the only day with sales
+    (ex: a --start/--end window of today); the period would otherwise be empty.
+
+    :param days: (Series) the (datetime) days with sales, ex: by_day['purchase_date']
+    :param today: (date) defaults to date.today()
+    :return: (tuple) start date, end date
+    """
+    start_date = days.min()
+    end_date = days.max()
+
+    if (today or date.today()) == end_date.date() and end_date > start_date:
+        end_date -= pd.Timedelta(days=1)
+
+    return start_date, end_date
+
+
+def revenue_time_series(
+        by_day: pd.DataFrame
+        , date_range: pd.DatetimeIndex
+        , granularity: str = 'D'
+) -> pd.DataFrame:
+    """Builds the revenue time series charted on the cover page.
+
+    Revenue is summed per day on a DatetimeIndex and reindexed onto every day of `date_range`, so days without sales
+    count as 0 (mpl and sns would otherwise skip them, and the moving average would average over the wrong days). It is
+    then bucketed by week/month if asked, and the moving average is taken last, over the filled buckets.
+
+    :param by_day: (dF) purchase_date | item-price, one row per day with sales
+    :param date_range: (DatetimeIndex) every day the report covers, ex: pd.date_range(*sales_period(days))
+    :param granularity: (str) 'D' (daily), 'W' (weekly) or 'M' (monthly). see GRANULARITIES
+    :return: (dF) Date | item-price | MA<window>. Date is a 'YYYY-MM-DD' label; the first day of the bucket
+
+    Example:
+        date_range = pd.date_range(*sales_period(by_day['purchase_date']), freq='D')
+
+        weekly = revenue_time_series(by_day, date_range, 'W')
+    """
+    spec = GRANULARITIES[granularity]
+
+    revenue = by_day \
+        .groupby(by_day['purchase_date'].dt.normalize())['item-price'] \
+        .sum() \
+        .reindex(date_range, fill_value=0) \
+        .astype('float64')
+
+    if granularity != 'D':
+        revenue = revenue.resample(spec.rule, label='left', closed='left').sum()
+
+    return pd.DataFrame({
+        'Date': revenue.index.strftime('%Y-%m-%d')
+        , 'item-price': revenue.to_numpy()
+        , spec.moving_average: revenue.rolling(spec.window, min_periods=spec.window).mean().to_numpy()
+    })
@@ -0,0 +1,156 @@
+"""End-to-end and per-stage benchmark of the sales report, on synthetic data.
+
+For every scale (the number of order lines in the sales files) a synthetic data folder is generated with
+Synthetic_FBA_Data - or reused, if it was generated by an earlier run - and the report is run on it for a few brands,
+with the stage profiler on (see Stage_Profiler). The fastest of --runs runs is kept, and the seconds spent in each stage
+are printed side by side, one column per scale.
+
+usage: python benchmarks/pipeline_benchmark.py [--scales 10k 100k 1M 10M] [--runs 3] [--streaming] [--engine polars]
+                                               [--native-chart] [--log benchmark_log.csv]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from Batch_Reports import run_batch  # noqa: E402
+from Parse_Cache import ParseCache  # noqa: E402
+from Polars_Backend import ENGINES  # noqa: E402
+from Report_Wrangler import ReportError  # noqa: E402
+from Report_Writer import ChartOptions  # noqa: E402
+from Stage_Profiler import PROFILER  # noqa: E402
+from Synthetic_FBA_Data import SyntheticSpec, generate  # noqa: E402
+
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), 'fba_benchmark_data')
+LINES_PER_SALES_FILE = 1_000_000  # the bigger scales are split into several .txt files, like monthly downloads
+
+
+def parse_scale(text: str) -> int:
+    """:return: (int) a number of order lines, ex: '10k' -> 10_000, '1M' -> 1_000_000"""
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    suffix = text[-1].lower()
+
+    return int(float(text[:-1]) * multipliers[suffix]) if suffix in multipliers else int(text)
+
+
+def synthetic_folder(data_dir: str, order_lines: int, days: int, skus: int, seed: int) -> str:
+    """Generates the data folder of one scale, unless an earlier run already did.
+
+    :return: (str) the folder
+    """
+    spec = SyntheticSpec(
+        skus=skus
+        , days=days
+        , orders_per_day=math.ceil(order_lines / days)
+        , sales_files=max(1, order_lines // LINES_PER_SALES_FILE)
+        , seed=seed
+    )
+
+    directory = os.path.join(data_dir, f'lines{order_lines}_days{days}_skus{skus}_seed{seed}')
+
+    if not os.path.exists(os.path.join(directory, 'cogs.csv')):  # cogs.csv is written last
+        started = time.perf_counter()
+        generate(directory, spec)
+        print(f'generated {order_lines:,} order lines in {directory} ({time.perf_counter() - started:,.1f} s)')
+
+    return directory
+
+
+def run_once(directory: str, brands: List[str], output_dir: str, args: argparse.Namespace) -> Tuple[float, List[Dict]]:
+    """Runs the report once, with the profiler on.
+
+    :return: (tuple) the end-to-end seconds, the profiled stages
+    """
+    PROFILER.start(trace_memory=args.profile_memory)
+    started = time.perf_counter()
+
+    try:
+        results = run_batch(
+            directory
+            , brands
+            , output_dir=output_dir
+            , max_workers=args.workers
+            , cache=ParseCache(enabled=args.cache)
+            , workbook_workers=args.workbook_workers
+            , stream_sales=args.streaming
+            , engine=args.engine
+            , chart=ChartOptions(native=args.native_chart)
+        )
+
+    finally:
+        elapsed = time.perf_counter() - started
+        PROFILER.stop()
+
+    for brand_filter, result in results.items():
+        if isinstance(result, ReportError):
+            print(f'  {brand_filter!r}: {result}')
+
+    return elapsed, PROFILER.records
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', default=['10k', '100k', '1M'], help='order lines, ex: 10k 1M 10M')
+    parser.add_argument('--days', type=int, default=365, help='days of sales the order lines are spread over')
+    parser.add_argument('--skus', type=int, default=2_000, help='distinct skus')
+    parser.add_argument('--brands', nargs='+', default=['acme', 'globex'], help='the brands to run the report for')
+    parser.add_argument('--seed', type=int, default=0, help='the random seed of the synthetic data')
+    parser.add_argument('--runs', type=int, default=3, help='runs per scale; the fastest is kept')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='where the synthetic folders are kept')
+    parser.add_argument('--workers', type=int, help='processes parsing the files. defaults to every core')
+    parser.add_argument('--workbook-workers', type=int, default=1, help='processes writing workbooks')
+    parser.add_argument('--cache', action='store_true', help='use the parse cache (warm runs after the first)')
+    parser.add_argument('--streaming', action='store_true', help='read the sales files chunk by chunk')
+    parser.add_argument('--engine', choices=ENGINES, default='pandas', help='what reads and aggregates the sales files')
+    parser.add_argument('--native-chart', action='store_true', help='native excel charts instead of matplotlib')
+    parser.add_argument('--profile-memory', action='store_true', help='record tracemalloc peaks (slows every stage)')
+    parser.add_argument('--log', help='append the stages of the kept runs to this run log (.csv, or json lines)')
+    args = parser.parse_args()
+
+    scales = [parse_scale(scale) for scale in args.scales]
+    totals: Dict[int, float] = {}
+    stage_seconds: Dict[str, Dict[int, float]] = defaultdict(dict)
+    kept_records = []
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for order_lines in scales:
+            directory = synthetic_folder(args.data_dir, order_lines, args.days, args.skus, args.seed)
+
+            runs = [run_once(directory, args.brands, output_dir, args) for _ in range(args.runs)]
+            elapsed, records = min(runs, key=lambda run: run[0])
+
+            totals[order_lines] = elapsed
+            print(f'{order_lines:>12,} order lines: {elapsed:,.2f} s (best of {args.runs})')
+
+            # stages run once per brand are summed up
+            for record in records:
+                stage_seconds[record['stage']][order_lines] = \
+                    stage_seconds[record['stage']].get(order_lines, 0) + record['wall_s']
+
+                kept_records.append({**record, 'run': f'{record["run"]} {order_lines} lines'})
+
+    print()
+    print(f'{"stage (s)":<12}' + ''.join(f'{order_lines:>14,}' for order_lines in scales))
+
+    for stage, seconds in stage_seconds.items():
+        print(f'{stage:<12}' + ''.join(f'{seconds.get(order_lines, 0):>14,.3f}' for order_lines in scales))
+
+    print(f'{"end to end":<12}' + ''.join(f'{totals[order_lines]:>14,.3f}' for order_lines in scales))
+
+    if args.log:
+        PROFILER.records = kept_records
+        PROFILER.write(args.log)
+        print(f'\nstages appended to {args.log}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Cold-start benchmark for SALES_REPORT_GENERATOR.
+
+Imports the report CLI in a fresh interpreter under `python -X importtime`, and reports the total import time and the
+slowest top-level packages. Fails (exit code 1) if any of the libraries that should only be loaded once a workbook is
+written - matplotlib, seaborn, openpyxl - shows up at startup, or if the total goes over --budget-ms (1500 by default).
+
+usage: python benchmarks/startup_importtime.py [--module SALES_REPORT_GENERATOR] [--runs 5] [--budget-ms 1500]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_PACKAGES = ['matplotlib', 'seaborn', 'openpyxl']  # only imported by Report_Writer.write_report
+DEFAULT_BUDGET_MS = 1500
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def import_times(module: str) -> List[Tuple[str, int, int, int]]:
+    """Imports `module` in a fresh interpreter with `-X importtime`.
+
+    :param module: (str) the module to import, ex: 'SALES_REPORT_GENERATOR'
+    :return: [(imported module, self time in us, cumulative time in us, nesting depth)]. depth 1 are the imports made
+             directly by the interpreter; their cumulative times add up to the total
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+        , cwd=REPO_DIR
+        , capture_output=True
+        , text=True
+        , env={**os.environ, 'PYTHONPATH': REPO_DIR, 'PYTHONDONTWRITEBYTECODE': '1'}
+    )
+
+    if result.returncode != 0:
+        raise RuntimeError(f'importing {module} failed:\n{result.stderr[-2000:]}')
+
+    times = []
+
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+
+        if match:
+            depth = (len(match.group(3)) + 1) // 2  # nested imports are indented by two more spaces per level
+            times.append((match.group(4), int(match.group(1)), int(match.group(2)), depth))
+
+    return times
+
+
+def all_imported(module: str) -> List[str]:
+    """:return: the names of every module loaded by importing `module` in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-c', f'import sys, {module}; print("\\n".join(sys.modules))']
+        , cwd=REPO_DIR
+        , capture_output=True
+        , text=True
+        , env={**os.environ, 'PYTHONPATH': REPO_DIR}
+    )
+
+    return result.stdout.split()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='SALES_REPORT_GENERATOR', help='the module to import')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to time; the fastest run is kept')
+    parser.add_argument(
+        '--budget-ms'
+        , type=float
+        , default=DEFAULT_BUDGET_MS
+        , help='fail if the total import time goes over this. 0 only reports it'
+    )
+    parser.add_argument('--top', type=int, default=10, help='the number of slowest packages to list')
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    totals = [sum(cumulative for _, _, cumulative, depth in run if depth == 1) / 1000 for run in runs]
+    fastest = runs[totals.index(min(totals))]
+
+    # self times, summed per top-level package, so that pandas' hundreds of submodules show up as one line
+    by_package: Dict[str, int] = defaultdict(int)
+
+    for name, self_time, _, _ in fastest:
+        by_package[name.split('.')[0]] += self_time
+
+    print(f'import {args.module}: {min(totals):,.1f} ms (best of {args.runs}), median '
+          f'{sorted(totals)[len(totals) // 2]:,.1f} ms')
+
+    for package, self_time in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'  {package:<30} {self_time / 1000:>9,.1f} ms')
+
+    loaded = set(name.split('.')[0] for name in all_imported(args.module))
+    eager = [package for package in LAZY_PACKAGES if package in loaded]
+
+    failed = False
+
+    if eager:
+        print(f'FAIL: {", ".join(eager)} imported at startup; these should only load when a workbook is written')
+        failed = True
+
+    if args.budget_ms and min(totals) > args.budget_ms:
+        print(f'FAIL: startup took {min(totals):,.1f} ms, over the {args.budget_ms:,.1f} ms budget')
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# the report's modules live at the top of the repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Synthetic_FBA_Data import SyntheticSpec, generate  # noqa: E402
+
+# small, but with everything the report has to deal with; several sales files, baskets, pending lines, skus without a
+# cost, returns
+SPEC = SyntheticSpec(skus=60, days=75, orders_per_day=40, return_rate=0.06, sales_files=2, seed=7)
+
+
+@pytest.fixture(scope='session')
+def data_folder(tmp_path_factory):
+    """:return: (str) a fixed synthetic data folder, shared by every test"""
+    directory = tmp_path_factory.mktemp('synthetic')
+    generate(directory, SPEC)
+
+    return str(directory)
@@ -0,0 +1,49 @@
+import os
+
+import AutoFit_ColumnWidth
+import Report_Wrangler
+from Batch_Reports import run_batch
+from Parse_Cache import ParseCache
+from Report_Wrangler import ReportError
+
+
+def test_brands_differing_in_case_are_one_report(data_folder, tmp_path):
+    results = run_batch(data_folder, ['acme', ' ACME', 'Acme '], output_dir=tmp_path, cache=ParseCache(enabled=False))
+
+    assert list(results) == ['acme']
+    assert os.listdir(tmp_path) == [os.path.basename(results['acme'])]
+
+
+def test_one_failing_workbook_does_not_sink_the_others(data_folder, tmp_path, monkeypatch):
+    fit_and_center = AutoFit_ColumnWidth.fit_and_center
+
+    def fails_for_globex(ws, df):
+        if 'Globex' in ''.join(str(name) for name in df.get('product-name', [])):
+            raise TypeError('boom')
+
+        fit_and_center(ws, df)
+
+    monkeypatch.setattr(AutoFit_ColumnWidth, 'fit_and_center', fails_for_globex)
+
+    results = run_batch(data_folder, ['acme', 'globex'], output_dir=tmp_path, cache=ParseCache(enabled=False))
+
+    assert isinstance(results['acme'], str) and os.path.exists(results['acme'])
+    assert isinstance(results['globex'], ReportError) and 'TypeError: boom' in str(results['globex'])
+
+
+def test_every_brand_is_flagged_in_one_pass_per_report(data_folder, tmp_path, monkeypatch):
+    brand_masks = Report_Wrangler.brand_masks
+    calls = []
+
+    def counted(product_names, brand_filters, index=None):
+        calls.append(list(brand_filters))
+
+        return brand_masks(product_names, brand_filters, index)
+
+    monkeypatch.setattr(Report_Wrangler, 'brand_masks', counted)
+
+    results = run_batch(data_folder, ['acme', 'globex', 'initech'], output_dir=tmp_path, cache=ParseCache(enabled=False))
+
+    # sales, in stock and returns; each flagged for the three brands at once
+    assert calls == [['acme', 'globex', 'initech']] * 3
+    assert all(isinstance(output_path, str) for output_path in results.values())
@@ -0,0 +1,23 @@
+import numpy as np
+import openpyxl as xl
+import pandas as pd
+
+from AutoFit_ColumnWidth import align_and_center, column_widths
+
+
+def test_widths_match_align_and_center_on_the_saved_sheet(tmp_path):
+    df = pd.DataFrame({
+        'float': [0.1 + 0.2, -0.0, 3.0, 1e16, 1e22, 1e-7, 2.0000000000000004, np.nan, 123456789.123456789]
+        , 'Float64': pd.array([1.5, None, 2.0, -0.0, 10.25, 1.0, 7.0, 8.0, 9.0], dtype='Float64')
+        , 'Int64': pd.array([1, None, 300, -5, 0, 1, 2, 3, 123456], dtype='Int64')
+        , 'text': ['a', '', None, 'a much longer piece of text', 'b', 'c', 'd', 'e', 'f']
+        , 'a long header over short values': ['x'] * 9
+        , 'date': pd.to_datetime(['2024-01-01', None, '2024-02-03 10:00'] + ['2024-03-01'] * 6, format='ISO8601')
+    })
+    output_path = tmp_path / 'widths.xlsx'
+    df.to_excel(output_path, index=False)
+
+    worksheet = xl.load_workbook(output_path).active
+    align_and_center(worksheet)
+
+    assert column_widths(df) == [worksheet.column_dimensions[column].width for column in 'ABCDEF']
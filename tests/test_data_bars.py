@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from DataBars_Creator import data_bar_bounds
+
+
+def test_bounds_are_the_second_smallest_and_second_largest():
+    # the grand total (first) and the smallest line would otherwise squash every other bar
+    assert data_bar_bounds(pd.Series([300, 5, 120, 1, 40, 80])) == (5.0, 120.0)
+
+
+def test_ties_count_once_each():
+    assert data_bar_bounds(pd.Series([7, 7, 7])) == (7.0, 7.0)
+    assert data_bar_bounds(pd.Series([9.5, 2.0, 9.5, 2.0])) == (2.0, 9.5)
+
+
+def test_missing_values_and_text_are_ignored():
+    values = pd.Series(['Grand Totals', 12, np.nan, None, 'n/a', 3, 30, pd.NA], dtype=object)
+
+    assert data_bar_bounds(values) == (12.0, 12.0)
+    assert data_bar_bounds(pd.Series([1.5, np.nan, 4.0, 2.5])) == (2.5, 2.5)
+
+
+def test_fewer_than_two_numbers_gives_no_bounds():
+    assert data_bar_bounds(pd.Series([], dtype='float64')) is None
+    assert data_bar_bounds(pd.Series([42])) is None
+    assert data_bar_bounds(pd.Series([42, np.nan, 'text'], dtype=object)) is None
+    assert data_bar_bounds(pd.Series([np.nan, np.nan])) is None
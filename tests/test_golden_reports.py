@@ -0,0 +1,155 @@
+"""Golden-output regression tests.
+
+The report is run on a fixed synthetic data folder and every sheet of the workbook (values, number formats, bold cells,
+tables, data bar bounds, widths) is compared against a stored snapshot, numbers within a tight tolerance. The other
+ways of running the same report - streaming, incremental, the polars engine, the history store, native charts,
+parallel workbooks - are held to the very same snapshots, so an optimization that changes a number fails here.
+The pieces underneath (keyword index, return pricing, date windows, ...) have their own focused tests next to this one.
+
+To accept an intended change of the output, re-write the snapshots and review their diff:
+
+    UPDATE_GOLDEN=1 python -m pytest tests
+"""
+import os
+
+import pytest
+
+from Batch_Reports import run_batch
+from History_Store import ingest_directory
+from Parse_Cache import ParseCache
+from Period_Comparison import parse_period
+from Report_Writer import ChartOptions
+from Time_Series import parse_day
+from workbook_snapshot import differences, load_snapshot, save_snapshot, without, workbook_snapshot
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots')
+UPDATE = os.environ.get('UPDATE_GOLDEN') == '1'
+
+PERIODS = [parse_period('2024-01-01:2024-01-31'), parse_period('2024-02-01:2024-02-29')]
+
+# --start/--end windows; a month, and a single day (the returns of that day, priced off of older order lines)
+WINDOWS = {'acme_february': ('2024-02-01', '2024-02-29'), 'acme_single_day': ('2024-02-14', '2024-02-14')}
+
+# the ways of reading the data folder a window has to be applied by
+WINDOW_MODES = {
+    'in memory': {}
+    , 'streaming': {'stream_sales': True, 'chunksize': 500}
+    , 'polars': {'engine': 'polars'}
+}
+
+# the sheets holding the chart; drawn differently by the native chart option, so left out when comparing it
+CHART_SHEETS = ['cover page', 'chart data']
+
+
+def run(data_folder, output_dir, brands, **options):
+    """:return: {brand: snapshot of its workbook}"""
+    results = run_batch(data_folder, brands, output_dir=str(output_dir), cache=ParseCache(enabled=False), **options)
+
+    for brand_filter, result in results.items():
+        assert isinstance(result, str), f'{brand_filter!r}: {result}'
+
+    return {brand_filter: workbook_snapshot(result) for brand_filter, result in results.items()}
+
+
+def check(snapshot, name, ignore_sheets=()):
+    """Compares a snapshot against its golden one (or writes it, with UPDATE_GOLDEN=1)."""
+    path = os.path.join(SNAPSHOT_DIR, f'{name}.json')
+
+    if UPDATE and not ignore_sheets:
+        save_snapshot(snapshot, path)
+        return
+
+    assert os.path.exists(path), f'no golden snapshot for {name!r}; run with UPDATE_GOLDEN=1 to create it'
+
+    expected = without(load_snapshot(path), ignore_sheets)
+    found = differences(expected, without(snapshot, ignore_sheets))
+
+    assert not found, f'{len(found)} difference(s) from {name}.json:\n' + '\n'.join(found[:25])
+
+
+@pytest.mark.parametrize('brand_filter, name', [('acme', 'acme'), ('globex', 'globex'), ('', 'all_brands')])
+def test_reference_report(data_folder, tmp_path, brand_filter, name):
+    check(run(data_folder, tmp_path, [brand_filter])[brand_filter], name)
+
+
+def test_period_comparison(data_folder, tmp_path):
+    check(run(data_folder, tmp_path, ['acme'], periods=PERIODS)['acme'], 'acme_periods')
+
+
+@pytest.mark.parametrize('granularity', ['W', 'M'])
+def test_granularity_only_changes_the_chart(data_folder, tmp_path, granularity):
+    check(run(data_folder, tmp_path, ['acme'], granularity=granularity)['acme'], 'acme', CHART_SHEETS)
+
+
+def test_streaming(data_folder, tmp_path):
+    check(run(data_folder, tmp_path, ['acme'], stream_sales=True, chunksize=500)['acme'], 'acme')
+
+
+def test_incremental(data_folder, tmp_path):
+    state_dir = tmp_path / 'state'
+
+    # the first run ingests every sales file, the second one none of them; both have to give the same workbook
+    for _ in range(2):
+        snapshot = run(data_folder, tmp_path, ['acme'], stream_sales=True, state_dir=state_dir, chunksize=500)['acme']
+        check(snapshot, 'acme')
+
+
+def test_polars_engine(data_folder, tmp_path):
+    pytest.importorskip('polars')
+
+    snapshots = run(data_folder, tmp_path, ['acme', 'globex', ''], engine='polars')
+
+    check(snapshots['acme'], 'acme')
+    check(snapshots['globex'], 'globex')
+    check(snapshots[''], 'all_brands')
+
+
+def test_history_store(data_folder, tmp_path):
+    store_path = str(tmp_path / 'history.sqlite')
+
+    # ingesting the same folder twice adds nothing the second time
+    first = ingest_directory(data_folder, store_path)
+    second = ingest_directory(data_folder, store_path)
+
+    assert sum(ingested.rows for ingested in first) > 0
+    assert all(ingested.status == 'already ingested' for ingested in second if ingested.report_type)
+
+    snapshots = run(None, tmp_path, ['acme', ''], store_path=store_path)
+
+    check(snapshots['acme'], 'acme')
+    check(snapshots[''], 'all_brands')
+    check(run(None, tmp_path, ['acme'], store_path=store_path, periods=PERIODS)['acme'], 'acme_periods')
+
+
+@pytest.mark.parametrize('mode', list(WINDOW_MODES))
+@pytest.mark.parametrize('name', list(WINDOWS))
+def test_date_window(data_folder, tmp_path, name, mode):
+    if mode == 'polars':
+        pytest.importorskip('polars')
+
+    start, end = (parse_day(day) for day in WINDOWS[name])
+
+    check(run(data_folder, tmp_path, ['acme'], start=start, end=end, **WINDOW_MODES[mode])['acme'], name)
+
+
+def test_date_window_from_store(data_folder, tmp_path):
+    store_path = str(tmp_path / 'history.sqlite')
+    ingest_directory(data_folder, store_path)
+
+    for name, (start, end) in WINDOWS.items():
+        snapshot = run(None, tmp_path, ['acme'], store_path=store_path, start=parse_day(start), end=parse_day(end))
+        check(snapshot['acme'], name)
+
+
+def test_native_chart(data_folder, tmp_path):
+    snapshot = run(data_folder, tmp_path, ['acme'], chart=ChartOptions(native=True))['acme']
+
+    check(snapshot, 'acme', CHART_SHEETS)
+    assert snapshot['cover page']['charts'] == 1 and snapshot['chart data']['state'] == 'hidden'
+
+
+def test_parallel_workbooks(data_folder, tmp_path):
+    snapshots = run(data_folder, tmp_path, ['acme', 'globex'], workbook_workers=2)
+
+    check(snapshots['acme'], 'acme')
+    check(snapshots['globex'], 'globex')
@@ -0,0 +1,49 @@
+import sqlite3
+
+from History_Store import ingest_directory
+
+HEADER = 'amazon-order-id\tmerchant-order-id\tpurchase-date\tproduct-name\tsku\tquantity\titem-price\t' \
+         'signature-confirmation-recommended \n'
+
+
+def sales_line(order_id, price='10.00'):
+    return f'{order_id}\tM1\t2024-01-01T06:28:29+00:00\tAcme Widget\tACM-1\t1\t{price}\tfalse\n'
+
+
+def stored_sales(store_path):
+    with sqlite3.connect(store_path) as connection:
+        return connection.execute('SELECT COUNT(*) FROM sales').fetchone()[0]
+
+
+def ingest(folder, store_path, *lines):
+    folder.mkdir(exist_ok=True)
+    (folder / 'orders.txt').write_text(HEADER + ''.join(lines))
+
+    ingested, = ingest_directory(folder, store_path)
+
+    return ingested
+
+
+def test_identical_lines_within_a_file_are_all_kept(tmp_path):
+    store_path = tmp_path / 'history.sqlite'
+    ingested = ingest(tmp_path / 'a', store_path, sales_line('111-1'), sales_line('111-1'), sales_line('111-2'))
+
+    assert (ingested.rows, ingested.already_stored) == (3, 0)
+    assert stored_sales(store_path) == 3
+
+
+def test_overlapping_exports_only_add_new_lines(tmp_path):
+    store_path = tmp_path / 'history.sqlite'
+    ingest(tmp_path / 'a', store_path, sales_line('111-1'), sales_line('111-1'), sales_line('111-2'))
+
+    # the same days, re-exported with one more copy of a line, one changed price and one new order
+    ingested = ingest(
+        tmp_path / 'b'
+        , store_path
+        , *[sales_line('111-1')] * 3
+        , sales_line('111-2', '12.00')
+        , sales_line('111-3')
+    )
+
+    assert (ingested.rows, ingested.already_stored) == (3, 2)
+    assert stored_sales(store_path) == 6
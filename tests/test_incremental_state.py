@@ -0,0 +1,43 @@
+import glob
+import os
+
+import pytest
+
+import Incremental_State
+from Incremental_State import brand_state_path, load_state, save_state, update_incremental_state
+
+
+@pytest.fixture
+def sales_files(data_folder):
+    return sorted(glob.glob(os.path.join(data_folder, '*.txt')))
+
+
+def test_state_is_picked_back_up(tmp_path, sales_files):
+    aggregates, new_files = update_incremental_state(tmp_path, sales_files, 'acme', chunksize=500)
+    aggregator, digests = load_state(tmp_path, 'acme')
+
+    assert new_files == sales_files and len(digests) == len(sales_files)
+    assert aggregator.rows == aggregates.rows and aggregator.total_revenue == aggregates.total_revenue
+
+    # older states are removed once the new one is current
+    save_state(tmp_path, 'acme', aggregator, digests)
+
+    assert len([entry for entry in os.listdir(brand_state_path(tmp_path, 'acme')) if entry.startswith('state_')]) == 1
+
+
+def test_crash_while_saving_keeps_the_previous_state(tmp_path, sales_files, monkeypatch):
+    update_incremental_state(tmp_path, sales_files[:1], 'acme', chunksize=500)
+    before, before_digests = load_state(tmp_path, 'acme')
+
+    def crash(source, target):
+        raise OSError('crashed')
+
+    monkeypatch.setattr(Incremental_State.os, 'replace', crash)
+
+    with pytest.raises(OSError):
+        update_incremental_state(tmp_path, sales_files, 'acme', chunksize=500)
+
+    monkeypatch.undo()
+    after, after_digests = load_state(tmp_path, 'acme')
+
+    assert after_digests == before_digests and after.rows == before.rows
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Keyword_Index import KeywordIndex
+
+PRODUCT_NAMES = pd.Series(
+    [
+        'Acme Widget - Blue'
+        , 'ACME Widget - Red'
+        , 'Globex Gadget'
+        , 'Initech Stapler'
+        , 'acmeco Bracket'
+        , 'Widget (Acme)'
+        , 'Café Crème Mug'
+        , 'Ünïcode Ünit'
+        , 'Straße Sign'
+        , 'ſtapler Deluxe'  # long s, matched by 's' once case is ignored
+        , 'Ab'
+        , None
+        , 'Globex Gadget'
+    ]
+    , dtype='category'
+)
+
+KEYWORDS = [
+    # plain keywords, looked up through the trigrams
+    'acme', 'ACME', 'widget', 'gadget', 'acme widget', 'stapler', 'nothing like it'
+    # shorter than a trigram
+    , 'a', 'ab', 'Ac', 'é'
+    # non-ascii
+    , 'café', 'CRÈME', 'ünï', 'straße'
+    # regex
+    , 'acme|globex', '^acme', 'wid.et', r'\(acme\)', 'gad?get$', '[ig]nitech'
+]
+
+
+def baseline(brand_filter):
+    """the plain row filter the index replaces"""
+    return PRODUCT_NAMES.str.contains(f"{brand_filter}", case=False, na=False).to_numpy(dtype=bool)
+
+
+@pytest.fixture(scope='module')
+def index():
+    return KeywordIndex(PRODUCT_NAMES.cat.categories)
+
+
+@pytest.mark.parametrize('brand_filter', KEYWORDS)
+def test_lookup_matches_baseline(index, brand_filter):
+    assert index.lookup(brand_filter) == set(PRODUCT_NAMES[baseline(brand_filter)])
+
+
+@pytest.mark.parametrize('brand_filter', KEYWORDS)
+def test_mask_matches_baseline(index, brand_filter):
+    np.testing.assert_array_equal(index.mask(PRODUCT_NAMES, brand_filter), baseline(brand_filter))
+
+
+def test_mask_of_names_missing_from_the_index(index):
+    product_names = pd.Series(['Acme Anvil', 'Globex Gadget', None])
+
+    np.testing.assert_array_equal(index.mask(product_names, 'acme'), [True, False, False])
+
+
+def test_duplicates_and_missing_names_are_dropped():
+    assert list(KeywordIndex(['b', 'a', None, 'b', np.nan]).names) == ['a', 'b']
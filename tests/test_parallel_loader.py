@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from Parallel_Loader import load_report_files, pool_context
+from Time_Series import DateWindow
+
+REPORT_TYPES = ['sales', 'returns', 'instock', 'cogs']
+
+
+def assert_same_reports(serial, parallel):
+    assert serial.classifications == parallel.classifications
+
+    for report_type in REPORT_TYPES:
+        serial_frames, parallel_frames = getattr(serial, report_type), getattr(parallel, report_type)
+
+        assert len(serial_frames) == len(parallel_frames) > 0
+
+        for serial_df, parallel_df in zip(serial_frames, parallel_frames):
+            pd.testing.assert_frame_equal(serial_df, parallel_df)
+
+
+@pytest.mark.skipif(pool_context() is None, reason='parsing only runs in parallel where processes can be forked')
+@pytest.mark.parametrize('window', [None, DateWindow(pd.Timestamp('2024-02-01'), pd.Timestamp('2024-02-29'))])
+def test_parallel_parsing_matches_serial(data_folder, window):
+    serial = load_report_files(data_folder, max_workers=1, window=window)
+    parallel = load_report_files(data_folder, max_workers=4, window=window)
+
+    assert_same_reports(serial, parallel)
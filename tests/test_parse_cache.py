@@ -0,0 +1,36 @@
+import os
+
+import pandas as pd
+import pytest
+
+from Parse_Cache import ParseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    pytest.importorskip('pyarrow')
+
+    return ParseCache(tmp_path / 'cache')
+
+
+@pytest.fixture
+def report_file(tmp_path):
+    file_path = tmp_path / 'returns.csv'
+    file_path.write_text('order-id\n1\n')
+
+    return str(file_path)
+
+
+def test_round_trip(cache, report_file):
+    df = pd.DataFrame({'order-id': ['111-1', '111-2']})
+    cache.put(report_file, ['order-id'], df)
+
+    pd.testing.assert_frame_equal(cache.get(report_file, ['order-id']), df)
+
+
+def test_frame_feather_cannot_hold_is_left_uncached(cache, report_file):
+    # order ids parsed partly as numbers
+    cache.put(report_file, ['order-id'], pd.DataFrame({'order-id': ['111-1', 2, 3.5]}))
+
+    assert cache.get(report_file, ['order-id']) is None
+    assert os.listdir(cache.cache_dir) == []
@@ -0,0 +1,90 @@
+import os
+
+import openpyxl as xl
+import pytest
+
+import AutoFit_ColumnWidth
+from Parse_Cache import ParseCache
+from Report_Pipeline import load, render, wrangle
+from Time_Series import DateWindow, parse_day
+
+
+@pytest.fixture(scope='module')
+def report(data_folder):
+    return wrangle(load(data_folder, cache=ParseCache(enabled=False)), 'acme')
+
+
+def test_workbook_is_written(report, tmp_path):
+    output_path = render(report, tmp_path)
+
+    assert os.listdir(tmp_path) == [os.path.basename(output_path)]
+
+
+def test_failed_workbook_leaves_nothing_behind(report, tmp_path, monkeypatch):
+    def broken_fit_and_center(ws, df):
+        raise KeyError('boom')
+
+    monkeypatch.setattr(AutoFit_ColumnWidth, 'fit_and_center', broken_fit_and_center)
+
+    with pytest.raises(KeyError):
+        render(report, tmp_path)
+
+    assert os.listdir(tmp_path) == []
+
+
+def data_bar_ranges(output_path):
+    """:return: {sheet title: [the ranges with data bars]}"""
+    wb = xl.load_workbook(output_path)
+
+    return {ws.title: sorted(str(formatting.sqref) for formatting in ws.conditional_formatting) for ws in wb.worksheets}
+
+
+def test_data_bars_are_gated_per_sheet(report, tmp_path):
+    # nothing returned; only the grand totals row is left on the two returns sheets
+    no_returns = report._replace(returns=report.returns.iloc[:1], returns_by_reason=report.returns_by_reason.iloc[:1])
+
+    ranges = data_bar_ranges(render(no_returns, tmp_path))
+
+    assert ranges['returns'] == [] and ranges['returns by reason'] == []
+    assert ranges['gross sales'] == ['C3:C31', 'D3:D31'] and ranges['in stock'] == ['C3:C29', 'D3:D29']
+
+
+def test_data_bars_are_kept_with_nothing_left_in_stock(report, tmp_path):
+    sold_out = report._replace(instock=report.instock.assign(quantity=0), remaining_in_stock_qty=0)
+
+    ranges = data_bar_ranges(render(sold_out, tmp_path))
+
+    assert ranges['gross sales'] == ['C3:C31', 'D3:D31'] and ranges['returns'] == ['C3:C25', 'D3:D25']
+
+
+def cover_page_text(report, tmp_path, monkeypatch):
+    """:return: the quick stats text drawn on the matplotlib cover page chart"""
+    import matplotlib.pyplot as plt
+
+    drawn = []
+    text = plt.text
+    monkeypatch.setattr(plt, 'text', lambda x, y, s, **kwargs: drawn.append(s) or text(x, y, s, **kwargs))
+
+    wb = xl.load_workbook(render(report, tmp_path))
+
+    # the chart is drawn, and the cover page kept, either way
+    assert wb['cover page'].sheet_state == 'visible' and len(wb['cover page']._images) == 1
+
+    return drawn[0]
+
+
+def test_one_day_report_gets_a_chart(data_folder, tmp_path, monkeypatch):
+    day = parse_day('2024-01-15')
+    report = wrangle(load(data_folder, window=DateWindow(day, day), cache=ParseCache(enabled=False)), 'acme')
+
+    assert len(report.date_range) == 1
+
+    assert 'Overall Return Rate: ' in cover_page_text(report, tmp_path, monkeypatch)
+
+
+def test_report_with_every_unit_returned_gets_a_chart(report, tmp_path, monkeypatch):
+    all_returned = report._replace(total_returns_qty=report.total_sales_qty)
+
+    text = cover_page_text(all_returned, tmp_path, monkeypatch)
+
+    assert 'Net Units Sold: 0\n' in text and 'Overall Return Rate: n/a\n' in text
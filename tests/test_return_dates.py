@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from File_Classifier import REPORT_SPECS
+from File_Readers import csv_reader
+from History_Store import ingest_directory, load_from_store
+from Report_Pipeline import load
+from Time_Series import DateWindow, parse_day
+
+RETURNS = 'return-date,order-id,sku,asin,product-name,quantity,reason,status\n' \
+          '2024-02-14T09:12:00+00:00,111-1,ACM-1,B1,Acme Widget,1,DEFECTIVE,Unit returned to inventory\n' \
+          '2024-02-14T17:40:00+00:00,111-1,ACM-1,B1,Acme Widget,1,DEFECTIVE,Unit returned to inventory\n' \
+          '2024-02-14T09:12:00+00:00,111-1,ACM-1,B1,Acme Widget,1,DEFECTIVE,Unit returned to inventory\n'
+
+SALES = 'amazon-order-id\tmerchant-order-id\tpurchase-date\tproduct-name\tsku\tquantity\titem-price\t' \
+        'signature-confirmation-recommended \n' \
+        '111-1\tM1\t2024-02-10T06:28:29+00:00\tAcme Widget\tACM-1\t2\t10.00\tfalse\n'
+
+
+@pytest.fixture
+def data_folder(tmp_path):
+    folder = tmp_path / 'reports'
+    folder.mkdir()
+
+    (folder / 'returns.csv').write_text(RETURNS)
+    (folder / 'orders.txt').write_text(SALES)
+    (folder / 'inventory.csv').write_text('sku,afn-fulfillable-quantity,product-name\nACM-1,5,Acme Widget\n')
+    (folder / 'cogs.csv').write_text('SKU,VENDOR COST\nACM-1,4.00\n')
+
+    return folder
+
+
+def read_returns(folder):
+    spec = REPORT_SPECS['returns']
+
+    return csv_reader(folder / 'returns.csv', spec.columns, spec.dtypes, spec.date_columns, spec.keep_time)
+
+
+def test_returns_logged_twice_in_a_day_are_both_kept(data_folder):
+    data = load(data_folder, max_workers=1).data
+
+    # the exact copy of the first line is dropped; the same return logged again in the evening is not
+    assert data.returns['return-date'].tolist() == [pd.Timestamp('2024-02-14 09:12'), pd.Timestamp('2024-02-14 17:40')]
+
+
+def test_a_window_ending_on_the_day_keeps_all_of_its_returns(data_folder):
+    returns = read_returns(data_folder)
+
+    assert DateWindow(parse_day('2024-02-14'), parse_day('2024-02-14')).mask(returns['return-date']).all()
+    assert not DateWindow(end=parse_day('2024-02-13')).mask(returns['return-date']).any()
+
+
+def test_the_history_store_keeps_both_returns(data_folder, tmp_path):
+    store_path = tmp_path / 'history.sqlite'
+    ingest_directory(data_folder, store_path)
+
+    dataset = load_from_store('acme', store_path, start=parse_day('2024-02-14'), end=parse_day('2024-02-14'))
+
+    assert dataset.data.returns['return-date'].tolist() == [
+        pd.Timestamp('2024-02-14 09:12'), pd.Timestamp('2024-02-14 17:40')
+    ]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from Return_Pricing import OrderLinePrices, price_returns
+
+ORDER_LINES = pd.DataFrame(
+    {
+        'amazon-order-id': ['111-1', '111-1', '111-1', '111-2', '111-3']
+        , 'sku': ['SKU-A', 'SKU-A', 'SKU-B', 'SKU-A', 'SKU-C']
+        , 'item-price': [10.0, 20.0, 5.0, 8.0, 100.0]
+    }
+)
+
+
+def returns_frame(order_ids, skus):
+    return pd.DataFrame({'order-id': order_ids, 'sku': skus, 'quantity': [1] * len(order_ids)})
+
+
+def test_duplicate_order_lines_are_priced_at_their_mean():
+    prices = OrderLinePrices(ORDER_LINES)
+
+    assert len(prices) == 4
+    np.testing.assert_array_equal(
+        prices.lookup(pd.Series(['111-1', '111-1', '111-2']), pd.Series(['SKU-A', 'SKU-B', 'SKU-A']))
+        , [15.0, 5.0, 8.0]
+    )
+
+
+def test_duplicate_order_lines_do_not_fan_out_the_returns():
+    returns = returns_frame(['111-1', '111-1', '111-2'], ['SKU-A', 'SKU-A', 'SKU-A'])
+
+    priced = price_returns(returns, OrderLinePrices(ORDER_LINES))
+
+    assert len(priced.returns) == len(returns)
+    assert priced.returns.index.equals(returns.index)
+    assert priced.returns['item-price'].tolist() == [15.0, 15.0, 8.0]
+    assert priced.priced_at_average == 0
+
+
+def test_returns_without_an_order_line_are_priced_at_the_average():
+    # an unknown order, and a known order without that sku
+    returns = returns_frame(['111-1', '999-9', '111-2', '111-3'], ['SKU-B', 'SKU-A', 'SKU-C', 'SKU-C'])
+
+    priced = price_returns(returns, OrderLinePrices(ORDER_LINES))
+
+    assert priced.priced_at_average == 2
+    assert priced.returns['item-price'].tolist() == [5.0, 52.5, 52.5, 100.0]
+
+
+def test_only_returned_orders_are_indexed():
+    returns = returns_frame(['111-2'], ['SKU-A'])
+
+    prices = OrderLinePrices(ORDER_LINES, returns['order-id'])
+
+    assert len(prices) == 1
+    assert price_returns(returns, prices).returns['item-price'].tolist() == [8.0]
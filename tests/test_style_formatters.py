@@ -0,0 +1,69 @@
+import openpyxl as xl
+import pytest
+
+from Style_Formatters import bold, center, currency_formatter, highlighter, percent_formatter, thousands_sep_formatter
+
+
+@pytest.fixture
+def worksheet():
+    worksheet = xl.Workbook().active
+
+    for row in range(1, 6):
+        worksheet.append([f'sku {row}', row * 10, row * 1.5, row / 10])
+
+    return worksheet
+
+
+def formatted(worksheet, attribute):
+    """:return: {coordinate: value} of every cell whose `attribute` was changed from the default"""
+    default = getattr(xl.Workbook().active['A1'], attribute)
+
+    return {
+        cell.coordinate: getattr(cell, attribute) for row in worksheet.iter_rows() for cell in row
+        if getattr(cell, attribute) != default
+    }
+
+
+def test_number_formats_of_a_range_a_column_and_a_list(worksheet):
+    currency_formatter(worksheet, 'C2:C4')
+    thousands_sep_formatter(worksheet, 'B')
+    percent_formatter(worksheet, ['D1', 'D5'])
+
+    assert formatted(worksheet, 'number_format') == {
+        **{f'C{row}': '$#,##0.00' for row in range(2, 5)}
+        , **{f'B{row}': '#,##0' for row in range(1, 6)}
+        , 'D1': '#%'
+        , 'D5': '#%'
+    }
+
+
+def test_bold_font_of_a_range_a_column_and_a_list(worksheet):
+    bold(worksheet, 'A1:D1', 'B', ['C5', 'D5'])
+
+    bolded = {coordinate for coordinate, font in formatted(worksheet, 'font').items() if font.b}
+
+    assert bolded == {'A1', 'B1', 'C1', 'D1', 'B2', 'B3', 'B4', 'B5', 'C5', 'D5'}
+
+
+def test_fill_of_a_range_a_column_and_a_list(worksheet):
+    highlighter(worksheet, 'FFFF00', 'C2:D2', 'A', ['B5'])
+
+    fills = {cell.coordinate: cell.fill for row in worksheet.iter_rows() for cell in row if cell.fill.fill_type}
+
+    assert set(fills) == {'C2', 'D2', 'A1', 'A2', 'A3', 'A4', 'A5', 'B5'}
+    assert {(fill.fill_type, fill.start_color.rgb) for fill in fills.values()} == {('solid', '00FFFF00')}
+
+
+def test_center_of_a_whole_sheet_range(worksheet):
+    center(worksheet, f'A1:D{worksheet.max_row}')
+
+    assert len(formatted(worksheet, 'alignment')) == 20
+    assert worksheet['D5'].alignment.horizontal == worksheet['D5'].alignment.vertical == 'center'
+
+
+def test_styling_only_touches_the_targets(worksheet):
+    bold(worksheet, 'B2')
+    currency_formatter(worksheet, 'B2')
+
+    assert worksheet['B3'].font.b is False and worksheet['B3'].number_format == 'General'
+    assert worksheet['B2'].value == 20
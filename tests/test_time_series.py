@@ -0,0 +1,80 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import Parallel_Loader
+from Parse_Cache import ParseCache
+from Report_Pipeline import load
+from Time_Series import DateWindow, parse_day, sales_period
+
+DAYS = pd.Series(pd.to_datetime(['2024-01-30', '2024-01-31', None, '2024-02-01', '2024-02-02']))
+
+
+def test_single_day_window():
+    window = DateWindow(parse_day('2024-01-31'), parse_day('2024-01-31'))
+
+    np.testing.assert_array_equal(window.mask(DAYS), [False, True, False, False, False])
+
+
+def test_window_ends_are_included():
+    window = DateWindow(parse_day('2024-01-31'), parse_day('2024-02-01'))
+
+    np.testing.assert_array_equal(window.mask(DAYS), [False, True, False, True, False])
+
+
+def test_open_ended_windows():
+    from_february = DateWindow(start=parse_day('2024-02-01'))
+    until_february = DateWindow(end=parse_day('2024-01-31'))
+
+    np.testing.assert_array_equal(from_february.mask(DAYS), [False, False, False, True, True])
+    np.testing.assert_array_equal(until_february.mask(DAYS), [True, True, False, False, False])
+
+
+def test_missing_days_are_always_outside():
+    np.testing.assert_array_equal(DateWindow().mask(DAYS), [True, True, False, True, True])
+
+
+def test_empty_window():
+    window = DateWindow(parse_day('2024-03-01'), parse_day('2024-03-31'))
+
+    assert not window.mask(DAYS).any()
+
+
+def test_today_is_left_out_of_the_period():
+    start_date, end_date = sales_period(DAYS, today=date(2024, 2, 2))
+
+    assert (start_date, end_date) == (pd.Timestamp('2024-01-30'), pd.Timestamp('2024-02-01'))
+
+
+def test_period_ends_on_the_last_day_before_today():
+    start_date, end_date = sales_period(DAYS, today=date(2024, 2, 3))
+
+    assert (start_date, end_date) == (pd.Timestamp('2024-01-30'), pd.Timestamp('2024-02-02'))
+
+
+def test_today_is_kept_when_it_is_the_only_day():
+    days = pd.Series(pd.to_datetime(['2024-02-02', '2024-02-02']))
+
+    start_date, end_date = sales_period(days, today=date(2024, 2, 2))
+
+    assert start_date == end_date == pd.Timestamp('2024-02-02')
+
+
+def test_a_window_reads_every_file_once(data_folder, monkeypatch):
+    opened = []
+    classify_header = Parallel_Loader.classify_header
+
+    def counted(file_path, handle):
+        opened.append(file_path)
+
+        return classify_header(file_path, handle)
+
+    monkeypatch.setattr(Parallel_Loader, 'classify_header', counted)
+
+    window = DateWindow(parse_day('2024-02-01'), parse_day('2024-02-29'))
+    dataset = load(data_folder, max_workers=1, cache=ParseCache(enabled=False), window=window)
+
+    assert sorted(opened) == sorted(set(opened)) and len(opened) == len(dataset.classifications)
+    assert window.mask(dataset.data.sales['purchase_date']).all()
+    assert window.mask(dataset.data.returns['return-date']).all()
@@ -0,0 +1,117 @@
+import json
+import math
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Union
+
+import openpyxl as xl
+
+REL_TOL = 1e-9  # numbers may drift in the last decimal places (ex: sums taken in a different order when streaming)
+ABS_TOL = 1e-6
+
+
+def _plain(value: Any) -> Any:
+    """:return: a json-able version of a cell value"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+
+    if isinstance(value, float) and math.isnan(value):
+        return 'NaN'
+
+    return value
+
+
+def workbook_snapshot(path: Union[str, Path]) -> Dict[str, Dict]:
+    """Extracts everything a reader of the workbook would notice, sheet by sheet.
+
+    :param path: (str) the .xlsx file
+    :return: {sheet title: {'state', 'values', 'number_formats', 'bold', 'tables', 'conditional_formats', 'freeze_panes',
+             'column_widths', 'images', 'charts'}}. values are the rows of cell values; number_formats and bold only
+             list the cells that have one
+    """
+    wb = xl.load_workbook(path)
+    snapshot = {}
+
+    for ws in wb.worksheets:
+        cells = [cell for row in ws.iter_rows() for cell in row]
+
+        snapshot[ws.title] = {
+            'state': ws.sheet_state
+            , 'values': [[_plain(value) for value in row] for row in ws.iter_rows(values_only=True)]
+            , 'number_formats': {
+                cell.coordinate: cell.number_format for cell in cells if cell.number_format != 'General'
+            }
+            , 'bold': sorted(cell.coordinate for cell in cells if cell.font is not None and cell.font.b)
+            , 'tables': {name: ref for name, ref in ws.tables.items()}
+            , 'conditional_formats': sorted(
+                [
+                    str(formatting.sqref)
+                    , rule.type
+                    , [[cfvo.type, _plain(cfvo.val)] for cfvo in rule.dataBar.cfvo] if rule.dataBar else []
+                ]
+                for formatting in ws.conditional_formatting for rule in formatting.rules
+            )
+            , 'freeze_panes': ws.freeze_panes
+            , 'column_widths': {
+                letter: round(dimension.width, 2) for letter, dimension in sorted(ws.column_dimensions.items())
+                if dimension.customWidth
+            }
+            , 'images': len(ws._images)
+            , 'charts': len(ws._charts)
+        }
+
+    return snapshot
+
+
+def save_snapshot(snapshot: Dict, path: Union[str, Path]) -> None:
+    """Writes a snapshot as (diff friendly) json."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+def load_snapshot(path: Union[str, Path]) -> Dict:
+    """:return: a snapshot written by `save_snapshot`"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def differences(expected: Any, actual: Any, where: str = '') -> List[str]:
+    """Compares two snapshots (or parts of them); numbers only need to be close, everything else has to match.
+
+    :return: (list) a description of every difference. empty if they're equivalent
+    """
+    numeric = (int, float)
+
+    if isinstance(expected, numeric) and isinstance(actual, numeric) and \
+            not isinstance(expected, bool) and not isinstance(actual, bool):
+        return [] if math.isclose(expected, actual, rel_tol=REL_TOL, abs_tol=ABS_TOL) else \
+            [f'{where}: expected {expected!r}, got {actual!r}']
+
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        found = []
+
+        for key in sorted(set(expected) | set(actual), key=str):
+            if key not in actual:
+                found.append(f'{where}/{key}: missing')
+
+            elif key not in expected:
+                found.append(f'{where}/{key}: unexpected')
+
+            else:
+                found.extend(differences(expected[key], actual[key], f'{where}/{key}'))
+
+        return found
+
+    if isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+        if len(expected) != len(actual):
+            return [f'{where}: expected {len(expected)} items, got {len(actual)}']
+
+        return [found for i, (e, a) in enumerate(zip(expected, actual)) for found in differences(e, a, f'{where}[{i}]')]
+
+    return [] if expected == actual else [f'{where}: expected {expected!r}, got {actual!r}']
+
+
+def without(snapshot: Dict, sheets: Iterable[str]) -> Dict:
+    """:return: the snapshot, minus some sheets (ex: the cover page, whose chart is drawn differently per chart mode)"""
+    return {title: sheet for title, sheet in snapshot.items() if title not in set(sheets)}